@@ -4,6 +4,7 @@ from .apikey import (
 from .checkpoint import (
     Checkpoint, CheckpointBlobs, CheckpointOut, Write
 )
+from .llm_cache import LLMCache
 from .graph import (
     Graph, GraphBase, GraphCreate, GraphOut, GraphUpdate
 )
@@ -17,7 +18,8 @@ from .team import (
     TeamUpdate
 )
 from .thread import (
-    Thread, ThreadBase, ThreadCreate, ThreadOut, ThreadRead, ThreadUpdate
+    Thread, ThreadBase, ThreadCreate, ThreadMessagesOut, ThreadOut, ThreadRead,
+    ThreadUpdate
 )
 from .upload import (
     Upload, UploadBase, UploadCreate, UploadOut, UploadUpdate
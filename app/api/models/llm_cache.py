@@ -0,0 +1,16 @@
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy.dialects.postgresql import JSONB
+
+from sqlmodel import Column, Field, SQLModel
+
+
+class LLMCache(SQLModel, table=True):
+    """Postgres tier of the exact-match LLM response cache"""
+    __tablename__ = "llm_cache"
+
+    key: str = Field(primary_key=True, max_length=64)  # sha256 of llm string and prompt
+    generations: list[Any] = Field(default_factory=list, sa_column=Column(JSONB, nullable=False))
+    created_at: datetime = Field(default_factory=datetime.now, nullable=False)
+    expires_at: datetime = Field(index=True, nullable=False)
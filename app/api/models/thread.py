@@ -29,7 +29,10 @@ class Thread(ThreadBase, table=True):
     )
     team_id: uuid.UUID | None = Field(default=None, foreign_key="team.id", nullable=False)
     owner_id: uuid.UUID | None = Field(default=None, foreign_key="user.id", nullable=True)
-    
+    # 滚动摘要, 覆盖会话的前 summarized_messages 条消息, 避免每轮重新总结
+    history_summary: str | None = Field(default=None)
+    summarized_messages: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+
 
 class ThreadOut(SQLModel):
     id: uuid.UUID
@@ -39,3 +42,9 @@ class ThreadOut(SQLModel):
 
 class ThreadRead(ThreadOut):
     messages: list[ChatResponse]
+
+
+class ThreadMessagesOut(SQLModel):
+    messages: list[ChatResponse]
+    next_cursor: int | None = None
+    total: int
@@ -13,6 +13,8 @@ from fastapi_pagination.links import Page
 
 from fastapi_filter import FilterDepends
 
+from app.core.graph.cache import bump_team_version
+
 from ..filters import GraphFilter
 
 router = APIRouter(prefix="/graph", tags=["graph"])
@@ -56,6 +58,7 @@ async def create_graph(
         "owner_id": current_team_and_user.user.id
     })
     session.add(graph)
+    await bump_team_version(session, graph.team_id)
     await session.commit()
     await session.refresh(graph)
     return graph
@@ -73,6 +76,7 @@ async def update_graph(
     """        
     graph.sqlmodel_update(graph_in)
     session.add(graph)
+    await bump_team_version(session, graph.team_id)
     await session.commit()
     await session.refresh(graph)
     return graph
@@ -87,5 +91,6 @@ async def delete_graph(
     Delete graph by ID.
     """
     await session.delete(graph)
+    await bump_team_version(session, graph.team_id)
     await session.commit()
     return Message(message="Graph deleted successfully")
@@ -16,6 +16,8 @@ from fastapi_pagination.links import Page
 
 from fastapi_filter import FilterDepends
 
+from app.core.providers import model_provider_manager
+
 from ..filters import ProviderFilter
 
 
@@ -71,6 +73,7 @@ async def update_provider(
     """
     Update a provider.
     """
+    credentials = (provider.provider_name, provider.decrypted_api_key, provider.base_url)
 
     provider.sqlmodel_update(provider_in)
 
@@ -80,6 +83,7 @@ async def update_provider(
     session.add(provider)
     await session.commit()
     await session.refresh(provider)
+    model_provider_manager.clients.invalidate(*credentials)
     return provider
 
 
@@ -88,6 +92,8 @@ async def delete_provider(provider: CurrentInstanceProvider, session: SessionDep
     """
     Delete a provider.
     """
+    credentials = (provider.provider_name, provider.decrypted_api_key, provider.base_url)
     await session.delete(provider)
     await session.commit()
+    model_provider_manager.clients.invalidate(*credentials)
     return Message(message="Api key deleted successfully")
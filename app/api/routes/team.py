@@ -18,6 +18,8 @@ from fastapi_pagination.links import Page
 
 from fastapi_filter import FilterDepends
 
+from app.core.graph.cache import graph_cache
+
 from ..filters import TeamFilter
 
 
@@ -81,6 +83,7 @@ async def update_team(
     session.add(team)
     await session.commit()
     await session.refresh(team)
+    graph_cache.invalidate(team.id)
     return team
 
 
@@ -91,4 +94,5 @@ async def delete_team(session: SessionDep, team: CurrentInstanceTeam) -> Any:
     """
     await session.delete(team)
     await session.commit()
+    graph_cache.invalidate(team.id)
     return Message(message="Team deleted successfully")
@@ -1,7 +1,8 @@
 from datetime import datetime
-from typing import Any
+from typing import Any, Literal
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlmodel import select
 
 from app.api.dependencies import CurrentTeamAndUser, SessionDep, CurrentInstanceThread, InstanceStatementThread
@@ -10,6 +11,7 @@ from app.api.models import (
     Message,
     Thread,
     ThreadCreate,
+    ThreadMessagesOut,
     ThreadOut,
     ThreadRead,
     ThreadUpdate,
@@ -19,6 +21,10 @@ from fastapi_pagination.links import Page
 
 from fastapi_filter import FilterDepends
 
+from app.core.graph.checkpointer import thread_state_cache
+from app.core.graph.replay import replay_registry
+from app.core.graph.transcript import thread_transcript
+
 from ..filters import ThreadFilter
 
 
@@ -51,6 +57,41 @@ async def read_thread(
     return thread
 
 
+@router.get("/{id}/messages", response_model=ThreadMessagesOut)
+async def read_thread_messages(
+    thread: CurrentInstanceThread,
+    cursor: int | None = Query(default=None, ge=0),
+    limit: int = Query(default=50, ge=1, le=500),
+    order: Literal["asc", "desc"] = "desc",
+) -> Any:
+    """
+    Page through the thread's messages, newest first by default, following
+    `next_cursor`
+    """
+    messages, next_cursor, total = await thread_transcript.page(
+        str(thread.id), cursor, limit, order
+    )
+    return ThreadMessagesOut(messages=messages, next_cursor=next_cursor, total=total)
+
+
+@router.get("/{id}/stream")
+async def resume_thread_stream(
+    thread: CurrentInstanceThread,
+    last_event_id: str = Header(default=""),
+) -> StreamingResponse:
+    """
+    Replay the frames of the thread's current run after `Last-Event-ID`, then
+    follow the run until it ends
+    """
+    if (buffer := replay_registry.get(str(thread.id))) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="No resumable stream for thread"
+        )
+    return StreamingResponse(
+        buffer.subscribe(last_event_id), media_type="text/event-stream"
+    )
+
+
 @router.post("/", response_model=ThreadOut)
 async def create_thread(
     *,
@@ -101,4 +142,6 @@ async def delete_thread(
 
     await session.delete(thread)
     await session.commit()
+    thread_state_cache.evict(str(thread.id))
+    thread_state_cache.publish(str(thread.id))
     return Message(message="Thread deleted successfully")
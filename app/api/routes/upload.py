@@ -18,6 +18,8 @@ from fastapi_pagination.links import Page
 
 from fastapi_filter import FilterDepends
 
+from app.core.graph.cache import bump_team_version
+from app.core.graph.semantic_cache import semantic_cache
 from app.core.rag.embedding import file_to_embeddings
 
 from ..filters import UploadFilter
@@ -97,6 +99,7 @@ async def update_upload(
         "last_modified": datetime.now()
     })
     session.add(upload)
+    await bump_team_version(session, upload.team_id)
     await session.commit()
     await session.refresh(upload)
     return upload
@@ -111,6 +114,7 @@ async def delete_upload(
     Delete upload by ID.
     """
     await session.delete(upload)
+    await bump_team_version(session, upload.team_id)
     await session.commit()
     return Message(message="Upload deleted successfully")
 
@@ -131,6 +135,8 @@ async def build_file_to_vector(
         "status": True
     })
     session.add(upload)
+    await bump_team_version(session, upload.team_id)
     await session.commit()
+    semantic_cache.invalidate(upload.team_id)
     await session.refresh(upload)
     return Message(message=f"Upload {upload.id} has been vectorized successfully")
@@ -1,4 +1,7 @@
 from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import registry
 
 
 router = APIRouter(prefix="/utils", tags=["utils"])
@@ -7,3 +10,11 @@ router = APIRouter(prefix="/utils", tags=["utils"])
 @router.get("/health-check/")
 async def health_check() -> bool:
     return True
+
+
+@router.get("/metrics/", response_class=PlainTextResponse)
+async def metrics() -> str:
+    """
+    Process metrics in the Prometheus text format.
+    """
+    return registry.render()
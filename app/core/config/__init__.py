@@ -83,7 +83,46 @@ class Settings(BaseSettings):
             port=self.POSTGRES_PORT,
             path=self.POSTGRES_DB,
         )
-    
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def PG_DATABASE_URI(self) -> str:
+        """Plain libpq URI used by psycopg (LangGraph checkpointer)"""
+        return MultiHostUrl.build(
+            scheme="postgresql",
+            username=self.POSTGRES_USER,
+            password=self.POSTGRES_PASSWORD,
+            host=self.POSTGRES_SERVER,
+            port=self.POSTGRES_PORT,
+            path=self.POSTGRES_DB,
+        ).unicode_string()
+
+    SQLALCHEMY_CONNECTION_KWARGS: dict[str, Any] = {
+        "autocommit": True,
+        "prepare_threshold": 0,
+    }
+
+    """Checkpointer 连接池配置"""
+    CHECKPOINT_POOL_MIN_SIZE: int = 2
+    CHECKPOINT_POOL_MAX_SIZE: int = 20
+    CHECKPOINT_POOL_TIMEOUT: float = 30.0  # 获取连接的最长等待秒数
+    CHECKPOINT_POOL_MAX_IDLE: float = 600.0  # 空闲连接回收秒数
+    CHECKPOINT_SERDE_COMPRESSION: bool = True  # 压缩检查点 blob (zstd, 未安装时使用 zlib), 关闭后仅新写入不压缩, 已压缩的数据仍可读取
+    CHECKPOINT_SERDE_LEVEL: int = 3
+    CHECKPOINT_SERDE_MIN_BYTES: int = 256  # 小于该大小的 blob 不压缩
+    # zstd 字典文件路径 (serde.train_dictionary 生成), 更换后旧字典写入的行需保留旧字典才能读取
+    CHECKPOINT_SERDE_DICTIONARY: str | None = None
+    CHECKPOINT_COMPACTION_ENABLED: bool = True  # 定期清理被取代的检查点版本
+    CHECKPOINT_COMPACTION_KEEP: int = 20  # 每个线程保留的最新检查点数量
+    CHECKPOINT_COMPACTION_INTERVAL: float = 600.0  # 两次清理之间的秒数
+    CHECKPOINT_COMPACTION_ROWS_PER_SECOND: float = 500.0  # 每秒最多删除的行数, 0 表示不限速
+    CHECKPOINT_COMPACTION_BATCH_SIZE: int = 200  # 单条 DELETE 语句删除的最大行数
+    CHECKPOINT_COMPACTION_MIN_IDLE: float = 300.0  # 只清理空闲超过该秒数的线程
+    CHECKPOINT_COMPACTION_THREADS_PER_PASS: int = 100  # 每次清理按主键顺序检查的线程数
+    CHECKPOINT_CACHE_ENABLED: bool = True  # 内存缓存活跃线程的最新检查点 (写穿透, LISTEN/NOTIFY 跨进程失效)
+    CHECKPOINT_CACHE_MAX_THREADS: int = 1024
+    CHECKPOINT_CACHE_RECONNECT_DELAY: float = 5.0  # 失效监听连接断开后的重连秒数
+
     SMTP_TLS: bool = True
     SMTP_SSL: bool = False
     SMTP_PORT: int = 587
@@ -102,6 +141,7 @@ class Settings(BaseSettings):
     AWS_S3_UPLOAD_BUFFER: int = 5 * 1024 * 1024  # 5MB 分块大小
     AWS_S3_DOWNLOAD_BUFFER: int = 1024 * 1024
     AWS_S3_UPLOAD_PREFIX: str
+    AWS_S3_IMAGE_PREFIX: str = "chat-images"  # 聊天图片的对象键前缀
 
     """Milvus 配置"""
     MILVUS_HOST: str
@@ -122,6 +162,8 @@ class Settings(BaseSettings):
         "m": 16,
         "ef_construction": 1024,
     }
+    EMBEDDING_BATCH_SIZE: int = 32  # 每次 aembed_documents 请求的分块数量
+    EMBEDDING_CONCURRENCY: int = 4  # 同时进行的嵌入请求数量
 
     @model_validator(mode="after")
     def _set_default_emails_from(self) -> Self:
@@ -162,6 +204,52 @@ class Settings(BaseSettings):
         return self
     
     MODEL_PROVIDER_ENCRYPTION_KEY: str = ""
+    MODEL_CLIENT_CACHE_SIZE: int = 64  # 复用的模型客户端数量, 0 表示不复用
+    LLM_CACHE_ENABLED: bool = False  # 缓存 temperature=0 模型调用的响应, 命中的回复不逐 token 流式输出, 而是作为一个完整帧返回
+    LLM_CACHE_SIZE: int = 1024  # 内存缓存的响应数量
+    LLM_CACHE_TTL: int = 24 * 60 * 60  # 缓存过期秒数
+    LLM_CACHE_PERSISTENT: bool = True  # 同时缓存到 Postgres (llm_cache 表)
+
+    """Graph 配置"""
+    GRAPH_CACHE_SIZE: int = 128  # 缓存的已编译团队图数量, 0 表示关闭缓存
+    RECURSION_LIMIT: int = 25
+    CHAT_HISTORY_TOKEN_BUDGET: int = 8000  # 每轮对话历史的 token 上限, 0 表示不限制
+    CHAT_HISTORY_MODEL_BUDGETS: dict[str, int] = {}  # 模型名 -> token 上限, 覆盖默认值
+    CHAT_HISTORY_STRATEGY: Literal["drop", "summarize"] = "summarize"  # 超出部分丢弃或总结
+    CHAT_HISTORY_SUMMARY_TOKENS: int = 512  # 为摘要预留的 token 数
+    CHAT_STREAM_COALESCE_WINDOW_MS: int = 30  # 合并流式 token 的时间窗口, 0 表示逐 token 输出
+    CHAT_STREAM_COALESCE_MAX_BYTES: int = 2048  # 单个合并帧的最大字节数
+    CHAT_USAGE_FRAME: bool = True  # 运行结束时推送各节点耗时与 token 统计帧
+    CHAT_DISCONNECT_POLL_INTERVAL: float = 1.0  # 检测客户端断开的间隔秒数
+    CHAT_EXECUTION_MODE: Literal["inline", "process"] = "inline"  # process: 由独立执行进程运行图
+    CHAT_EXECUTOR_WORKERS: int = 2  # 每个 API 进程启动的图执行进程数
+    CHAT_MAX_RUNS_PER_TEAM: int = 8  # 每个团队同时运行的对话数, 0 表示不限制
+    CHAT_MAX_RUNS_PER_TENANT: int = 32
+    CHAT_MAX_RUNS_PER_MODEL: int = 32  # 每个 provider/model 同时运行的对话数
+    CHAT_ADMISSION_MAX_QUEUED: int = 64  # 每个租户排队等待的最大对话数, 超出时以 error 帧结束对话流
+    CHAT_ADMISSION_RETRY_AFTER: int = 5  # 排队已满时建议客户端重试的秒数
+    CHAT_TENANT_WEIGHTS: dict[str, float] = {}  # 租户 id -> 公平队列权重, 默认为 1
+    CHAT_REPLAY_BUFFER_SIZE: int = 0  # 每个会话缓存的可重放帧数, 0 表示关闭断线续传 (开启后断开的运行会继续 CHAT_REPLAY_GRACE 秒)
+    CHAT_REPLAY_GRACE: float = 30.0  # 客户端断开后等待重连的秒数, 超时取消运行
+    CHAT_REPLAY_TTL: float = 300.0  # 运行结束后保留可重放帧的秒数
+    SEMANTIC_CACHE_ENABLED: bool = False  # ragbot 对相似问题直接返回缓存的回答
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92  # 命中所需的最低余弦相似度
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 512  # 每个团队缓存的回答数量
+    SEMANTIC_CACHE_EMBEDDING_MODEL: str = "mxbai-embed-large"
+    SEMANTIC_CACHE_EMBEDDING_BASE_URL: str = "http://host.docker.internal:11434"  # 嵌入模型所在的 Ollama 服务地址
+    SEMANTIC_CACHE_CONTEXT_MESSAGES: int = 2  # 与问题一起嵌入的前文消息数, 上下文不同的追问不会命中
+    HIERARCHICAL_PARALLEL_DELEGATION: bool = False  # 允许 leader 同时委派多个成员并发执行
+    HIERARCHICAL_MAX_PARALLEL_WORKERS: int = 4
+    CHAT_TOOL_CONCURRENCY: int = 4  # 单个工具节点同时执行的工具调用数
+    CHAT_TOOL_TIMEOUT: float = 60.0  # 单个工具调用的超时秒数, 0 表示不限制
+    CHAT_TOOL_DEADLINE: float = 120.0  # 工具节点的总时限, 超时取消仍在执行的调用
+    HTTP_CLIENT_MAX_CONNECTIONS: int = 100  # 第三方/工具共享 HTTP 客户端的连接池大小
+    HTTP_CLIENT_MAX_KEEPALIVE: int = 20
+    CHAT_IMAGE_OFFLOAD: bool = False  # 聊天图片上传到 S3, 消息与检查点中只保存引用 (开启后模型会被包装以在调用前解析图片)
+    CHAT_IMAGE_INLINE_MAX_BYTES: int = 16 * 1024  # 小于该大小的图片仍内联保存
+    CHAT_IMAGE_CACHE_SIZE: int = 64  # 进程内缓存的已解析图片数量
+    CHAT_IMAGE_LINK_TTL: int = 3600  # 返回给客户端的图片临时链接有效秒数
+    CHAT_TRANSCRIPT_CACHE_SIZE: int = 128  # 缓存的已解码线程消息索引数量
 
     LOGGING_DIR: str = 'logs'
 
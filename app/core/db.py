@@ -9,16 +9,50 @@ from app.core.security import get_password_hash
 from pydantic import PostgresDsn
 from sqlalchemy.ext.asyncio.engine import AsyncEngine
 from sqlalchemy.ext.asyncio import create_async_engine
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
+
+from app.core.metrics import registry
 
 dsn: PostgresDsn = settings.SQLALCHEMY_RUNNABLE_DATABASE_URI
 engine: AsyncEngine = create_async_engine(dsn.unicode_string())
 
+# Shared psycopg pool for the LangGraph checkpointer, opened/closed by the app lifespan
+checkpoint_pool: AsyncConnectionPool = AsyncConnectionPool(
+    conninfo=settings.PG_DATABASE_URI,
+    min_size=settings.CHECKPOINT_POOL_MIN_SIZE,
+    max_size=settings.CHECKPOINT_POOL_MAX_SIZE,
+    timeout=settings.CHECKPOINT_POOL_TIMEOUT,
+    max_idle=settings.CHECKPOINT_POOL_MAX_IDLE,
+    kwargs={**settings.SQLALCHEMY_CONNECTION_KWARGS, "row_factory": dict_row},
+    check=AsyncConnectionPool.check_connection,
+    name="checkpoint",
+    open=False,
+)
+
+registry.gauge(
+    "checkpoint_pool_stats",
+    "psycopg pool statistics of the checkpointer connection pool",
+    collect=lambda: {
+        (("stat", name),): float(value)
+        for name, value in checkpoint_pool.get_stats().items()
+    },
+)
+
 
 # make sure all SQLModel models are imported (app.api.models) before initializing DB
 # otherwise, SQLModel might fail to initialize relationships properly
 # for more details: https://github.com/fastapi/full-stack-fastapi-template/issues/28
         
 
+async def open_checkpoint_pool() -> None:
+    await checkpoint_pool.open(wait=True)
+
+
+async def close_checkpoint_pool() -> None:
+    await checkpoint_pool.close()
+
+
 async def init_db(session: AsyncSession) -> None:
     # Tables should be created with Alembic migrations
     # But if you don't want to use migrations, create
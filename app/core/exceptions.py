@@ -69,17 +69,18 @@ async def validate_exception_handler(request: Request, exc: ValidationError) ->
 
 
 async def http_exception_handler(request: Request, exc: HTTPException) -> JSONResponse:
-     
-     errors = exc.detail
-     await logger.error(f"HTTP Error: {errors}")
 
-     return JSONResponse(
-         status_code=exc.status_code,
-         content={
+    errors = exc.detail
+    await logger.error(f"HTTP Error: {errors}")
+
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={
             "status_code": exc.status_code,
             "message": "HTTP Error",
             "errors": errors
-        },   
+        },
+        headers=exc.headers,
     )
 
 
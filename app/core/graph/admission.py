@@ -0,0 +1,192 @@
+import asyncio
+from collections import Counter
+from collections.abc import AsyncIterator, Hashable
+from typing import TYPE_CHECKING
+
+from fastapi import HTTPException, status
+
+from app.api.models import Team
+from app.core.config import settings
+from app.core.metrics import registry
+
+if TYPE_CHECKING:
+    # Only the graph runtime (build.py) has members, see app.core.graph.cache
+    from app.api.models import Member
+
+
+admission_running = registry.gauge(
+    "chat_admission_running", "Admitted chat runs in flight"
+)
+admission_queued = registry.gauge(
+    "chat_admission_queued", "Chat runs waiting for admission"
+)
+admission_rejected = registry.counter(
+    "chat_admission_rejected_total", "Chat runs rejected because the queue was full"
+)
+
+AdmissionKey = tuple[str, Hashable]
+
+
+class Ticket:
+    """A chat run holding, or waiting for, a slot on each of its admission keys."""
+
+    __slots__ = (
+        "controller",
+        "keys",
+        "tenant",
+        "tag",
+        "admitted",
+        "updated",
+        "claimed",
+        "released",
+    )
+
+    def __init__(
+        self,
+        controller: "AdmissionController",
+        keys: tuple[AdmissionKey, ...],
+        tenant: str,
+        tag: float = 0.0,
+    ):
+        self.controller = controller
+        self.keys = keys
+        self.tenant = tenant
+        self.tag = tag  # virtual finish time in the weighted fair queue
+        self.admitted = False
+        self.updated = asyncio.Event()
+        self.claimed = False  # a started stream releases the ticket when it ends
+        self.released = False
+
+    async def wait(self) -> AsyncIterator[int]:
+        """Yield the 1-based queue position whenever it changes, until admitted."""
+        last = 0
+        while not self.admitted:
+            if (position := self.controller.position(self)) != last:
+                last = position
+                yield position
+            await self.updated.wait()
+            self.updated.clear()
+
+    def release(self) -> None:
+        self.controller.release(self)
+
+    async def release_unclaimed(self) -> None:
+        """Release the ticket of a response whose stream never started."""
+        if not self.claimed:
+            self.release()
+
+
+class AdmissionController:
+    """
+    Bounds concurrent chat runs per team, tenant and provider/model.
+
+    Runs that don't fit wait in a weighted fair queue: each waiting run is tagged
+    with a virtual finish time advancing by `1 / weight` per run of its tenant, and
+    released slots go to the lowest tag whose keys all fit. Limits are enforced per
+    API process.
+    """
+
+    def __init__(
+        self,
+        team_limit: int,
+        tenant_limit: int,
+        model_limit: int,
+        max_queued: int,
+        weights: dict[str, float],
+    ):
+        self.limits = {"team": team_limit, "tenant": tenant_limit, "model": model_limit}
+        self.max_queued = max_queued
+        self.weights = weights
+        self._running: Counter[AdmissionKey] = Counter()
+        self._waiting: list[Ticket] = []
+        self._queued: Counter[str] = Counter()
+        self._last_tag: dict[str, float] = {}
+        self._virtual_time = 0.0
+
+    def _fits(self, keys: tuple[AdmissionKey, ...]) -> bool:
+        return all(
+            self.limits[key[0]] <= 0 or self._running[key] < self.limits[key[0]]
+            for key in keys
+        )
+
+    def _start(self, ticket: Ticket) -> None:
+        ticket.admitted = True
+        self._running.update(ticket.keys)
+        admission_running.inc()
+
+    def admit(self, team: Team, members: list["Member"]) -> Ticket:
+        """
+        Start a run of the team right away or queue it.
+
+        Raises:
+            HTTPException: 429 with `Retry-After` if the tenant's queue is full.
+        """
+        tenant = str(team.tenant_id)
+        models = {(member.provider, member.model) for member in members if member.model}
+        keys: tuple[AdmissionKey, ...] = (
+            ("team", str(team.id)),
+            ("tenant", tenant),
+            *(("model", f"{provider}/{model}") for provider, model in sorted(models)),
+        )
+        # Anything that fits now can't be blocking an earlier waiter, see `_dispatch`
+        if self._fits(keys):
+            ticket = Ticket(self, keys, tenant)
+            self._start(ticket)
+            return ticket
+
+        if self._queued[tenant] >= self.max_queued:
+            admission_rejected.inc(tenant=tenant)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many concurrent chat runs, retry later",
+                headers={"Retry-After": str(settings.CHAT_ADMISSION_RETRY_AFTER)},
+            )
+
+        weight = self.weights.get(tenant, 1.0)
+        tag = max(self._virtual_time, self._last_tag.get(tenant, 0.0)) + 1 / weight
+        self._last_tag[tenant] = tag
+        ticket = Ticket(self, keys, tenant, tag)
+        self._waiting.append(ticket)
+        self._waiting.sort(key=lambda waiting: waiting.tag)
+        self._queued[tenant] += 1
+        admission_queued.inc()
+        return ticket
+
+    def position(self, ticket: Ticket) -> int:
+        return self._waiting.index(ticket) + 1 if ticket in self._waiting else 0
+
+    def release(self, ticket: Ticket) -> None:
+        if ticket.released:
+            return
+        ticket.released = True
+        if ticket.admitted:
+            self._running -= Counter(ticket.keys)
+            admission_running.dec()
+        else:
+            self._dequeue(ticket)
+        self._dispatch()
+
+    def _dequeue(self, ticket: Ticket) -> None:
+        self._waiting.remove(ticket)
+        self._queued[ticket.tenant] -= 1
+        admission_queued.dec()
+
+    def _dispatch(self) -> None:
+        for ticket in list(self._waiting):
+            if self._fits(ticket.keys):
+                self._dequeue(ticket)
+                self._virtual_time = max(self._virtual_time, ticket.tag)
+                self._start(ticket)
+                ticket.updated.set()
+        # Let the remaining waiters report their new position
+        for ticket in self._waiting:
+            ticket.updated.set()
+
+
+admission = AdmissionController(
+    team_limit=settings.CHAT_MAX_RUNS_PER_TEAM,
+    tenant_limit=settings.CHAT_MAX_RUNS_PER_TENANT,
+    model_limit=settings.CHAT_MAX_RUNS_PER_MODEL,
+    max_queued=settings.CHAT_ADMISSION_MAX_QUEUED,
+    weights=settings.CHAT_TENANT_WEIGHTS,
+)
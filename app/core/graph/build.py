@@ -1,23 +1,38 @@
-import asyncio
 from collections import defaultdict, deque
-from collections.abc import AsyncGenerator, Hashable, Mapping
+from collections.abc import (
+    AsyncGenerator,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Hashable,
+    Mapping,
+)
+from contextlib import aclosing
 from functools import partial
 from typing import Any, cast
 from uuid import uuid4
 
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
 from langchain_core.messages import AIMessage, AnyMessage, HumanMessage, ToolMessage
 from langchain_core.runnables import RunnableLambda
 from langchain_core.runnables.config import RunnableConfig
 from langchain_core.tools import BaseTool
 from langgraph.checkpoint.base import BaseCheckpointSaver
-# from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
 from langgraph.graph import END, StateGraph
 from langgraph.graph.graph import CompiledGraph
-from langgraph.prebuilt import ToolNode
-from langgraph.types import Command
-from psycopg import AsyncConnection
+from langgraph.types import Command, Send
+from starlette.background import BackgroundTask
 
+from app.api.models import ChatMessage, Interrupt, InterruptDecision, Member, Team
 from app.core.config import settings
+from app.core.db import checkpoint_pool
+from app.core.graph.admission import Ticket, admission
+from app.core.graph.cache import TeamGraph, graph_cache, team_version
+from app.core.graph.checkpointer import CachedPostgresSaver
+from app.core.graph.executor import executor_pool
+from app.core.graph.history import HistoryWindow, history_manager
 from app.core.graph.members import (
     GraphLeader,
     GraphMember,
@@ -28,10 +43,22 @@ from app.core.graph.members import (
     SummariserNode,
     WorkerNode,
 )
-from app.core.graph.messages import ChatResponse, event_to_response
+from app.core.graph.messages import ChatFrame, EventTranslator, FrameEncoder
+from app.core.graph.replay import replay_registry
+from app.core.graph.semantic_cache import (
+    LOOKUP_NODE,
+    STORE_NODE,
+    create_lookup_node,
+    route_lookup,
+    store_node,
+)
+from app.core.graph.serde import checkpoint_serde
+from app.core.graph.stream import cancel_on_disconnect, coalesce_responses
+from app.core.graph.tools import ParallelToolNode
+from app.core.graph.usage import UsageTracker
+from app.core.llm.images import IMAGE_REF_SCHEME, offload_image
 from app.core.state import GraphSkill, GraphUpload
 from app.core.workflow.build_workflow import initialize_graph
-from app.api.models import ChatMessage, Interrupt, InterruptDecision, Member, Team
 
 
 def convert_hierarchical_team_to_dict(
@@ -264,6 +291,28 @@ def router(state: GraphTeamState) -> str:
     return state["next"]
 
 
+def fan_out_router(
+    state: GraphTeamState, parallel_members: frozenset[str]
+) -> str | list[Send]:
+    """
+    Router for parallel delegation: the leader may set `next` to several members.
+
+    Members in `parallel_members` (leaders and workers without tools, whose turn is a
+    single node run) are fanned out with `Send` and run in the same step; their updates
+    are merged by the state reducers before the leader runs again. Any other
+    combination falls back to delegating to the first member only.
+    """
+    next = state["next"]
+    if isinstance(next, str):
+        return next
+    targets = [name for name in dict.fromkeys(next) if name != "FINISH"]
+    if not targets:
+        return "FINISH"
+    if len(targets) > 1 and all(name in parallel_members for name in targets):
+        return [Send(name, state) for name in targets]
+    return targets[0]
+
+
 def enter_chain(state: GraphTeamState, team: GraphTeam) -> dict[str, Any]:
     """
     Initialise the sub-graph state.
@@ -402,7 +451,7 @@ def create_hierarchical_graph(
 
                 if normal_tools:
                     # Add node for normal tools
-                    build.add_node(f"{name}_tools", ToolNode(normal_tools))
+                    build.add_node(f"{name}_tools", ParallelToolNode(normal_tools))
                     build.add_edge(f"{name}_tools", name)
 
                     # Interrupt for normal tools only if member.interrupt is True
@@ -433,7 +482,20 @@ def create_hierarchical_graph(
 
     conditional_mapping: dict[Hashable, str] = {v: v for v in members}
     conditional_mapping["FINISH"] = "FinalAnswer"
-    build.add_conditional_edges(leader_name, router, conditional_mapping)
+    if settings.HIERARCHICAL_PARALLEL_DELEGATION:
+        parallel_members = frozenset(
+            name
+            for name, member in members.items()
+            if isinstance(member, GraphLeader)
+            or (isinstance(member, GraphMember) and not member.tools)
+        )
+        build.add_conditional_edges(
+            leader_name,
+            partial(fan_out_router, parallel_members=parallel_members),
+            conditional_mapping,
+        )
+    else:
+        build.add_conditional_edges(leader_name, router, conditional_mapping)
 
     build.set_entry_point(leader_name)
     build.set_finish_point("FinalAnswer")
@@ -445,7 +507,7 @@ def create_hierarchical_graph(
 
 
 def create_sequential_graph(
-    team: Mapping[str, GraphMember], checkpointer: BaseCheckpointSaver
+    team: Mapping[str, GraphMember], checkpointer: BaseCheckpointSaver | None = None
 ) -> CompiledGraph:
     """
     Creates a sequential graph from a list of team members.
@@ -489,7 +551,7 @@ def create_sequential_graph(
 
             if normal_tools:
                 # Add node for normal tools
-                graph.add_node(f"{member.name}_tools", ToolNode(normal_tools))
+                graph.add_node(f"{member.name}_tools", ParallelToolNode(normal_tools))
                 graph.add_edge(f"{member.name}_tools", member.name)
 
                 # Interrupt for normal tools only if member.interrupt is True
@@ -529,12 +591,16 @@ def create_sequential_graph(
 
 
 def create_chatbot_ragbot_graph(
-    team: Mapping[str, GraphMember], checkpointer: BaseCheckpointSaver
+    team: Mapping[str, GraphMember],
+    checkpointer: BaseCheckpointSaver | None = None,
+    semantic_cache: bool = False,
 ) -> CompiledGraph:
     """
     Creates a simple chatbot graph for a single team member.
     Args:
         team (Mapping[str, GraphMember]): A mapping of a single team member.
+        semantic_cache (bool): Answer paraphrased questions from `semantic_cache`
+            before calling the member, and remember the member's answers.
     Returns:
         CompiledGraph: The compiled graph representing the sequential workflow.
     """
@@ -572,27 +638,83 @@ def create_chatbot_ragbot_graph(
 
         if normal_tools:
             # Add node for normal tools
-            graph.add_node(f"{member.name}_tools", ToolNode(normal_tools))
+            graph.add_node(f"{member.name}_tools", ParallelToolNode(normal_tools))
             graph.add_edge(f"{member.name}_tools", member.name)
 
             # Interrupt for normal tools only if member.interrupt is True
             if member.interrupt:
                 interrupt_member_names.append(f"{member.name}_tools")
+    exit_node = END
+    if semantic_cache:
+        exit_node = STORE_NODE
+        graph.add_node(LOOKUP_NODE, create_lookup_node(member.name))
+        graph.add_node(STORE_NODE, store_node)
+        graph.add_conditional_edges(
+            LOOKUP_NODE, route_lookup, {member.name: member.name, END: END}
+        )
+        graph.add_edge(STORE_NODE, END)
     if len(member.tools) >= 1:
         graph.add_conditional_edges(
             member.name,
             should_continue,
-            create_tools_condition(member.name, END, member.tools),
+            create_tools_condition(member.name, exit_node, member.tools),
         )
     else:
-        graph.add_edge(member.name, END)
+        graph.add_edge(member.name, exit_node)
     # graph.add_edge(member.name, END)
-    graph.set_entry_point(member.name)
+    graph.set_entry_point(LOOKUP_NODE if semantic_cache else member.name)
     return graph.compile(
         checkpointer=checkpointer, interrupt_before=interrupt_member_names
     )
 
 
+def build_team_graph(team: Team, members: list[Member]) -> TeamGraph:
+    """
+    Convert the team into its graph representation and compile it.
+
+    The graph is compiled without a checkpointer so it can be cached by `graph_cache`
+    and shared across chat streams; nested subgraphs inherit the parent's checkpointer.
+    """
+    if team.workflow == "hierarchical":
+        teams = convert_hierarchical_team_to_dict(team, members)
+        team_leader = list(teams.keys())[0]
+        root = create_hierarchical_graph(teams, leader_name=team_leader)
+        return TeamGraph(graph=root, team=teams[team_leader])
+    elif team.workflow == "sequential":
+        member_dict = convert_sequential_team_to_dict(members)
+        root = create_sequential_graph(member_dict, checkpointer=None)
+    elif team.workflow in ["ragbot", "chatbot"]:
+        member_dict = convert_chatbot_chatrag_team_to_dict(
+            members, workflow_type=team.workflow
+        )
+        root = create_chatbot_ragbot_graph(
+            member_dict,
+            checkpointer=None,
+            semantic_cache=team.workflow == "ragbot" and settings.SEMANTIC_CACHE_ENABLED,
+        )
+    elif team.workflow in ["workflow"]:
+        graph_config = team.graphs[0].config
+        root = initialize_graph(graph_config, None, save_graph_img=False)
+        return TeamGraph(graph=root)
+    else:
+        raise ValueError("Unsupported graph type ")
+
+    first_member = list(member_dict.values())[0]
+    return TeamGraph(
+        graph=root,
+        team=GraphTeam(
+            name=first_member.name,
+            role=first_member.role,
+            backstory=first_member.backstory,
+            members=member_dict,  # type: ignore[arg-type]
+            provider=first_member.provider,
+            model=first_member.model,
+            temperature=first_member.temperature,
+        ),
+        entry=first_member.name,
+    )
+
+
 def convert_messages_and_tasks_to_dict(data: Any) -> Any:
     if isinstance(data, dict):
         new_data = {}
@@ -611,323 +733,464 @@ def convert_messages_and_tasks_to_dict(data: Any) -> Any:
         return data
 
 
+async def stream_graph(
+    root: CompiledGraph,
+    state: Any,
+    config: RunnableConfig,
+    nodes: list[dict[str, Any]] | None = None,
+) -> AsyncGenerator[ChatFrame, Any]:
+    """
+    Run the graph and yield its events translated and coalesced into frames,
+    followed by a "usage" frame with the per-node latency and token figures.
+    """
+    translator = EventTranslator(nodes)
+    usage = UsageTracker(translator.label)
+
+    async def responses() -> AsyncGenerator[ChatFrame, Any]:
+        async for event in root.astream_events(state, version="v2", config=config):
+            usage.observe(event)
+            if response := translator.translate(event):
+                yield response
+
+    async for response in coalesce_responses(
+        responses(),
+        window=settings.CHAT_STREAM_COALESCE_WINDOW_MS / 1000,
+        max_bytes=settings.CHAT_STREAM_COALESCE_MAX_BYTES,
+    ):
+        yield response
+    if settings.CHAT_USAGE_FRAME and usage.nodes:
+        yield usage.frame()
+
+
+def chat_response(
+    team: Team,
+    members: list[Member],
+    messages: list[ChatMessage],
+    thread_id: str,
+    interrupt: Interrupt | None = None,
+    team_graph: TeamGraph | None = None,
+    is_disconnected: Callable[[], Awaitable[bool]] | None = None,
+) -> StreamingResponse:
+    """
+    Admit a chat turn and return its SSE response.
+
+    Raises:
+        HTTPException: 429 with `Retry-After` if the tenant's queue is full.
+    """
+    ticket = admission.admit(team, members)
+    return StreamingResponse(
+        generator(
+            team, members, messages, thread_id, interrupt, team_graph,
+            is_disconnected, ticket,
+        ),
+        media_type="text/event-stream",
+        # Covers a client gone before the stream started and claimed the ticket
+        background=BackgroundTask(ticket.release_unclaimed),
+    )
+
+
 async def generator(
     team: Team,
     members: list[Member],
     messages: list[ChatMessage],
     thread_id: str,
     interrupt: Interrupt | None = None,
+    team_graph: TeamGraph | None = None,
+    is_disconnected: Callable[[], Awaitable[bool]] | None = None,
+    ticket: Ticket | None = None,
 ) -> AsyncGenerator[Any, Any]:
-    """Create the graph and stream responses as JSON."""
-
-    formatted_messages = [
-        (
-            HumanMessage(
-                content=(
-                    [
-                        {"type": "text", "text": message.content},
-                        {"type": "image_url", "image_url": {"url": message.imgdata}},
-                    ]
-                    if message.imgdata
-                    else message.content
-                ),
-                name="user",
+    """
+    Stream the responses of a chat turn as JSON.
+
+    With `CHAT_EXECUTION_MODE="process"` the run is executed by `executor_pool` and
+    this worker only relays the encoded frames, otherwise it runs in-process.
+
+    `ticket` comes from `admission.admit()`, called by `chat_response` before the
+    response starts so an overflow is answered with 429. While the run waits for
+    its slot a "queued" frame reports its position, and the stream releases the
+    slot once it ends. Without a ticket the run is admitted here, and an overflow
+    can only end the stream with an error frame.
+
+    When replay is enabled the run is detached from this response: its frames carry
+    an `id:` and are buffered per thread so a dropped client can resume them from
+    `Last-Event-ID` through `replay_registry`, instead of re-running the turn.
+    """
+    if not replay_registry.enabled:
+        async with aclosing(
+            admitted_run(
+                team, members, messages, thread_id, interrupt, team_graph,
+                is_disconnected, ticket,
             )
-            if message.type == "human"
-            else AIMessage(content=message.content)
-        )
-        for message in messages
-    ]
+        ) as chunks:
+            async for chunk in chunks:
+                yield chunk
+        return
+
+    # Disconnects are handled by the buffer's grace period, not by the run itself
+    buffer = replay_registry.start(
+        thread_id,
+        admitted_run(
+            team, members, messages, thread_id, interrupt, team_graph, None, ticket
+        ),
+    )
+    async with aclosing(buffer.subscribe()) as frames:
+        async for frame in frames:
+            yield frame
 
+
+async def admitted_run(
+    team: Team,
+    members: list[Member],
+    messages: list[ChatMessage],
+    thread_id: str,
+    interrupt: Interrupt | None,
+    team_graph: TeamGraph | None,
+    is_disconnected: Callable[[], Awaitable[bool]] | None,
+    ticket: Ticket | None,
+) -> AsyncGenerator[Any, Any]:
+    encoder = FrameEncoder()
+    if ticket is None:
+        try:
+            ticket = admission.admit(team, members)
+        except HTTPException as e:
+            yield encoder.encode(
+                ChatFrame(type="error", id=str(uuid4()), name="error", content=str(e.detail))
+            )
+            return
+    ticket.claimed = True
     try:
-        async with await AsyncConnection.connect(
-            settings.PG_DATABASE_URI,
-            **settings.SQLALCHEMY_CONNECTION_KWARGS,
-        ) as conn:
-            checkpointer = AsyncPostgresSaver(conn=conn)
-            if team.workflow == "hierarchical":
-                teams = convert_hierarchical_team_to_dict(team, members)
-                team_leader = list(teams.keys())[0]
-                root = create_hierarchical_graph(
-                    teams, leader_name=team_leader, checkpointer=checkpointer
-                )
-                state: dict[str, Any] | None = {
-                    "history": formatted_messages,
-                    "messages": [],
-                    "team": teams[team_leader],
-                    "main_task": formatted_messages,
-                    "all_messages": formatted_messages,
-                }
-            elif team.workflow == "sequential":
-
-                member_dict = convert_sequential_team_to_dict(members)
-                root = create_sequential_graph(member_dict, checkpointer)
-                first_member = list(member_dict.values())[0]
-                state = {
-                    "history": formatted_messages,
-                    "team": GraphTeam(
-                        name=first_member.name,
-                        role=first_member.role,
-                        backstory=first_member.backstory,
-                        members=member_dict,  # type: ignore[arg-type]
-                        provider=first_member.provider,
-                        model=first_member.model,
-                        temperature=first_member.temperature,
-                    ),
-                    "messages": [],
-                    "next": first_member.name,
-                    "all_messages": formatted_messages,
-                }
-
-            elif team.workflow in ["ragbot"]:
-                member_dict = convert_chatbot_chatrag_team_to_dict(
-                    members, workflow_type=team.workflow
-                )
-                root = create_chatbot_ragbot_graph(member_dict, checkpointer)
-                first_member = list(member_dict.values())[0]
-                state = {
-                    "history": formatted_messages,
-                    "team": GraphTeam(
-                        name=first_member.name,
-                        role=first_member.role,
-                        backstory=first_member.backstory,
-                        members=member_dict,  # type: ignore[arg-type]
-                        provider=first_member.provider,
-                        model=first_member.model,
-                        temperature=first_member.temperature,
-                    ),
-                    "messages": [],
-                    "next": first_member.name,
-                    "all_messages": formatted_messages,
-                }
-            elif team.workflow in ["chatbot"]:
-                member_dict = convert_chatbot_chatrag_team_to_dict(
-                    members, workflow_type=team.workflow
-                )
+        queued_id = str(uuid4())
+        async for position in ticket.wait():
+            yield encoder.encode(
+                ChatFrame(type="queued", id=queued_id, name="queued", content=str(position))
+            )
+        async with aclosing(
+            start_run(
+                team, members, messages, thread_id, interrupt, team_graph, is_disconnected
+            )
+        ) as chunks:
+            async for chunk in chunks:
+                yield chunk
+    finally:
+        ticket.release()
 
-                root = create_chatbot_ragbot_graph(member_dict, checkpointer)
-
-                first_member = list(member_dict.values())[0]
-                state = {
-                    "history": formatted_messages,
-                    "team": GraphTeam(
-                        name=first_member.name,
-                        role=first_member.role,
-                        backstory=first_member.backstory,
-                        members=member_dict,  # type: ignore[arg-type]
-                        provider=first_member.provider,
-                        model=first_member.model,
-                        temperature=first_member.temperature,
-                    ),
-                    "messages": [],
-                    "next": first_member.name,
-                    "all_messages": formatted_messages,
-                }
-            elif team.workflow in ["workflow"]:
 
-                graph_config = team.graphs[0].config
+def start_run(
+    team: Team,
+    members: list[Member],
+    messages: list[ChatMessage],
+    thread_id: str,
+    interrupt: Interrupt | None,
+    team_graph: TeamGraph | None,
+    is_disconnected: Callable[[], Awaitable[bool]] | None,
+) -> AsyncIterator[Any]:
+    if settings.CHAT_EXECUTION_MODE == "process":
+        return executor_pool.submit(
+            team.id, messages, thread_id, interrupt, is_disconnected=is_disconnected
+        )
+    return run_graph(
+        team,
+        members,
+        messages,
+        thread_id,
+        interrupt,
+        team_graph=team_graph,
+        is_disconnected=is_disconnected,
+    )
 
-                root = initialize_graph(
-                    graph_config, checkpointer, save_graph_img=False
-                )
 
-                state = {
-                    "history": formatted_messages,
-                    "messages": [],
-                    "all_messages": formatted_messages,
-                }
-            else:
-                raise ValueError("Unsupported graph type ")
+async def run_graph(
+    team: Team,
+    members: list[Member],
+    messages: list[ChatMessage],
+    thread_id: str,
+    interrupt: Interrupt | None = None,
+    team_graph: TeamGraph | None = None,
+    is_disconnected: Callable[[], Awaitable[bool]] | None = None,
+) -> AsyncGenerator[Any, Any]:
+    """
+    Create the graph in this process and stream responses as JSON.
+
+    Callers holding a session should resolve `team_graph` with
+    `topology.get_team_graph` so the team's members are only loaded on a cache miss.
+    Pass `request.is_disconnected` as `is_disconnected` to cancel the run as soon as
+    the client goes away, even while no event is being produced.
+    """
+
+    encoder = FrameEncoder()
+    try:
+        # Image refs are only minted by `offload_image`, never accepted from clients
+        if any(
+            message.imgdata and message.imgdata.startswith(IMAGE_REF_SCHEME)
+            for message in messages
+        ):
+            raise ValueError("Images must be sent as data, not as storage references")
+        # Keep images out of the checkpoints: the state only holds their storage keys
+        images = {
+            message.imgdata: await offload_image(message.imgdata, thread_id)
+            for message in messages
+            if message.type == "human" and message.imgdata
+        }
+        formatted_messages = [
+            (
+                HumanMessage(
+                    content=(
+                        [
+                            {"type": "text", "text": message.content},
+                            {"type": "image_url", "image_url": {"url": images[message.imgdata]}},
+                        ]
+                        if message.imgdata
+                        else message.content
+                    ),
+                    name="user",
+                )
+                if message.type == "human"
+                else AIMessage(content=message.content)
+            )
+            for message in messages
+        ]
 
-            config: RunnableConfig = {
-                "configurable": {"thread_id": thread_id},
-                "recursion_limit": settings.RECURSION_LIMIT,
+        saver = CachedPostgresSaver if settings.CHECKPOINT_CACHE_ENABLED else AsyncPostgresSaver
+        checkpointer = saver(conn=checkpoint_pool, serde=checkpoint_serde)
+        if team_graph is None:
+            team_graph = graph_cache.get_or_build(team, members, build_team_graph)
+        root = team_graph.graph.copy(update={"checkpointer": checkpointer})
+        # Only a new user turn seeds the state; interrupts resume from the checkpoint
+        window = HistoryWindow(formatted_messages)
+        if interrupt is None:
+            window = await history_manager.window(
+                thread_id,
+                team.id,
+                formatted_messages,
+                provider=team_graph.team.provider if team_graph.team else None,
+                model=team_graph.team.model if team_graph.team else None,
+            )
+        # The history summary is model context only, never part of the transcript
+        prompt = window.prompt()
+        if team.workflow == "hierarchical":
+            state: dict[str, Any] | None = {
+                "history": prompt,
+                "messages": [],
+                "team": team_graph.team,
+                "main_task": prompt,
+                "all_messages": window.messages,
+            }
+        elif team.workflow == "workflow":
+            graph_config = team.graphs[0].config
+            state = {
+                "history": prompt,
+                "messages": [],
+                "all_messages": window.messages,
+            }
+        else:
+            state = {
+                "history": prompt,
+                "team": team_graph.team,
+                "messages": [],
+                "next": team_graph.entry,
+                "all_messages": window.messages,
             }
 
-            # Handle interrupt logic by orriding state
-            if interrupt and interrupt.interaction_type is None:
-                if interrupt.decision == InterruptDecision.APPROVED:
-                    state = None
-                elif interrupt.decision == InterruptDecision.REJECTED:
-                    current_values = await root.aget_state(config)
-                    messages = current_values.values["messages"]
-                    if messages and isinstance(messages[-1], AIMessage):
-                        tool_calls = messages[-1].tool_calls
-                        state = {
-                            "messages": [
-                                ToolMessage(
-                                    tool_call_id=tool_call["id"],
-                                    content="Rejected by user. Continue assisting.",
-                                )
-                                for tool_call in tool_calls
-                            ]
-                        }
-                        if interrupt.tool_message:
-                            state["messages"].append(
-                                HumanMessage(
-                                    content=interrupt.tool_message,
-                                    name="user",
-                                    id=str(uuid4()),
-                                )
+        config: RunnableConfig = {
+            "configurable": {
+                "thread_id": thread_id,
+                "team_id": str(team.id),
+                "team_version": team_version(team),
+            },
+            "recursion_limit": settings.RECURSION_LIMIT,
+        }
+        if team.workflow == "hierarchical" and settings.HIERARCHICAL_PARALLEL_DELEGATION:
+            # Bounds the members fanned out by `fan_out_router` in one step
+            config["max_concurrency"] = settings.HIERARCHICAL_MAX_PARALLEL_WORKERS
+
+        # Handle interrupt logic by orriding state
+        if interrupt and interrupt.interaction_type is None:
+            if interrupt.decision == InterruptDecision.APPROVED:
+                state = None
+            elif interrupt.decision == InterruptDecision.REJECTED:
+                current_values = await root.aget_state(config)
+                messages = current_values.values["messages"]
+                if messages and isinstance(messages[-1], AIMessage):
+                    tool_calls = messages[-1].tool_calls
+                    state = {
+                        "messages": [
+                            ToolMessage(
+                                tool_call_id=tool_call["id"],
+                                content="Rejected by user. Continue assisting.",
                             )
-                elif interrupt.decision == InterruptDecision.REPLIED:
-                    current_values = await root.aget_state(config)
-                    messages = current_values.values["messages"]
-                    if (
-                        messages
-                        and isinstance(messages[-1], AIMessage)
-                        and interrupt.tool_message
-                    ):
-                        tool_calls = messages[-1].tool_calls
-                        state = {
-                            "messages": [
-                                ToolMessage(
-                                    tool_call_id=tool_call["id"],
-                                    content=interrupt.tool_message,
-                                    name="ask-human",
-                                )
-                                for tool_call in tool_calls
-                                if tool_call["name"] == "ask-human"
-                            ]
-                        }
-            elif interrupt and interrupt.interaction_type is not None:
-                # 添加新的工具审查相关的中断处理
-                if interrupt.interaction_type == "tool_review":
-                    if interrupt.decision == InterruptDecision.APPROVED:
-                        # 批准工具调用,继续执行
-
-                        state = Command(resume={"action": "approved"})
+                            for tool_call in tool_calls
+                        ]
+                    }
+                    if interrupt.tool_message:
+                        state["messages"].append(
+                            HumanMessage(
+                                content=interrupt.tool_message,
+                                name="user",
+                                id=str(uuid4()),
+                            )
+                        )
+            elif interrupt.decision == InterruptDecision.REPLIED:
+                current_values = await root.aget_state(config)
+                messages = current_values.values["messages"]
+                if (
+                    messages
+                    and isinstance(messages[-1], AIMessage)
+                    and interrupt.tool_message
+                ):
+                    tool_calls = messages[-1].tool_calls
+                    state = {
+                        "messages": [
+                            ToolMessage(
+                                tool_call_id=tool_call["id"],
+                                content=interrupt.tool_message,
+                                name="ask-human",
+                            )
+                            for tool_call in tool_calls
+                            if tool_call["name"] == "ask-human"
+                        ]
+                    }
+        elif interrupt and interrupt.interaction_type is not None:
+            # 添加新的工具审查相关的中断处理
+            if interrupt.interaction_type == "tool_review":
+                if interrupt.decision == InterruptDecision.APPROVED:
+                    # 批准工具调用,继续执行
 
-                    elif interrupt.decision == InterruptDecision.REJECTED:
-                        # 拒绝工具调用,添加拒绝消息
+                    state = Command(resume={"action": "approved"})
 
-                        reject_message = (
-                            interrupt.tool_message if interrupt.tool_message else None
-                        )
-                        state = Command(
-                            resume={"action": "rejected", "data": reject_message}
-                        )
+                elif interrupt.decision == InterruptDecision.REJECTED:
+                    # 拒绝工具调用,添加拒绝消息
 
-                    elif interrupt.decision == InterruptDecision.UPDATE:
-                        # 更新工具调用参数
+                    reject_message = (
+                        interrupt.tool_message if interrupt.tool_message else None
+                    )
+                    state = Command(
+                        resume={"action": "rejected", "data": reject_message}
+                    )
 
-                        state = Command(
-                            resume={"action": "update", "data": interrupt.tool_message}
-                        )
+                elif interrupt.decision == InterruptDecision.UPDATE:
+                    # 更新工具调用参数
 
-                elif interrupt.interaction_type == "output_review":
-                    # 处理输出审查
-                    if interrupt.decision == InterruptDecision.APPROVED:
-                        # 批准输出,继续执行
-                        state = Command(resume={"action": "approved"})
-                    elif interrupt.decision == InterruptDecision.REVIEW:
-                        # 需要修改输出,添加反馈
-                        state = Command(
-                            resume={"action": "review", "data": interrupt.tool_message}
-                        )
-                    elif interrupt.decision == InterruptDecision.EDIT:
-                        # 直接编辑输出内容
-                        state = Command(
-                            resume={"action": "edit", "data": interrupt.tool_message}
-                        )
-                    else:
-                        raise ValueError(
-                            f"Unsupported decision for output review: {interrupt.decision}"
-                        )
+                    state = Command(
+                        resume={"action": "update", "data": interrupt.tool_message}
+                    )
 
-                elif interrupt.interaction_type == "context_input":
-                    # 处理上下文输入,添加用户提供的额外信息
-                    if interrupt.decision == InterruptDecision.CONTINUE:
-                        state = Command(
-                            resume={
-                                "action": "continue",
-                                "data": interrupt.tool_message,
-                            }
-                        )
-                    else:
-                        raise ValueError(
-                            f"Unsupported decision for context input: {interrupt.decision}"
-                        )
+            elif interrupt.interaction_type == "output_review":
+                # 处理输出审查
+                if interrupt.decision == InterruptDecision.APPROVED:
+                    # 批准输出,继续执行
+                    state = Command(resume={"action": "approved"})
+                elif interrupt.decision == InterruptDecision.REVIEW:
+                    # 需要修改输出,添加反馈
+                    state = Command(
+                        resume={"action": "review", "data": interrupt.tool_message}
+                    )
+                elif interrupt.decision == InterruptDecision.EDIT:
+                    # 直接编辑输出内容
+                    state = Command(
+                        resume={"action": "edit", "data": interrupt.tool_message}
+                    )
+                else:
+                    raise ValueError(
+                        f"Unsupported decision for output review: {interrupt.decision}"
+                    )
 
+            elif interrupt.interaction_type == "context_input":
+                # 处理上下文输入,添加用户提供的额外信息
+                if interrupt.decision == InterruptDecision.CONTINUE:
+                    state = Command(
+                        resume={
+                            "action": "continue",
+                            "data": interrupt.tool_message,
+                        }
+                    )
                 else:
                     raise ValueError(
-                        f"Unsupported interrupt type: {interrupt.interaction_type}"
+                        f"Unsupported decision for context input: {interrupt.decision}"
                     )
-            async for event in root.astream_events(state, version="v2", config=config):
-                # 如果是workflow类型且有graph_config，则传入nodes参数
-                nodes = (
-                    graph_config["nodes"]
-                    if team.workflow == "workflow" and "nodes" in graph_config
-                    else None
+
+            else:
+                raise ValueError(
+                    f"Unsupported interrupt type: {interrupt.interaction_type}"
                 )
-                response = event_to_response(event, nodes=nodes)
-                if response:
-                    formatted_output = f"data: {response.model_dump_json()}\n\n"
-                    yield formatted_output
-            snapshot = await root.aget_state(config)
-
-            if snapshot.next:
-                try:
-                    message = snapshot.values["messages"][-1]
-                except Exception:
-                    message = snapshot.values["all_messages"][-1]
-
-                # 非workflow类型的处理
-                if team.workflow != "workflow":
-                    # Determine if should return default or askhuman interrupt based on whether AskHuman tool was called.
-                    if not isinstance(message, AIMessage):
-                        return
-                    for tool_call in message.tool_calls:
-                        if tool_call["name"] == "ask-human":
-                            response = ChatResponse(
-                                type="interrupt",
-                                name="human",
-                                tool_calls=message.tool_calls,
-                                id=str(uuid4()),
-                            )
-                            break
-                    else:
-                        response = ChatResponse(
+        # 如果是workflow类型且有graph_config，则传入nodes参数
+        nodes = (
+            graph_config["nodes"]
+            if team.workflow == "workflow" and "nodes" in graph_config
+            else None
+        )
+        async with aclosing(
+            cancel_on_disconnect(
+                stream_graph(root, state, config, nodes=nodes),
+                is_disconnected,
+                poll_interval=settings.CHAT_DISCONNECT_POLL_INTERVAL,
+            )
+        ) as responses:
+            async for response in responses:
+                yield encoder.encode(response)
+        if is_disconnected is not None and await is_disconnected():
+            return
+        snapshot = await root.aget_state(config)
+
+        if snapshot.next:
+            try:
+                message = snapshot.values["messages"][-1]
+            except Exception:
+                message = snapshot.values["all_messages"][-1]
+
+            # 非workflow类型的处理
+            if team.workflow != "workflow":
+                # Determine if should return default or askhuman interrupt based on whether AskHuman tool was called.
+                if not isinstance(message, AIMessage):
+                    return
+                for tool_call in message.tool_calls:
+                    if tool_call["name"] == "ask-human":
+                        response = ChatFrame(
                             type="interrupt",
-                            name="interrupt",
+                            name="human",
                             tool_calls=message.tool_calls,
                             id=str(uuid4()),
                         )
-                # workflow类型的处理
+                        break
                 else:
-                    next_node = snapshot.next[0]
-                    for node in graph_config["nodes"]:
-                        if node["id"] == next_node:
-                            interrupt_name = node["data"]["interaction_type"]
-                            break
-                    if interrupt_name == "context_input":
-                        response = ChatResponse(
-                            type="interrupt",
-                            name=interrupt_name,
-                            content=f"LLM的输出如下：\n\n`{message.content}`\n\n请输入您的补充信息",
-                            id=str(uuid4()),
-                        )
-                    elif interrupt_name == "tool_review":
-                        response = ChatResponse(
-                            type="interrupt",
-                            name=interrupt_name,
-                            tool_calls=message.tool_calls,
-                            id=str(uuid4()),
-                        )
-                    elif interrupt_name == "output_review":
-                        response = ChatResponse(
-                            type="interrupt",
-                            name=interrupt_name,
-                            content=f"LLM的输出如下：\n\n`{message.content}`\n\n请批准，或者输入您的审批意见",
-                            id=str(uuid4()),
-                        )
+                    response = ChatFrame(
+                        type="interrupt",
+                        name="interrupt",
+                        tool_calls=message.tool_calls,
+                        id=str(uuid4()),
+                    )
+            # workflow类型的处理
+            else:
+                next_node = snapshot.next[0]
+                for node in graph_config["nodes"]:
+                    if node["id"] == next_node:
+                        interrupt_name = node["data"]["interaction_type"]
+                        break
+                if interrupt_name == "context_input":
+                    response = ChatFrame(
+                        type="interrupt",
+                        name=interrupt_name,
+                        content=f"LLM的输出如下：\n\n`{message.content}`\n\n请输入您的补充信息",
+                        id=str(uuid4()),
+                    )
+                elif interrupt_name == "tool_review":
+                    response = ChatFrame(
+                        type="interrupt",
+                        name=interrupt_name,
+                        tool_calls=message.tool_calls,
+                        id=str(uuid4()),
+                    )
+                elif interrupt_name == "output_review":
+                    response = ChatFrame(
+                        type="interrupt",
+                        name=interrupt_name,
+                        content=f"LLM的输出如下：\n\n`{message.content}`\n\n请批准，或者输入您的审批意见",
+                        id=str(uuid4()),
+                    )
 
-                formatted_output = f"data: {response.model_dump_json()}\n\n"
-                yield formatted_output
+            yield encoder.encode(response)
     except Exception as e:
-        response = ChatResponse(
+        response = ChatFrame(
             type="error", content=str(e), id=str(uuid4()), name="error"
         )
-        yield f"data: {response.model_dump_json()}\n\n"
-        await asyncio.sleep(0.1)  # Add a small delay to ensure the message is sent
+        yield encoder.encode(response)
         raise e
\ No newline at end of file
@@ -0,0 +1,142 @@
+import hashlib
+import json
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from langgraph.graph.graph import CompiledGraph
+from sqlalchemy import func, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.models import Team
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    # Member only exists alongside the graph runtime (build.py); the API imports
+    # this module to invalidate cached graphs and must not depend on it
+    from app.api.models import Member
+
+
+class TeamGraph(NamedTuple):
+    """A compiled team graph plus the static parts of its initial state."""
+
+    graph: CompiledGraph
+    team: Any = None  # GraphTeam used to seed the state, None for `workflow`
+    entry: str | None = None  # name of the first member for non-hierarchical teams
+
+
+def member_fingerprint(member: "Member") -> tuple[Hashable, ...]:
+    """Return the parts of a member that affect the compiled graph."""
+    return (
+        member.id,
+        member.source,
+        member.type,
+        member.name,
+        member.role,
+        member.backstory,
+        member.provider,
+        member.model,
+        member.temperature,
+        member.interrupt,
+        tuple(
+            sorted(
+                (skill.name, skill.managed, json.dumps(skill.tool_definition, sort_keys=True, default=str))
+                for skill in member.skills
+            )
+        ),
+        tuple(
+            sorted(
+                (str(upload.id), upload.name, upload.description, str(upload.owner_id))
+                for upload in member.uploads
+            )
+        ),
+    )
+
+
+def team_version(team: Team) -> str:
+    """Version stamp of a team's topology, bumped by `topology.bump_team_version`."""
+    return f"v:{team.updated_at.isoformat() if team.updated_at else ''}"
+
+
+async def bump_team_version(session: AsyncSession, team_id: Any) -> None:
+    """
+    Mark the topology of a team as changed.
+
+    Must be called whenever a member, skill, upload or graph of the team is edited;
+    the change becomes visible to every worker once the session commits.
+    """
+    if team_id is None:
+        return
+    await session.execute(
+        update(Team).where(Team.id == team_id).values(updated_at=func.now())
+    )
+
+
+def team_fingerprint(team: Team, members: list["Member"]) -> str:
+    """Hash the team workflow and its member/skill/upload configuration."""
+    payload: list[Any] = [team.workflow]
+    if team.workflow == "workflow":
+        payload.append(team.graphs[0].config)
+    else:
+        payload.extend(sorted((member_fingerprint(m) for m in members), key=repr))
+    return hashlib.sha256(
+        json.dumps(payload, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+class GraphCache:
+    """LRU cache of compiled team graphs keyed by team id and version.
+
+    The version is either the team's topology version stamp (see `topology`) or,
+    for callers that already hold the members, a fingerprint of their configuration.
+
+    Graphs are compiled without a checkpointer so that one compiled graph can be
+    shared by every chat stream of the team; callers attach the per-request
+    checkpointer with `TeamGraph.graph.copy(update={"checkpointer": ...})`.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._graphs: OrderedDict[tuple[str, str], TeamGraph] = OrderedDict()
+
+    def get(self, team_id: Any, version: str) -> TeamGraph | None:
+        key = (str(team_id), version)
+        if (cached := self._graphs.get(key)) is not None:
+            self._graphs.move_to_end(key)
+        return cached
+
+    def put(self, team_id: Any, version: str, team_graph: TeamGraph) -> TeamGraph:
+        if self.maxsize <= 0:
+            return team_graph
+        # A new version means the team changed, drop its stale graphs
+        self.invalidate(team_id)
+        self._graphs[(str(team_id), version)] = team_graph
+        while len(self._graphs) > self.maxsize:
+            self._graphs.popitem(last=False)
+        return team_graph
+
+    def get_or_build(
+        self,
+        team: Team,
+        members: list["Member"],
+        build: Callable[[Team, list["Member"]], TeamGraph],
+    ) -> TeamGraph:
+        if self.maxsize <= 0:
+            return build(team, members)
+
+        version = team_fingerprint(team, members)
+        if (cached := self.get(team.id, version)) is not None:
+            return cached
+        return self.put(team.id, version, build(team, members))
+
+    def invalidate(self, team_id: Any) -> None:
+        """Evict every compiled graph of a team, e.g. after its members change."""
+        team_id = str(team_id)
+        for key in [key for key in self._graphs if key[0] == team_id]:
+            del self._graphs[key]
+
+    def clear(self) -> None:
+        self._graphs.clear()
+
+
+graph_cache = GraphCache(maxsize=settings.GRAPH_CACHE_SIZE)
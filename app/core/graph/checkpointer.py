@@ -0,0 +1,299 @@
+import asyncio
+import copy
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import Any
+from uuid import uuid4
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+)
+from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+from langgraph.constants import TASKS
+from psycopg import AsyncConnection
+
+from app.core.config import settings
+from app.core.db import checkpoint_pool
+from app.core.metrics import registry
+from app.utils.logger import get_logger
+
+try:
+    from langgraph.checkpoint.base import get_checkpoint_metadata
+except ImportError:  # older langgraph-checkpoint
+    def get_checkpoint_metadata(_config: RunnableConfig, metadata: Any) -> Any:
+        return metadata
+
+
+logger = get_logger(__name__)
+
+thread_cache_requests = registry.counter(
+    "checkpoint_cache_requests_total", "Latest-checkpoint lookups by cache result"
+)
+thread_cache_invalidations = registry.counter(
+    "checkpoint_cache_invalidations_total", "Threads evicted from the checkpoint cache, by source"
+)
+
+NOTIFY_CHANNEL = "checkpoint_cache"
+# Stay well under the 8000 bytes NOTIFY payload limit
+NOTIFY_BATCH = 100
+
+
+class CachedCheckpoint:
+    """
+    Latest checkpoint of a thread namespace. Entries created by `aput` also track
+    the writes made against the checkpoint; entries read from Postgres are
+    evicted on their next write instead.
+    """
+
+    __slots__ = ("tuple", "writes")
+
+    def __init__(self, checkpoint_tuple: CheckpointTuple, tracked: bool = False):
+        self.tuple = checkpoint_tuple
+        # (task_path, task_id, idx) -> (task_id, channel, value), None when untracked
+        self.writes: dict[tuple[str, str, int], tuple[str, str, Any]] | None = (
+            {} if tracked else None
+        )
+
+    def pending_writes(self) -> list[tuple[str, str, Any]]:
+        if self.writes is None:
+            return list(self.tuple.pending_writes or [])
+        return [self.writes[key] for key in sorted(self.writes)]
+
+    def to_tuple(self) -> CheckpointTuple:
+        return copy.deepcopy(
+            self.tuple._replace(pending_writes=self.pending_writes())
+        )
+
+
+class ThreadStateCache:
+    """
+    Bounded cache of the latest checkpoint of the most recently used threads.
+
+    Kept in sync by `CachedPostgresSaver`, and across workers through Postgres
+    LISTEN/NOTIFY: every new checkpoint publishes the thread id, and the other
+    workers evict it. A worker whose listener lost its connection drops the whole cache, since it
+    may have missed notifications.
+    """
+
+    def __init__(self, max_threads: int):
+        self.max_threads = max_threads
+        self.worker_id = uuid4().hex
+        self._threads: OrderedDict[str, dict[str, CachedCheckpoint]] = OrderedDict()
+        self._dirty: set[str] = set()
+        self._flush: asyncio.Task[None] | None = None
+        self._listener: asyncio.Task[None] | None = None
+
+    def get(self, thread_id: str, checkpoint_ns: str) -> CachedCheckpoint | None:
+        namespaces = self._threads.get(thread_id)
+        if namespaces is None:
+            return None
+        self._threads.move_to_end(thread_id)
+        return namespaces.get(checkpoint_ns)
+
+    def put(self, thread_id: str, checkpoint_ns: str, entry: CachedCheckpoint) -> None:
+        self._threads.setdefault(thread_id, {})[checkpoint_ns] = entry
+        self._threads.move_to_end(thread_id)
+        while len(self._threads) > self.max_threads:
+            self._threads.popitem(last=False)
+
+    def evict(self, thread_id: str, source: str = "local") -> None:
+        if self._threads.pop(thread_id, None) is not None:
+            thread_cache_invalidations.inc(source=source)
+
+    def clear(self) -> None:
+        self._threads.clear()
+
+    def publish(self, thread_id: str) -> None:
+        """Tell the other workers `thread_id` changed, batched per event loop tick."""
+        if self._listener is None:
+            return
+        self._dirty.add(thread_id)
+        if self._flush is None:
+            self._flush = asyncio.create_task(self._notify())
+
+    async def _notify(self) -> None:
+        await asyncio.sleep(0)
+        dirty, self._dirty = list(self._dirty), set()
+        self._flush = None
+        try:
+            async with checkpoint_pool.connection() as conn:
+                for start in range(0, len(dirty), NOTIFY_BATCH):
+                    threads = ",".join(dirty[start : start + NOTIFY_BATCH])
+                    await conn.execute(
+                        "SELECT pg_notify(%s, %s)",
+                        (NOTIFY_CHANNEL, f"{self.worker_id}:{threads}"),
+                    )
+        except Exception as e:
+            await logger.warning(f"Checkpoint cache notification failed: {e}")
+
+    def start(self) -> None:
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener is None:
+            return
+        self._listener.cancel()
+        try:
+            await self._listener
+        except asyncio.CancelledError:
+            pass
+        self._listener = None
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                conn = await AsyncConnection.connect(
+                    settings.PG_DATABASE_URI, autocommit=True
+                )
+                async with conn:
+                    await conn.execute(f"LISTEN {NOTIFY_CHANNEL}")
+                    async for notify in conn.notifies():
+                        worker_id, _, threads = notify.payload.partition(":")
+                        if worker_id == self.worker_id:
+                            continue
+                        for thread_id in threads.split(","):
+                            self.evict(thread_id, source="remote")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await logger.warning(f"Checkpoint cache listener disconnected: {e}")
+            self.clear()
+            await asyncio.sleep(settings.CHECKPOINT_CACHE_RECONNECT_DELAY)
+
+
+thread_state_cache = ThreadStateCache(max_threads=settings.CHECKPOINT_CACHE_MAX_THREADS)
+
+
+def checkpoint_key(config: RunnableConfig) -> tuple[str, str, str | None]:
+    configurable = config["configurable"]
+    return (
+        str(configurable["thread_id"]),
+        configurable.get("checkpoint_ns", ""),
+        configurable.get("checkpoint_id"),
+    )
+
+
+class CachedPostgresSaver(AsyncPostgresSaver):
+    """
+    AsyncPostgresSaver serving the latest checkpoint of hot threads from memory.
+
+    `aput` and `aput_writes` write through to Postgres and update the cached
+    checkpoint, so the `aget_state` calls of an interrupt resume and the next turn
+    on the thread skip the database. Lookups of older checkpoints and listings go
+    to Postgres as before.
+    """
+
+    def __init__(self, *args: Any, cache: ThreadStateCache = thread_state_cache, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.cache = cache
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        thread_id, checkpoint_ns, checkpoint_id = checkpoint_key(config)
+        entry = self.cache.get(thread_id, checkpoint_ns)
+        if entry is not None and checkpoint_id in (
+            None,
+            entry.tuple.config["configurable"]["checkpoint_id"],
+        ):
+            thread_cache_requests.inc(result="hit")
+            return entry.to_tuple()
+
+        thread_cache_requests.inc(result="miss")
+        checkpoint_tuple = await super().aget_tuple(config)
+        # Only the latest checkpoint is cached
+        if checkpoint_tuple is not None and checkpoint_id is None:
+            self.cache.put(
+                thread_id, checkpoint_ns, CachedCheckpoint(copy.deepcopy(checkpoint_tuple))
+            )
+        return checkpoint_tuple
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        next_config = await super().aput(config, checkpoint, metadata, new_versions)
+        thread_id, checkpoint_ns, parent_id = checkpoint_key(config)
+        parent = self.cache.get(thread_id, checkpoint_ns)
+        self.cache.publish(thread_id)
+
+        saved = copy.deepcopy(checkpoint)
+        if "pending_sends" in saved:
+            # Read back from the parent's TASKS writes, as the saver does
+            if parent_id is not None and (
+                parent is None
+                or parent.tuple.config["configurable"]["checkpoint_id"] != parent_id
+            ):
+                self.cache.evict(thread_id)
+                return next_config
+            saved["pending_sends"] = (
+                [value for _, channel, value in parent.pending_writes() if channel == TASKS]
+                if parent is not None and parent_id is not None
+                else []
+            )
+        self.cache.put(
+            thread_id,
+            checkpoint_ns,
+            CachedCheckpoint(
+                CheckpointTuple(
+                    config=next_config,
+                    checkpoint=saved,
+                    metadata=copy.deepcopy(get_checkpoint_metadata(config, metadata)),
+                    parent_config=(
+                        {
+                            "configurable": {
+                                "thread_id": thread_id,
+                                "checkpoint_ns": checkpoint_ns,
+                                "checkpoint_id": parent_id,
+                            }
+                        }
+                        if parent_id
+                        else None
+                    ),
+                    pending_writes=[],
+                ),
+                tracked=True,
+            ),
+        )
+        return next_config
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await super().aput_writes(config, writes, task_id, task_path)
+        thread_id, checkpoint_ns, checkpoint_id = checkpoint_key(config)
+        # Task writes are followed by the next checkpoint, which is published; only
+        # interrupts and errors leave writes behind that other workers must see
+        if any(channel in WRITES_IDX_MAP for channel, _ in writes):
+            self.cache.publish(thread_id)
+        entry = self.cache.get(thread_id, checkpoint_ns)
+        if entry is None:
+            return
+        if (
+            entry.writes is None
+            or entry.tuple.config["configurable"]["checkpoint_id"] != checkpoint_id
+        ):
+            self.cache.evict(thread_id)
+            return
+        # Same conflict rules as the saver: special channels overwrite, others don't
+        upsert = all(channel in WRITES_IDX_MAP for channel, _ in writes)
+        for idx, (channel, value) in enumerate(writes):
+            key = (task_path, task_id, WRITES_IDX_MAP.get(channel, idx))
+            if upsert or key not in entry.writes:
+                entry.writes[key] = (task_id, channel, copy.deepcopy(value))
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await super().adelete_thread(thread_id)
+        self.cache.evict(str(thread_id))
+        self.cache.publish(str(thread_id))
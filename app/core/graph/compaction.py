@@ -0,0 +1,232 @@
+import asyncio
+import time
+from typing import Any
+
+from psycopg import AsyncConnection
+
+from app.core.config import settings
+from app.core.db import checkpoint_pool
+from app.core.metrics import registry
+from app.utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+compaction_rows = registry.counter(
+    "checkpoint_compaction_rows_total", "Checkpoint rows deleted by the compaction job, by table"
+)
+compaction_seconds = registry.histogram(
+    "checkpoint_compaction_pass_seconds",
+    "Duration of checkpoint compaction passes",
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 300, 900),
+)
+
+# Only one worker compacts at a time
+ADVISORY_LOCK_ID = 0x636B7074  # "ckpt"
+
+# The next page of threads in primary key order, so a pass only reads the
+# checkpoints of the threads it examines; the checkpoints table has no timestamp
+# column, so idleness comes from the `ts` the saver stores in each checkpoint
+CANDIDATES = """
+SELECT
+    thread_id,
+    checkpoint_ns,
+    count(*) > %(keep)s
+        AND max((checkpoint ->> 'ts')::timestamptz)
+            < now() - make_interval(secs => %(idle)s) AS eligible
+FROM checkpoints
+WHERE (thread_id, checkpoint_ns) > (%(after_thread_id)s, %(after_checkpoint_ns)s)
+GROUP BY thread_id, checkpoint_ns
+ORDER BY thread_id, checkpoint_ns
+LIMIT %(limit)s
+"""
+
+# Superseded checkpoints, sparing the latest `keep` and any with a pending
+# interrupt (interrupt writes and no child checkpoint resuming from it)
+DELETE_CHECKPOINTS = """
+DELETE FROM checkpoints
+WHERE thread_id = %(thread_id)s AND checkpoint_ns = %(checkpoint_ns)s
+    AND checkpoint_id IN (
+        SELECT c.checkpoint_id
+        FROM checkpoints c
+        WHERE c.thread_id = %(thread_id)s AND c.checkpoint_ns = %(checkpoint_ns)s
+            AND NOT (
+                EXISTS (
+                    SELECT 1 FROM checkpoint_writes w
+                    WHERE w.thread_id = c.thread_id
+                        AND w.checkpoint_ns = c.checkpoint_ns
+                        AND w.checkpoint_id = c.checkpoint_id
+                        AND w.channel = '__interrupt__'
+                )
+                AND NOT EXISTS (
+                    SELECT 1 FROM checkpoints child
+                    WHERE child.thread_id = c.thread_id
+                        AND child.checkpoint_ns = c.checkpoint_ns
+                        AND child.parent_checkpoint_id = c.checkpoint_id
+                )
+            )
+        ORDER BY c.checkpoint_id DESC
+        OFFSET %(keep)s
+        LIMIT %(batch)s
+    )
+"""
+
+# Writes of checkpoints that no longer exist
+DELETE_WRITES = """
+DELETE FROM checkpoint_writes
+WHERE ctid IN (
+    SELECT w.ctid
+    FROM checkpoint_writes w
+    WHERE w.thread_id = %(thread_id)s AND w.checkpoint_ns = %(checkpoint_ns)s
+        AND NOT EXISTS (
+            SELECT 1 FROM checkpoints c
+            WHERE c.thread_id = w.thread_id
+                AND c.checkpoint_ns = w.checkpoint_ns
+                AND c.checkpoint_id = w.checkpoint_id
+        )
+    LIMIT %(batch)s
+)
+"""
+
+# Channel versions no remaining checkpoint points to
+DELETE_BLOBS = """
+DELETE FROM checkpoint_blobs
+WHERE ctid IN (
+    SELECT b.ctid
+    FROM checkpoint_blobs b
+    WHERE b.thread_id = %(thread_id)s AND b.checkpoint_ns = %(checkpoint_ns)s
+        AND NOT EXISTS (
+            SELECT 1 FROM checkpoints c
+            WHERE c.thread_id = b.thread_id
+                AND c.checkpoint_ns = b.checkpoint_ns
+                AND c.checkpoint -> 'channel_versions' ->> b.channel = b.version
+        )
+    LIMIT %(batch)s
+)
+"""
+
+
+class CheckpointCompactor:
+    """
+    Background job pruning superseded checkpoint versions.
+
+    Per thread and namespace idle for at least `min_idle` seconds, the latest `keep`
+    checkpoints and those holding a pending interrupt are kept; the older ones, then
+    the writes and channel blobs nothing references anymore, are deleted in
+    statements of at most `batch_size` rows, paced to `rows_per_second`.
+
+    Each pass examines the next `threads_per_pass` threads after where the previous
+    one stopped, starting over once it reaches the end of the table.
+    """
+
+    def __init__(
+        self,
+        keep: int,
+        interval: float,
+        rows_per_second: float,
+        batch_size: int,
+        min_idle: float,
+        threads_per_pass: int,
+    ):
+        self.keep = max(keep, 1)
+        self.interval = interval
+        self.rows_per_second = rows_per_second
+        self.batch_size = batch_size
+        self.min_idle = min_idle
+        self.threads_per_pass = threads_per_pass
+        self._after: tuple[str, str] = ("", "")
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await logger.error(f"Checkpoint compaction failed: {e}")
+
+    async def run_once(self) -> int:
+        """Compact the eligible threads, return the number of rows deleted."""
+        started = time.perf_counter()
+        deleted = 0
+        async with checkpoint_pool.connection() as conn:
+            locked = await conn.execute(
+                "SELECT pg_try_advisory_lock(%s) AS locked", (ADVISORY_LOCK_ID,)
+            )
+            if not (await locked.fetchone())["locked"]:
+                return 0
+            try:
+                cursor = await conn.execute(
+                    CANDIDATES,
+                    {
+                        "keep": self.keep,
+                        "idle": self.min_idle,
+                        "after_thread_id": self._after[0],
+                        "after_checkpoint_ns": self._after[1],
+                        "limit": self.threads_per_pass,
+                    },
+                )
+                rows = await cursor.fetchall()
+                for row in rows:
+                    if row["eligible"]:
+                        deleted += await self.compact(conn, row)
+                    self._after = (row["thread_id"], row["checkpoint_ns"])
+                if len(rows) < self.threads_per_pass:
+                    self._after = ("", "")
+            finally:
+                await conn.execute("SELECT pg_advisory_unlock(%s)", (ADVISORY_LOCK_ID,))
+        compaction_seconds.observe(time.perf_counter() - started)
+        if deleted:
+            await logger.info(f"Checkpoint compaction deleted {deleted} rows")
+        return deleted
+
+    async def compact(self, conn: AsyncConnection, thread: dict[str, Any]) -> int:
+        params = {
+            "thread_id": thread["thread_id"],
+            "checkpoint_ns": thread["checkpoint_ns"],
+            "keep": self.keep,
+            "batch": self.batch_size,
+        }
+        deleted = 0
+        # Checkpoints first, so their writes and blobs become orphans in this pass
+        for table, statement in (
+            ("checkpoints", DELETE_CHECKPOINTS),
+            ("checkpoint_writes", DELETE_WRITES),
+            ("checkpoint_blobs", DELETE_BLOBS),
+        ):
+            while True:
+                cursor = await conn.execute(statement, params)
+                rows = max(cursor.rowcount, 0)
+                deleted += rows
+                compaction_rows.inc(rows, table=table)
+                if rows and self.rows_per_second > 0:
+                    await asyncio.sleep(rows / self.rows_per_second)
+                if rows < self.batch_size:
+                    break
+        return deleted
+
+
+checkpoint_compactor = CheckpointCompactor(
+    keep=settings.CHECKPOINT_COMPACTION_KEEP,
+    interval=settings.CHECKPOINT_COMPACTION_INTERVAL,
+    rows_per_second=settings.CHECKPOINT_COMPACTION_ROWS_PER_SECOND,
+    batch_size=settings.CHECKPOINT_COMPACTION_BATCH_SIZE,
+    min_idle=settings.CHECKPOINT_COMPACTION_MIN_IDLE,
+    threads_per_pass=settings.CHECKPOINT_COMPACTION_THREADS_PER_PASS,
+)
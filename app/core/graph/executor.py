@@ -0,0 +1,274 @@
+import asyncio
+import itertools
+import multiprocessing
+import threading
+from collections.abc import AsyncIterator, Awaitable, Callable
+from multiprocessing.process import BaseProcess
+from typing import Any
+from uuid import UUID, uuid4
+
+from app.core.config import settings
+from app.core.graph.messages import ChatFrame, FrameEncoder
+from app.core.metrics import registry
+from app.utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+executor_runs = registry.gauge(
+    "graph_executor_runs", "Graph runs in flight on each executor process"
+)
+executor_restarts = registry.counter(
+    "graph_executor_restarts_total", "Executor processes respawned after exiting"
+)
+
+# Messages exchanged with the executor processes:
+#   inbox:   ("run", run_id, payload) | ("cancel", run_id, None) | None (shutdown)
+#   results: (run_id, "frame", bytes) | (run_id, "error", str) | (run_id, "done", None)
+
+
+def _error_frame(message: str) -> bytes:
+    return FrameEncoder().encode(
+        ChatFrame(type="error", id=str(uuid4()), name="error", content=message)
+    )
+
+
+def _worker_main(inbox: multiprocessing.Queue, results: multiprocessing.Queue) -> None:
+    asyncio.run(_serve(inbox, results))
+
+
+async def _serve(inbox: multiprocessing.Queue, results: multiprocessing.Queue) -> None:
+    """Event loop of an executor process: run graphs and push their frames back."""
+    from app.core.db import close_checkpoint_pool, open_checkpoint_pool
+    from app.core.graph.checkpointer import thread_state_cache
+
+    loop = asyncio.get_running_loop()
+    runs: dict[str, asyncio.Task[None]] = {}
+
+    await open_checkpoint_pool()
+    if settings.CHECKPOINT_CACHE_ENABLED:
+        thread_state_cache.start()
+    try:
+        while (message := await loop.run_in_executor(None, inbox.get)) is not None:
+            kind, run_id, payload = message
+            if kind == "run":
+                task = asyncio.create_task(_execute(run_id, payload, results))
+                runs[run_id] = task
+                task.add_done_callback(lambda _, run_id=run_id: runs.pop(run_id, None))
+            elif kind == "cancel" and (task := runs.get(run_id)) is not None:
+                task.cancel()
+        for task in runs.values():
+            task.cancel()
+        await asyncio.gather(*runs.values(), return_exceptions=True)
+    finally:
+        await thread_state_cache.stop()
+        await close_checkpoint_pool()
+
+
+async def _execute(
+    run_id: str, payload: dict[str, Any], results: multiprocessing.Queue
+) -> None:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    from app.api.models import ChatMessage, Interrupt, Team
+    from app.core.db import engine
+    from app.core.graph.build import run_graph
+    from app.core.graph.topology import get_team_graph
+
+    try:
+        async with AsyncSession(engine) as session:
+            team = await session.get(Team, UUID(payload["team_id"]))
+            if team is None:
+                raise ValueError(f"Team {payload['team_id']} not found")
+            team_graph = await get_team_graph(session, team)
+
+        interrupt = payload["interrupt"]
+        # Members are only needed to build the graph, which `get_team_graph` already
+        # returns (loading them only on a cache miss), so none are passed here
+        async for chunk in run_graph(
+            team,
+            [],
+            [ChatMessage.model_validate(message) for message in payload["messages"]],
+            payload["thread_id"],
+            Interrupt.model_validate(interrupt) if interrupt else None,
+            team_graph=team_graph,
+        ):
+            results.put((run_id, "frame", chunk))
+    except asyncio.CancelledError:
+        pass
+    except Exception as e:
+        results.put((run_id, "error", str(e)))
+    finally:
+        results.put((run_id, "done", None))
+
+
+class ExecutorPool:
+    """
+    Pool of dedicated processes that execute graph runs off the API event loop.
+
+    Each run is dispatched to the executor with the fewest runs in flight through
+    that process' inbox; every executor pushes its encoded frames to one shared
+    result queue which a relay thread fans out to the waiting request streams.
+    Executors that exited are respawned on the next submission.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._context = multiprocessing.get_context("spawn")
+        self._processes: list[BaseProcess] = []
+        self._inboxes: list[multiprocessing.Queue] = []
+        self._results: multiprocessing.Queue | None = None
+        self._relay: threading.Thread | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._streams: dict[str, asyncio.Queue[tuple[str, Any]]] = {}
+        self._load: list[int] = []
+        self._counter = itertools.count()
+
+    @property
+    def started(self) -> bool:
+        return bool(self._processes)
+
+    async def start(self) -> None:
+        if self.started:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._results = self._context.Queue()
+        for worker in range(self.workers):
+            self._processes.append(self._spawn(worker))
+            self._load.append(0)
+        self._relay = threading.Thread(target=self._relay_results, daemon=True)
+        self._relay.start()
+        await logger.info(f"Started {self.workers} graph executor processes")
+
+    async def stop(self) -> None:
+        if not self.started:
+            return
+        for inbox in self._inboxes:
+            inbox.put(None)
+        loop = asyncio.get_running_loop()
+        for process in self._processes:
+            await loop.run_in_executor(None, process.join, 10)
+            if process.is_alive():
+                process.terminate()
+        assert self._results is not None
+        self._results.put(None)
+        if self._relay is not None:
+            await loop.run_in_executor(None, self._relay.join)
+        self._processes.clear()
+        self._inboxes.clear()
+        self._load.clear()
+
+    def _spawn(self, worker: int) -> BaseProcess:
+        # A fresh inbox too: the old one may hold a half-written message
+        inbox = self._context.Queue()
+        process = self._context.Process(
+            target=_worker_main, args=(inbox, self._results), daemon=True
+        )
+        process.start()
+        if worker < len(self._inboxes):
+            self._inboxes[worker] = inbox
+        else:
+            self._inboxes.append(inbox)
+        return process
+
+    async def _revive(self) -> None:
+        """Respawn the executors that exited since the last submission."""
+        for worker, process in enumerate(self._processes):
+            if process.is_alive():
+                continue
+            await logger.warning(
+                f"Graph executor {worker} exited with code {process.exitcode}, respawning"
+            )
+            self._processes[worker] = self._spawn(worker)
+            executor_restarts.inc(worker=worker)
+
+    def _relay_results(self) -> None:
+        assert self._results is not None and self._loop is not None
+        while (item := self._results.get()) is not None:
+            run_id, kind, data = item
+            if (stream := self._streams.get(run_id)) is not None:
+                self._loop.call_soon_threadsafe(stream.put_nowait, (kind, data))
+
+    def _pick_worker(self) -> int:
+        # Least loaded executor, ties broken round-robin
+        offset = next(self._counter)
+        return min(
+            range(self.workers),
+            key=lambda i: (self._load[i], (i - offset) % self.workers),
+        )
+
+    async def submit(
+        self,
+        team_id: Any,
+        messages: list[Any],
+        thread_id: str,
+        interrupt: Any = None,
+        is_disconnected: Callable[[], Awaitable[bool]] | None = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Run a graph on an executor process and relay its encoded frames.
+
+        A run that fails outside `run_graph`, or whose executor exits, ends with an
+        error frame.
+        """
+        if not self.started:
+            raise RuntimeError("Graph executor pool is not started")
+
+        await self._revive()
+        run_id = str(uuid4())
+        worker = self._pick_worker()
+        # Runs stay bound to their process, even if it's replaced meanwhile
+        process, inbox = self._processes[worker], self._inboxes[worker]
+        stream: asyncio.Queue[tuple[str, Any]] = asyncio.Queue()
+        self._streams[run_id] = stream
+        self._load[worker] += 1
+        executor_runs.inc(worker=worker)
+        inbox.put(
+            (
+                "run",
+                run_id,
+                {
+                    "team_id": str(team_id),
+                    "messages": [message.model_dump() for message in messages],
+                    "thread_id": thread_id,
+                    "interrupt": interrupt.model_dump() if interrupt else None,
+                },
+            )
+        )
+        finished = False
+        try:
+            while True:
+                try:
+                    kind, data = await asyncio.wait_for(
+                        stream.get(), timeout=settings.CHAT_DISCONNECT_POLL_INTERVAL
+                    )
+                except asyncio.TimeoutError:
+                    if not process.is_alive():
+                        finished = True
+                        await logger.error(
+                            f"Graph executor {worker} exited during run {run_id}"
+                        )
+                        yield _error_frame("Graph executor process exited unexpectedly")
+                        return
+                    if is_disconnected is not None and await is_disconnected():
+                        return
+                    continue
+                if kind == "frame":
+                    yield data
+                elif kind == "error":
+                    finished = True
+                    await logger.error(f"Graph run {run_id} failed: {data}")
+                    yield _error_frame(data)
+                    return
+                else:
+                    finished = True
+                    return
+        finally:
+            if not finished:
+                inbox.put(("cancel", run_id, None))
+            self._streams.pop(run_id, None)
+            self._load[worker] -= 1
+            executor_runs.dec(worker=worker)
+
+
+executor_pool = ExecutorPool(workers=settings.CHAT_EXECUTOR_WORKERS)
@@ -0,0 +1,232 @@
+from functools import lru_cache
+from typing import Any, NamedTuple
+from uuid import UUID
+
+import tiktoken
+from langchain_core.messages import AnyMessage, HumanMessage, SystemMessage
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from app.api.models import ModelProvider, Thread
+from app.core.config import settings
+from app.core.db import engine
+from app.core.metrics import registry
+from app.utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+history_tokens = registry.histogram(
+    "chat_history_tokens",
+    "Prompt history tokens per turn after windowing",
+    buckets=(256, 512, 1024, 2048, 4096, 8192, 16384, 32768, 65536),
+)
+history_trimmed = registry.counter(
+    "chat_history_trimmed_total", "Turns whose history was windowed, by strategy"
+)
+
+# Tokens added per message by the chat format, and a flat cost per image part
+MESSAGE_OVERHEAD_TOKENS = 4
+IMAGE_TOKENS = 85
+
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a conversation between a user and an AI "
+    "assistant. Update the existing summary with the new messages. Keep names, "
+    "facts, decisions and open questions, drop small talk, and answer with the "
+    "summary only, in the language of the conversation, in at most {tokens} tokens."
+)
+
+
+# Same id every turn, so a newer summary replaces the one already in the state
+SUMMARY_ID = "history-summary"
+
+
+class HistoryWindow(NamedTuple):
+    """Messages of a turn that fit the budget, and the summary of the older ones."""
+
+    messages: list[AnyMessage]
+    summary: SystemMessage | None = None
+
+    def prompt(self) -> list[AnyMessage]:
+        """Model input: the summary as context, then the kept messages."""
+        return [self.summary, *self.messages] if self.summary else self.messages
+
+
+@lru_cache(maxsize=32)
+def get_encoding(model: str | None) -> tiktoken.Encoding:
+    try:
+        return tiktoken.encoding_for_model(model or "")
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def message_text(message: AnyMessage) -> str:
+    if isinstance(message.content, str):
+        return message.content
+    return "".join(
+        part if isinstance(part, str) else part.get("text", "")
+        for part in message.content
+    )
+
+
+def count_tokens(message: AnyMessage, encoding: tiktoken.Encoding) -> int:
+    images = (
+        sum(1 for part in message.content if isinstance(part, dict) and part.get("type") == "image_url")
+        if isinstance(message.content, list)
+        else 0
+    )
+    return (
+        MESSAGE_OVERHEAD_TOKENS
+        + len(encoding.encode(message_text(message), disallowed_special=()))
+        + images * IMAGE_TOKENS
+    )
+
+
+def token_budget(model: str | None) -> int:
+    return settings.CHAT_HISTORY_MODEL_BUDGETS.get(model or "", settings.CHAT_HISTORY_TOKEN_BUDGET)
+
+
+def window_start(counts: list[int], budget: int) -> int:
+    """Index of the oldest message kept so the newest messages fit in `budget`."""
+    total = 0
+    start = len(counts)
+    for index in range(len(counts) - 1, -1, -1):
+        # The latest message is always kept, even if it alone is over budget
+        if total + counts[index] > budget and start < len(counts):
+            break
+        total += counts[index]
+        start = index
+    return start
+
+
+class HistoryManager:
+    """
+    Keep the history of a turn within the token budget of the team's model.
+
+    The newest messages that fit are kept. With the "summarize" strategy the older
+    ones are folded into a running summary stored on the thread
+    (`Thread.history_summary`, covering its first `summarized_messages` messages), so
+    each turn only summarises the messages that newly fell out of the window. The
+    summary is a system message meant for the model input only, not part of the
+    conversation itself.
+    """
+
+    async def window(
+        self,
+        thread_id: str,
+        team_id: Any,
+        messages: list[AnyMessage],
+        provider: str | None,
+        model: str | None,
+    ) -> HistoryWindow:
+        # A summary sent back by the client isn't part of the conversation
+        messages = [message for message in messages if message.id != SUMMARY_ID]
+        budget = token_budget(model)
+        if budget <= 0 or not messages:
+            return HistoryWindow(messages)
+
+        encoding = get_encoding(model)
+        counts = [count_tokens(message, encoding) for message in messages]
+        if sum(counts) <= budget:
+            history_tokens.observe(sum(counts))
+            return HistoryWindow(messages)
+
+        summarize = settings.CHAT_HISTORY_STRATEGY == "summarize" and provider and model
+        reserve = settings.CHAT_HISTORY_SUMMARY_TOKENS if summarize else 0
+        start = window_start(counts, max(budget - reserve, 0))
+        kept = messages[start:]
+        history_tokens.observe(sum(counts[start:]))
+        if not summarize or start == 0:
+            history_trimmed.inc(strategy="drop")
+            return HistoryWindow(kept)
+
+        try:
+            summary = await self.summary(
+                thread_id, team_id, messages[:start], provider, model
+            )
+        except Exception as e:
+            await logger.warning(f"History summary of thread {thread_id} failed: {e}")
+            summary = None
+        if not summary:
+            history_trimmed.inc(strategy="drop")
+            return HistoryWindow(kept)
+
+        history_trimmed.inc(strategy="summarize")
+        return HistoryWindow(
+            kept,
+            SystemMessage(
+                content=f"Summary of the earlier conversation:\n{summary}",
+                id=SUMMARY_ID,
+            ),
+        )
+
+    async def summary(
+        self,
+        thread_id: str,
+        team_id: Any,
+        dropped: list[AnyMessage],
+        provider: str,
+        model: str,
+    ) -> str | None:
+        """Return the summary of `dropped`, extending the one cached on the thread."""
+        async with AsyncSession(engine) as session:
+            thread = await session.get(Thread, UUID(thread_id))
+            if thread is None:
+                return None
+            summary = thread.history_summary
+            summarized = thread.summarized_messages
+            # The client sent a different (e.g. edited) history, start over
+            if summarized > len(dropped):
+                summary, summarized = None, 0
+            if summarized == len(dropped):
+                return summary
+
+            llm = await self.summary_model(session, team_id, provider, model)
+            if llm is None:
+                return None
+            transcript = "\n".join(
+                f"{message.type}: {message_text(message)}"
+                for message in dropped[summarized:]
+            )
+            response = await llm.ainvoke(
+                [
+                    SystemMessage(
+                        content=SUMMARY_PROMPT.format(
+                            tokens=settings.CHAT_HISTORY_SUMMARY_TOKENS
+                        )
+                    ),
+                    HumanMessage(
+                        content=f"Existing summary:\n{summary or '(none)'}\n\n"
+                        f"New messages:\n{transcript}"
+                    ),
+                ]
+            )
+            thread.history_summary = message_text(response)
+            thread.summarized_messages = len(dropped)
+            session.add(thread)
+            await session.commit()
+            return thread.history_summary
+
+    async def summary_model(
+        self, session: AsyncSession, team_id: Any, provider: str, model: str
+    ) -> Any:
+        from app.core.providers import model_provider_manager
+
+        model_provider = await session.scalar(
+            select(ModelProvider).where(
+                ModelProvider.provider_name == provider,
+                ModelProvider.team_id == team_id,
+            )
+        )
+        if model_provider is None:
+            return None
+        return model_provider_manager.init_model(
+            provider,
+            model,
+            0,
+            model_provider.decrypted_api_key,
+            model_provider.base_url,
+        )
+
+
+history_manager = HistoryManager()
@@ -1,4 +1,5 @@
 import json
+from collections.abc import Callable
 from typing import Any, Dict
 
 from langchain_core.documents import Document
@@ -14,6 +15,17 @@ from langchain_core.messages import (
 from langchain_core.runnables.schema import StreamEvent
 from pydantic import BaseModel
 
+try:
+    import orjson
+
+    def dumps(value: Any) -> bytes:
+        return orjson.dumps(value)
+
+except ImportError:  # pragma: no cover - orjson is optional
+
+    def dumps(value: Any) -> bytes:
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode()
+
 
 def get_node_label(node_id: str, nodes: list[Dict[str, Any]] | None = None) -> str:
     """Get node label from node id"""
@@ -37,6 +49,99 @@ class ChatResponse(BaseModel):
     next: str | None = None
 
 
+class ChatFrame:
+    """
+    Allocation-light counterpart of ChatResponse used on the streaming hot path.
+
+    Serialises to the same JSON as `ChatResponse.model_dump_json()` through
+    `FrameEncoder`, without building a pydantic model per token.
+    """
+
+    __slots__ = (
+        "type",
+        "id",
+        "name",
+        "content",
+        "imgdata",
+        "tool_calls",
+        "tool_output",
+        "documents",
+        "next",
+    )
+
+    def __init__(
+        self,
+        type: str,
+        id: str,
+        name: str,
+        content: str | None = None,
+        imgdata: str | None = None,
+        tool_calls: list[ToolCall] | None = None,
+        tool_output: str | None = None,
+        documents: str | None = None,
+        next: str | None = None,
+    ):
+        self.type = type
+        self.id = id
+        self.name = name
+        self.content = content
+        self.imgdata = imgdata
+        self.tool_calls = tool_calls
+        self.tool_output = tool_output
+        self.documents = documents
+        self.next = next
+
+    def copy(self) -> "ChatFrame":
+        return ChatFrame(*(getattr(self, slot) for slot in self.__slots__))
+
+    def to_response(self) -> ChatResponse:
+        return ChatResponse(**{slot: getattr(self, slot) for slot in self.__slots__})
+
+
+class FrameEncoder:
+    """
+    Encode ChatFrame to `data: {...}` SSE bytes.
+
+    The constant `type`/`id`/`name` prefix of each run is encoded once and reused
+    for every following token of that run.
+    """
+
+    def __init__(self):
+        self._headers: dict[tuple[str, str, str], bytes] = {}
+
+    def encode(self, frame: ChatFrame) -> bytes:
+        key = (frame.type, frame.id, frame.name)
+        if (header := self._headers.get(key)) is None:
+            header = self._headers[key] = b"".join(
+                (
+                    b'data: {"type":',
+                    dumps(frame.type),
+                    b',"id":',
+                    dumps(frame.id),
+                    b',"name":',
+                    dumps(frame.name),
+                )
+            )
+        return b"".join(
+            (
+                header,
+                b',"content":',
+                dumps(frame.content),
+                b',"imgdata":',
+                dumps(frame.imgdata),
+                b',"tool_calls":',
+                dumps(frame.tool_calls),
+                b',"tool_output":',
+                dumps(frame.tool_output),
+                b',"documents":',
+                dumps(frame.documents),
+                b',"next":',
+                dumps(frame.next),
+                b"}\n\n",
+            )
+        )
+
+
 def get_message_type(message: Any) -> str | None:
     """Return the message's type"""
     if isinstance(message, HumanMessage) or isinstance(message, HumanMessageChunk):
@@ -49,170 +154,248 @@ def get_message_type(message: Any) -> str | None:
         return None
 
 
+EventHandler = Callable[["EventTranslator", StreamEvent, str], "ChatFrame | None"]
+
+# event kind -> handler, e.g. "on_chat_model_stream"
+EVENT_HANDLERS: dict[str, EventHandler] = {}
+# event kind -> node-type prefix -> handler, e.g. "on_chain_stream" -> "retrieval"
+NODE_HANDLERS: dict[str, dict[str, EventHandler]] = {}
+
+
+def register_event_handler(kind: str) -> Callable[[EventHandler], EventHandler]:
+    """Register the handler of an `astream_events` event kind."""
+
+    def decorator(handler: EventHandler) -> EventHandler:
+        EVENT_HANDLERS[kind] = handler
+        return handler
+
+    return decorator
+
+
+def register_node_handler(
+    kind: str, prefix: str
+) -> Callable[[EventHandler], EventHandler]:
+    """
+    Register the handler of a chain event for nodes whose id starts with `prefix`.
+
+    Third-party node types use this to stream their own outputs, e.g.
+    `@register_node_handler("on_chain_stream", "search")`.
+    """
+
+    def decorator(handler: EventHandler) -> EventHandler:
+        NODE_HANDLERS.setdefault(kind, {})[prefix] = handler
+        return handler
+
+    return decorator
+
+
+class EventTranslator:
+    """
+    Convert the events of one graph run to ChatFrame.
+
+    Node labels are indexed once per run and the node handler of each node id is
+    resolved on first sight, so every event is a couple of dict lookups.
+    """
+
+    def __init__(self, nodes: list[Dict[str, Any]] | None = None):
+        self.labels: dict[str, str] = {
+            node["id"]: node["data"].get("label", node["id"]) for node in nodes or []
+        }
+        self._node_handlers: dict[tuple[str, str], EventHandler | None] = {}
+
+    def label(self, node_id: str) -> str:
+        return self.labels.get(node_id, node_id)
+
+    def node_handler(self, kind: str, node_id: str) -> EventHandler | None:
+        key = (kind, node_id)
+        try:
+            return self._node_handlers[key]
+        except KeyError:
+            handler = next(
+                (
+                    handler
+                    for prefix, handler in NODE_HANDLERS.get(kind, {}).items()
+                    if node_id.startswith(prefix)
+                ),
+                None,
+            )
+            self._node_handlers[key] = handler
+            return handler
+
+    def translate(self, event: StreamEvent) -> ChatFrame | None:
+        handler = EVENT_HANDLERS.get(event["event"])
+        if handler is None:
+            return None
+        return handler(self, event, event["run_id"])
+
+
 def event_to_response(
     event: StreamEvent, nodes: list[Dict[str, Any]] | None = None
 ) -> ChatResponse | None:
     """Convert event to ChatResponse"""
+    frame = EventTranslator(nodes).translate(event)
+    return frame.to_response() if frame is not None else None
 
-    kind = event["event"]
-    id = event["run_id"]
-
-    if kind == "on_chat_model_stream":
-        node_id = event["metadata"]["langgraph_node"]
-        name = get_node_label(node_id, nodes) if nodes else node_id
-        message_chunk: AIMessageChunk = event["data"]["chunk"]
-        type = get_message_type(message_chunk)
-        content: str = ""
-        if isinstance(message_chunk.content, list):
-            for c in message_chunk.content:
-                if isinstance(c, str):
-                    content += c
-                elif isinstance(c, dict):
-                    if c.get("type") == "text":
-                        content += c.get("text", "")
-        else:
-            content = message_chunk.content
-        tool_calls = message_chunk.tool_calls
-        if content and type:
-            return ChatResponse(
-                type=type, id=id, name=name, content=content, tool_calls=tool_calls
-            )
-    elif kind == "on_chat_model_end":
-        message: AIMessage = event["data"]["output"]
-        node_id = event["metadata"]["langgraph_node"]
-        name = get_node_label(node_id, nodes) if nodes else node_id
-        tool_calls = message.tool_calls
-        if tool_calls:
-            return ChatResponse(
-                type="tool",
-                id=id,
-                name=name,
-                tool_calls=tool_calls,
-            )
 
-    elif kind == "on_tool_end":
-        tool_output: ToolMessage | None = event["data"].get("output")
-        tool_name = event["name"]
-        # If tool is KnowledgeBase then serialise the documents in artifact
-        documents: list[dict[str, Any]] = []
-        if tool_output and tool_output.name == "KnowledgeBase":
-            docs: list[Document] = tool_output.artifact
-            for doc in docs:
-                documents.append(
-                    {
-                        "content": doc.page_content,
-                    }
-                )
-        if tool_output:
-            return ChatResponse(
-                type="tool",
-                id=id,
-                name=tool_name,
-                tool_output=json.dumps(tool_output.content),
-                documents=json.dumps(documents),
-            )
+@register_event_handler("on_chat_model_stream")
+def chat_model_stream(
+    translator: EventTranslator, event: StreamEvent, id: str
+) -> ChatFrame | None:
+    node_id = event["metadata"]["langgraph_node"]
+    message_chunk: AIMessageChunk = event["data"]["chunk"]
+    type = get_message_type(message_chunk)
+    content: str = ""
+    if isinstance(message_chunk.content, list):
+        for c in message_chunk.content:
+            if isinstance(c, str):
+                content += c
+            elif isinstance(c, dict):
+                if c.get("type") == "text":
+                    content += c.get("text", "")
+    else:
+        content = message_chunk.content
+    if content and type:
+        return ChatFrame(
+            type=type,
+            id=id,
+            name=translator.label(node_id),
+            content=content,
+            tool_calls=message_chunk.tool_calls,
+        )
+    return None
 
-    elif kind == "on_chain_end":
-        output = event["data"]["output"]
-        node_id = event.get("name", "")
-        name = get_node_label(node_id, nodes) if nodes else node_id
-
-        # 只处理 AnswerNode 的输出
-        if node_id and node_id.startswith("answer"):
-            if isinstance(output, dict):
-                if "messages" in output and output["messages"]:
-                    last_message = output["messages"][-1]
-                    if isinstance(last_message, AIMessage):
-                        return ChatResponse(
-                            type="ai",
-                            id=id,
-                            name=name,
-                            content=last_message.content,
-                        )
-            elif isinstance(output, AIMessage):
-                return ChatResponse(
-                    type="ai",
-                    id=id,
-                    name=name,
-                    content=output.content,
-                )
-    elif kind == "on_chain_stream":
-        output = event["data"]["chunk"]
-        node_id = event.get("name", "")
-        name = get_node_label(node_id, nodes) if nodes else node_id
-
-        if node_id and node_id.startswith("retrieval"):
-            if isinstance(output, dict):
-                if "messages" in output and output["messages"]:
-                    last_message = output["messages"][-1]
-                    if isinstance(last_message, ToolMessage):
-                        return ChatResponse(
-                            type="tool",
-                            id=id,
-                            name=name,
-                            tool_output=json.dumps(
-                                last_message.content,
-                            ),
-                        )
-            elif isinstance(output, AIMessage):
-                return ChatResponse(
-                    type="tool",
-                    id=id,
-                    name=name,
-                    content=output.content,
-                )
-        elif node_id and node_id.startswith("crewai"):
-            if isinstance(output, dict):
-                if "messages" in output and output["messages"]:
-                    last_message = output["messages"][-1]
-                    if isinstance(last_message, AIMessage):
-                        return ChatResponse(
-                            type="ai",
-                            id=id,
-                            name=name,
-                            content=last_message.content,
-                        )
-            elif isinstance(output, AIMessage):
-                return ChatResponse(
-                    type="ai",
-                    id=id,
-                    name=name,
-                    content=output.content,
-                )
-        elif (
-            node_id
-            and node_id.startswith("classifier")
-            and isinstance(output, dict)
-            and "node_outputs" in output
-        ):
-            for _, outputs in output["node_outputs"].items():
-                if "category_name" in outputs:
-                    res = outputs["category_name"]
-                    return ChatResponse(
-                        type="ai",
-                        id=id,
-                        name=name,
-                        content=f"用户意图：{res}",
-                    )
-        elif node_id and node_id.startswith("code"):
-            if isinstance(output, dict):
-                if "messages" in output and output["messages"]:
-                    last_message = output["messages"][-1]
-                    if isinstance(last_message, ToolMessage):
-                        return ChatResponse(
-                            type="tool",
-                            id=id,
-                            name=name,
-                            tool_output=json.dumps(
-                                last_message.content,
-                            ),
-                        )
-            elif isinstance(output, AIMessage):
-                return ChatResponse(
-                    type="tool",
-                    id=id,
-                    name=name,
-                    content=output.content,
-                )
 
-    return None
\ No newline at end of file
+@register_event_handler("on_chat_model_end")
+def chat_model_end(
+    translator: EventTranslator, event: StreamEvent, id: str
+) -> ChatFrame | None:
+    message: AIMessage = event["data"]["output"]
+    tool_calls = message.tool_calls
+    if tool_calls:
+        return ChatFrame(
+            type="tool",
+            id=id,
+            name=translator.label(event["metadata"]["langgraph_node"]),
+            tool_calls=tool_calls,
+        )
+    # A response served from the LLM cache has no stream events, replay its content
+    # as a single frame
+    if message.response_metadata.get("cache_hit") and message.content:
+        return chat_model_stream(
+            translator,
+            {**event, "data": {"chunk": AIMessageChunk(content=message.content)}},
+            id,
+        )
+    return None
+
+
+@register_event_handler("on_tool_end")
+def tool_end(
+    translator: EventTranslator, event: StreamEvent, id: str
+) -> ChatFrame | None:
+    tool_output: ToolMessage | None = event["data"].get("output")
+    if not tool_output:
+        return None
+    # If tool is KnowledgeBase then serialise the documents in artifact
+    documents: list[dict[str, Any]] = []
+    if tool_output.name == "KnowledgeBase":
+        docs: list[Document] = tool_output.artifact
+        documents = [{"content": doc.page_content} for doc in docs]
+    return ChatFrame(
+        type="tool",
+        id=id,
+        name=event["name"],
+        tool_output=dumps(tool_output.content).decode(),
+        documents=dumps(documents).decode(),
+    )
+
+
+@register_event_handler("on_chain_end")
+def chain_end(
+    translator: EventTranslator, event: StreamEvent, id: str
+) -> ChatFrame | None:
+    node_id = event.get("name", "")
+    if node_id and (handler := translator.node_handler("on_chain_end", node_id)):
+        return handler(translator, event, id)
+    return None
+
+
+@register_event_handler("on_chain_stream")
+def chain_stream(
+    translator: EventTranslator, event: StreamEvent, id: str
+) -> ChatFrame | None:
+    node_id = event.get("name", "")
+    if node_id and (handler := translator.node_handler("on_chain_stream", node_id)):
+        return handler(translator, event, id)
+    return None
+
+
+def last_message(output: Any, message_type: type) -> Any:
+    """Return the last message of a node output if it is of `message_type`."""
+    if isinstance(output, dict):
+        if "messages" in output and output["messages"]:
+            message = output["messages"][-1]
+            if isinstance(message, message_type):
+                return message
+    return None
+
+
+# 只处理 AnswerNode 的输出
+@register_node_handler("on_chain_end", "answer")
+def answer_end(
+    translator: EventTranslator, event: StreamEvent, id: str
+) -> ChatFrame | None:
+    output = event["data"]["output"]
+    name = translator.label(event["name"])
+    if message := last_message(output, AIMessage):
+        return ChatFrame(type="ai", id=id, name=name, content=message.content)
+    elif isinstance(output, AIMessage):
+        return ChatFrame(type="ai", id=id, name=name, content=output.content)
+    return None
+
+
+@register_node_handler("on_chain_stream", "retrieval")
+@register_node_handler("on_chain_stream", "code")
+def tool_node_stream(
+    translator: EventTranslator, event: StreamEvent, id: str
+) -> ChatFrame | None:
+    output = event["data"]["chunk"]
+    name = translator.label(event["name"])
+    if message := last_message(output, ToolMessage):
+        return ChatFrame(
+            type="tool", id=id, name=name, tool_output=dumps(message.content).decode()
+        )
+    elif isinstance(output, AIMessage):
+        return ChatFrame(type="tool", id=id, name=name, content=output.content)
+    return None
+
+
+@register_node_handler("on_chain_stream", "crewai")
+def crewai_stream(
+    translator: EventTranslator, event: StreamEvent, id: str
+) -> ChatFrame | None:
+    output = event["data"]["chunk"]
+    name = translator.label(event["name"])
+    if message := last_message(output, AIMessage):
+        return ChatFrame(type="ai", id=id, name=name, content=message.content)
+    elif isinstance(output, AIMessage):
+        return ChatFrame(type="ai", id=id, name=name, content=output.content)
+    return None
+
+
+@register_node_handler("on_chain_stream", "classifier")
+def classifier_stream(
+    translator: EventTranslator, event: StreamEvent, id: str
+) -> ChatFrame | None:
+    output = event["data"]["chunk"]
+    if not isinstance(output, dict) or "node_outputs" not in output:
+        return None
+    for _, outputs in output["node_outputs"].items():
+        if "category_name" in outputs:
+            return ChatFrame(
+                type="ai",
+                id=id,
+                name=translator.label(event["name"]),
+                content=f"用户意图：{outputs['category_name']}",
+            )
+    return None
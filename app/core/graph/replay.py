@@ -0,0 +1,189 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterable, AsyncIterator
+from uuid import uuid4
+
+from app.core.config import settings
+from app.core.graph.messages import ChatFrame, FrameEncoder
+from app.core.metrics import registry
+from app.utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+replayed_frames = registry.counter(
+    "chat_replay_frames_total", "Frames re-sent to reconnecting clients"
+)
+
+ERROR_FRAME = b'data: {"type":"error"'
+
+
+class RunBuffer:
+    """
+    Bounded ring buffer of the SSE frames of one run, shared by its subscribers.
+
+    Frame ids are `<run id>-<position>`, so a `Last-Event-ID` left over from an
+    earlier run of the thread replays this run from its start.
+
+    The run is driven by its own task so it outlives a dropped connection: once the
+    last subscriber detaches it keeps going for `grace` seconds, and is cancelled if
+    no client reconnects in time.
+    """
+
+    def __init__(self, thread_id: str, maxlen: int, grace: float):
+        self.thread_id = thread_id
+        self.run_id = uuid4().hex
+        self.grace = grace
+        self.frames: deque[tuple[int, bytes]] = deque(maxlen=maxlen)
+        self.last_id = 0
+        self.finished = False
+        self.finished_at = 0.0
+        self.subscribers = 0
+        self.task: asyncio.Task[None] | None = None
+        self._changed = asyncio.Event()
+        self._expiry: asyncio.TimerHandle | None = None
+
+    def start(self, chunks: AsyncIterable[bytes]) -> None:
+        self.task = asyncio.create_task(self._drive(chunks))
+
+    def _append(self, chunk: bytes) -> None:
+        self.last_id += 1
+        self.frames.append(
+            (self.last_id, b"id: %s-%d\n" % (self.run_id.encode(), self.last_id) + chunk)
+        )
+        self._notify()
+
+    def _position(self, last_event_id: str) -> int:
+        """Position of `last_event_id` in this run, 0 for an id of another run."""
+        run_id, _, position = last_event_id.partition("-")
+        if run_id != self.run_id or not position.isdigit():
+            return 0
+        return min(int(position), self.last_id)
+
+    async def _drive(self, chunks: AsyncIterable[bytes]) -> None:
+        last = b""
+        try:
+            async for last in chunks:
+                self._append(last)
+        except Exception as e:
+            await logger.error(f"Run of thread {self.thread_id} failed: {e}")
+            # `run_graph` reports its own errors, anything else still needs a frame
+            if not last.startswith(ERROR_FRAME):
+                self._append(
+                    FrameEncoder().encode(
+                        ChatFrame(
+                            type="error", id=str(uuid4()), name="error", content=str(e)
+                        )
+                    )
+                )
+        finally:
+            self.finished = True
+            self.finished_at = time.monotonic()
+            self._notify()
+
+    def _notify(self) -> None:
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def cancel(self) -> None:
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+
+    def _expire(self) -> None:
+        self._expiry = None
+        if self.subscribers == 0:
+            self.cancel()
+
+    async def subscribe(self, last_event_id: str = "") -> AsyncIterator[bytes]:
+        """
+        Yield the frames after `last_event_id`, then follow the live run.
+
+        When frames the client has not seen were already dropped from the buffer an
+        error frame reports the gap before the stream carries on with what is left.
+        """
+        self.subscribers += 1
+        if self._expiry is not None:
+            self._expiry.cancel()
+            self._expiry = None
+        cursor = self._position(last_event_id)
+        replaying = cursor > 0
+        try:
+            while True:
+                changed = self._changed
+                # Frame ids are contiguous, so the first unsent one is found by offset
+                if self.frames:
+                    if (missed := self.frames[0][0] - 1 - cursor) > 0:
+                        await logger.warning(
+                            f"Subscriber of thread {self.thread_id} missed {missed} frames"
+                        )
+                        yield FrameEncoder().encode(
+                            ChatFrame(
+                                type="error",
+                                id=str(uuid4()),
+                                name="error",
+                                content=f"{missed} events of this run are no longer "
+                                "available, reload the thread to see them",
+                            )
+                        )
+                    start = max(cursor - self.frames[0][0] + 1, 0)
+                    for index in range(start, len(self.frames)):
+                        event_id, data = self.frames[index]
+                        cursor = event_id
+                        if replaying:
+                            replayed_frames.inc()
+                        yield data
+                replaying = False
+                if self.finished and cursor >= self.last_id:
+                    return
+                await changed.wait()
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.finished:
+                self._expiry = asyncio.get_running_loop().call_later(
+                    self.grace, self._expire
+                )
+
+
+class ReplayRegistry:
+    """Run buffers by thread id; finished runs stay replayable for `ttl` seconds."""
+
+    def __init__(self, maxlen: int, grace: float, ttl: float):
+        self.maxlen = maxlen
+        self.grace = grace
+        self.ttl = ttl
+        self._buffers: OrderedDict[str, RunBuffer] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxlen > 0
+
+    def start(self, thread_id: str, chunks: AsyncIterable[bytes]) -> RunBuffer:
+        self._purge()
+        # A new turn supersedes whatever the thread was still running
+        if (previous := self._buffers.pop(thread_id, None)) is not None:
+            previous.cancel()
+        buffer = RunBuffer(thread_id, self.maxlen, self.grace)
+        buffer.start(chunks)
+        self._buffers[thread_id] = buffer
+        return buffer
+
+    def get(self, thread_id: str) -> RunBuffer | None:
+        self._purge()
+        return self._buffers.get(thread_id)
+
+    def _purge(self) -> None:
+        deadline = time.monotonic() - self.ttl
+        for thread_id in [
+            thread_id
+            for thread_id, buffer in self._buffers.items()
+            if buffer.finished and buffer.finished_at < deadline
+        ]:
+            del self._buffers[thread_id]
+
+
+replay_registry = ReplayRegistry(
+    maxlen=settings.CHAT_REPLAY_BUFFER_SIZE,
+    grace=settings.CHAT_REPLAY_GRACE,
+    ttl=settings.CHAT_REPLAY_TTL,
+)
@@ -0,0 +1,231 @@
+import asyncio
+from collections import OrderedDict
+from typing import Any, NamedTuple
+
+import numpy as np
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables.config import RunnableConfig
+from langchain_core.runnables.schema import StreamEvent
+from langgraph.graph import END
+
+from app.core.config import settings
+from app.core.graph.messages import (
+    ChatFrame,
+    EventTranslator,
+    last_message,
+    register_node_handler,
+)
+from app.core.metrics import registry
+from app.core.rag.utils import cosine_similarity
+
+
+semantic_cache_requests = registry.counter(
+    "semantic_cache_requests_total", "Ragbot semantic cache lookups by result"
+)
+semantic_cache_saved_tokens = registry.counter(
+    "semantic_cache_saved_tokens_total", "LLM tokens not spent thanks to semantic cache hits"
+)
+
+LOOKUP_NODE = "semantic_cache"
+STORE_NODE = "semantic_cache_store"
+
+# Keeps the fire-and-forget store tasks alive until they finish
+background_tasks: set[asyncio.Task[None]] = set()
+
+
+class CachedAnswer(NamedTuple):
+    question: str
+    answer: str
+    tokens: int
+
+
+class TeamEntries:
+    """Answers of one team for one knowledge-base version, with their question embeddings."""
+
+    def __init__(self, version: str):
+        self.version = version
+        self.answers: list[CachedAnswer] = []
+        self.vectors: np.ndarray | None = None
+
+
+class SemanticCache:
+    """
+    Per-team cache of ragbot answers looked up by question similarity.
+
+    Entries are scoped to the team's knowledge-base version (its topology version,
+    bumped whenever an upload is edited or re-vectorized), so answers grounded on
+    stale documents are never served.
+    """
+
+    def __init__(
+        self,
+        threshold: float,
+        max_entries: int,
+        embedding_model: str,
+        embedding_base_url: str | None = None,
+    ):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.embedding_model = embedding_model
+        self.embedding_base_url = embedding_base_url
+        self._teams: dict[str, TeamEntries] = {}
+        # Question -> embedding, so the store step doesn't embed the question again
+        self._embeddings: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._embedder: Any = None
+
+    async def embed(self, question: str) -> np.ndarray:
+        if (vector := self._embeddings.get(question)) is not None:
+            self._embeddings.move_to_end(question)
+            return vector
+        if self._embedder is None:
+            from langchain_ollama import OllamaEmbeddings
+
+            self._embedder = OllamaEmbeddings(
+                model=self.embedding_model, base_url=self.embedding_base_url
+            )
+        vector = np.array(await self._embedder.aembed_query(question), dtype=np.float32)
+        self._embeddings[question] = vector
+        while len(self._embeddings) > self.max_entries:
+            self._embeddings.popitem(last=False)
+        return vector
+
+    def _entries(self, team_id: str, version: str) -> TeamEntries:
+        entries = self._teams.get(team_id)
+        if entries is None or entries.version != version:
+            entries = self._teams[team_id] = TeamEntries(version)
+        return entries
+
+    async def lookup(self, team_id: str, version: str, question: str) -> CachedAnswer | None:
+        entries = self._entries(team_id, version)
+        if entries.vectors is None:
+            return None
+        vector = await self.embed(question)
+        scores = cosine_similarity(vector[np.newaxis, :], entries.vectors)[0]
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+        return entries.answers[best]
+
+    async def store(
+        self, team_id: str, version: str, question: str, answer: str, tokens: int
+    ) -> None:
+        vector = await self.embed(question)
+        entries = self._entries(team_id, version)
+        entries.answers.append(CachedAnswer(question, answer, tokens))
+        entries.vectors = (
+            vector[np.newaxis, :]
+            if entries.vectors is None
+            else np.vstack((entries.vectors, vector))
+        )
+        # Drop the oldest answers once the team is over its budget
+        if (overflow := len(entries.answers) - self.max_entries) > 0:
+            entries.answers = entries.answers[overflow:]
+            entries.vectors = entries.vectors[overflow:]
+
+    def invalidate(self, team_id: Any) -> None:
+        self._teams.pop(str(team_id), None)
+
+
+semantic_cache = SemanticCache(
+    threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+    max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+    embedding_model=settings.SEMANTIC_CACHE_EMBEDDING_MODEL,
+    embedding_base_url=settings.SEMANTIC_CACHE_EMBEDDING_BASE_URL,
+)
+
+
+def cache_scope(config: RunnableConfig) -> tuple[str, str] | None:
+    """Team id and knowledge-base version of the run, set by `run_graph`."""
+    configurable = config.get("configurable", {})
+    if "team_id" not in configurable or "team_version" not in configurable:
+        return None
+    return str(configurable["team_id"]), str(configurable["team_version"])
+
+
+def last_question(state: dict[str, Any]) -> str | None:
+    """
+    Text the turn's answer is cached under: its question, preceded by the last
+    `SEMANTIC_CACHE_CONTEXT_MESSAGES` messages before it, so follow-ups such as
+    "and in 2023?" only match answers given in the same context.
+    """
+    history = state.get("history") or []
+    for index in range(len(history) - 1, -1, -1):
+        message = history[index]
+        if isinstance(message, HumanMessage):
+            break
+    else:
+        return None
+    # Questions with images can't be matched by their text alone
+    if not isinstance(message.content, str):
+        return None
+    context = history[max(index - settings.SEMANTIC_CACHE_CONTEXT_MESSAGES, 0) : index]
+    lines = [
+        f"{previous.type}: {previous.content}"
+        for previous in context
+        if isinstance(previous.content, str) and previous.content
+    ]
+    return "\n".join([*lines, f"{message.type}: {message.content}"])
+
+
+def create_lookup_node(member_name: str):
+    """Node answering from the cache on a hit, otherwise handing over to the member."""
+
+    async def lookup(state: dict[str, Any], config: RunnableConfig) -> dict[str, Any]:
+        scope = cache_scope(config)
+        question = last_question(state)
+        if scope is None or question is None:
+            return {"next": member_name}
+        cached = await semantic_cache.lookup(*scope, question)
+        if cached is None:
+            semantic_cache_requests.inc(result="miss")
+            return {"next": member_name}
+        semantic_cache_requests.inc(result="hit")
+        semantic_cache_saved_tokens.inc(cached.tokens)
+        # Same channels as the member's answer, so it's part of the conversation
+        answer = AIMessage(content=cached.answer, name=member_name)
+        return {
+            "next": END,
+            "messages": [answer],
+            "history": [answer],
+            "all_messages": [answer],
+        }
+
+    return lookup
+
+
+async def store_node(state: dict[str, Any], config: RunnableConfig) -> dict[str, Any]:
+    """Remember the member's final answer to the turn's question."""
+    scope = cache_scope(config)
+    question = last_question(state)
+    answer = last_message(state, AIMessage)
+    if scope and question and answer and isinstance(answer.content, str) and answer.content:
+        tokens = (answer.usage_metadata or {}).get("total_tokens", 0)
+        # Embedding the question must not delay the end of the run
+        task = asyncio.create_task(
+            semantic_cache.store(*scope, question, answer.content, tokens)
+        )
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+    return {}
+
+
+def route_lookup(state: dict[str, Any]) -> str:
+    return state["next"]
+
+
+@register_node_handler("on_chain_end", LOOKUP_NODE)
+def lookup_end(
+    translator: EventTranslator, event: StreamEvent, id: str
+) -> ChatFrame | None:
+    output = event["data"].get("output")
+    if not isinstance(output, dict) or output.get("next") != END:
+        return None
+    message = last_message(output, AIMessage)
+    if message is None:
+        return None
+    return ChatFrame(
+        type="ai",
+        id=id,
+        name=message.name or translator.label(LOOKUP_NODE),
+        content=message.content,
+    )
@@ -0,0 +1,146 @@
+import sys
+import time
+import zlib
+from pathlib import Path
+from typing import Any
+
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zlib fallback
+    zstandard = None
+
+
+serde_ratio = registry.histogram(
+    "checkpoint_serde_compression_ratio",
+    "Uncompressed / compressed size of checkpoint blobs",
+    buckets=(1, 1.5, 2, 3, 4, 6, 8, 12, 16, 32),
+)
+serde_bytes = registry.counter(
+    "checkpoint_serde_bytes_total", "Checkpoint blob bytes before and after compression"
+)
+serde_seconds = registry.histogram(
+    "checkpoint_serde_seconds",
+    "Time spent encoding and decoding checkpoint blobs",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5),
+)
+
+
+def train_dictionary(samples: list[bytes], size: int = 112 * 1024) -> bytes:
+    """
+    Train a zstd dictionary on serialized checkpoint blobs (e.g. a sample of
+    `checkpoint_blobs.blob` rows) to be used as `CHECKPOINT_SERDE_DICTIONARY`.
+    """
+    if zstandard is None:
+        raise ValueError("zstandard is required to train a dictionary")
+    return zstandard.train_dictionary(size, samples).as_bytes()
+
+
+class CompressedSerializer(SerializerProtocol):
+    """
+    Checkpoint serializer compressing the msgpack payloads of JsonPlusSerializer.
+
+    Compressed payloads are tagged by appending the codec to the type stored next to
+    the blob (`msgpack+zstd`, `msgpack+zstd:<dict id>`, `msgpack+zlib`), so rows
+    written before compression was enabled, or by a worker with another codec, are
+    decoded by their tag. Payloads under `min_size` are stored as is.
+    """
+
+    def __init__(
+        self,
+        inner: SerializerProtocol | None = None,
+        level: int = 3,
+        min_size: int = 256,
+        dictionary: bytes | None = None,
+    ):
+        self.inner = inner or JsonPlusSerializer()
+        self.level = level
+        self.min_size = min_size
+        self.codec = "zstd" if zstandard is not None else "zlib"
+        self._compressor: Any = None
+        # Dictionary id (0 for none) -> decompressor, reused across reads
+        self._decompressors: dict[int, Any] = {}
+        if zstandard is not None:
+            dict_data = None
+            if dictionary:
+                dict_data = zstandard.ZstdCompressionDict(dictionary)
+                self.codec = f"zstd:{dict_data.dict_id()}"
+                self._decompressors[dict_data.dict_id()] = zstandard.ZstdDecompressor(
+                    dict_data=dict_data
+                )
+            self._compressor = zstandard.ZstdCompressor(level=level, dict_data=dict_data)
+            self._decompressors[0] = zstandard.ZstdDecompressor()
+
+    def dumps(self, obj: Any) -> bytes:
+        return self.inner.dumps(obj)
+
+    def loads(self, data: bytes) -> Any:
+        return self.inner.loads(data)
+
+    def dumps_typed(self, obj: Any) -> tuple[str, bytes]:
+        started = time.perf_counter()
+        type_, data = self.inner.dumps_typed(obj)
+        if not isinstance(data, bytes) or len(data) < self.min_size:
+            return type_, data
+        if self._compressor is not None:
+            compressed = self._compressor.compress(data)
+        else:
+            compressed = zlib.compress(data, min(self.level, 9))
+        if len(compressed) >= len(data):
+            return type_, data
+        serde_seconds.observe(time.perf_counter() - started, op="encode")
+        serde_ratio.observe(len(data) / len(compressed))
+        serde_bytes.inc(len(data), stage="raw")
+        serde_bytes.inc(len(compressed), stage="compressed")
+        return f"{type_}+{self.codec}", compressed
+
+    def loads_typed(self, data: tuple[str, bytes]) -> Any:
+        type_, payload = data
+        type_, _, codec = type_.partition("+")
+        if not codec:
+            return self.inner.loads_typed((type_, payload))
+        started = time.perf_counter()
+        payload = self.decompress(codec, payload)
+        obj = self.inner.loads_typed((type_, payload))
+        serde_seconds.observe(time.perf_counter() - started, op="decode")
+        return obj
+
+    def decompress(self, codec: str, payload: bytes) -> bytes:
+        if codec == "zlib":
+            return zlib.decompress(payload)
+        if zstandard is None:
+            raise ValueError(f"zstandard is required to read {codec} checkpoints")
+        name, _, dict_id = codec.partition(":")
+        if name != "zstd":
+            raise ValueError(f"Unknown checkpoint codec: {codec}")
+        decompressor = self._decompressors.get(int(dict_id or 0))
+        if decompressor is None:
+            raise ValueError(f"Checkpoint dictionary {dict_id} is not loaded")
+        return decompressor.decompress(payload)
+
+
+def create_serializer() -> SerializerProtocol:
+    # Compressed rows stay readable when compression is turned off, only the
+    # writes go back to plain msgpack
+    dictionary = (
+        Path(settings.CHECKPOINT_SERDE_DICTIONARY).read_bytes()
+        if settings.CHECKPOINT_SERDE_DICTIONARY
+        else None
+    )
+    return CompressedSerializer(
+        level=settings.CHECKPOINT_SERDE_LEVEL,
+        min_size=(
+            settings.CHECKPOINT_SERDE_MIN_BYTES
+            if settings.CHECKPOINT_SERDE_COMPRESSION
+            else sys.maxsize
+        ),
+        dictionary=dictionary,
+    )
+
+
+checkpoint_serde = create_serializer()
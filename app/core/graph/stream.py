@@ -0,0 +1,175 @@
+import asyncio
+from collections.abc import AsyncIterable, AsyncIterator, Awaitable, Callable
+from typing import TypeVar
+
+from app.core.graph.messages import ChatFrame
+from app.core.metrics import registry
+from app.utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+cancelled_runs = registry.counter(
+    "chat_stream_cancelled_total",
+    "Graph runs cancelled before completion, by reason",
+)
+
+
+def is_coalescable(response: ChatFrame) -> bool:
+    """Only plain streamed text chunks can be merged, everything else flushes."""
+    return (
+        response.type == "ai"
+        and bool(response.content)
+        and not response.tool_calls
+        and response.tool_output is None
+        and response.documents is None
+        and response.imgdata is None
+        and response.next is None
+    )
+
+
+async def coalesce_responses(
+    responses: AsyncIterable[ChatFrame],
+    window: float,
+    max_bytes: int,
+) -> AsyncIterator[ChatFrame]:
+    """
+    Merge consecutive text chunks of the same run and node into a single response.
+
+    A merged response is flushed when `window` seconds have passed since its first
+    chunk, when its content reaches `max_bytes`, or as soon as any other response
+    (tool call, tool output, another run/node, interrupt, ...) arrives. A window of 0
+    disables coalescing.
+    """
+    iterator = aiter(responses)
+    if window <= 0:
+        async for response in iterator:
+            yield response
+        return
+
+    loop = asyncio.get_running_loop()
+    # The source is driven by a single task so every step runs in the same context;
+    # the task ends by queueing its error, or `None` once the source is exhausted
+    queue: asyncio.Queue[ChatFrame | Exception | None] = asyncio.Queue(maxsize=1)
+
+    async def produce() -> None:
+        try:
+            async for response in iterator:
+                await queue.put(response)
+        except Exception as error:
+            await queue.put(error)
+        else:
+            await queue.put(None)
+
+    task = asyncio.create_task(produce())
+    pending: ChatFrame | None = None
+    pending_bytes = 0
+    deadline = 0.0
+    # Kept across timeouts so no queued response is lost while flushing
+    getter: asyncio.Future[ChatFrame | Exception | None] | None = None
+
+    try:
+        while True:
+            if getter is None:
+                getter = asyncio.ensure_future(queue.get())
+            timeout = max(deadline - loop.time(), 0) if pending else None
+            done, _ = await asyncio.wait({getter}, timeout=timeout)
+            if not done:
+                yield pending
+                pending = None
+                continue
+            item, getter = getter.result(), None
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise item
+            response = item
+
+            if (
+                pending is not None
+                and is_coalescable(response)
+                and response.id == pending.id
+                and response.name == pending.name
+            ):
+                pending.content = f"{pending.content}{response.content}"
+                pending_bytes += len(response.content.encode())
+            else:
+                if pending is not None:
+                    yield pending
+                    pending = None
+                if not is_coalescable(response):
+                    yield response
+                    continue
+                pending = response.copy()
+                pending_bytes = len(response.content.encode())
+                deadline = loop.time() + window
+
+            if max_bytes > 0 and pending_bytes >= max_bytes:
+                yield pending
+                pending = None
+
+        if pending is not None:
+            yield pending
+    finally:
+        if getter is not None:
+            getter.cancel()
+        if not task.done():
+            task.cancel()
+            await asyncio.wait({task})
+
+
+async def cancel_on_disconnect(
+    responses: AsyncIterable[T],
+    is_disconnected: Callable[[], Awaitable[bool]] | None = None,
+    poll_interval: float = 1.0,
+) -> AsyncIterator[T]:
+    """
+    Drive `responses` in a task owned by this generator and cancel it on early exit.
+
+    The task is cancelled when the consumer stops iterating (the generator is closed
+    or its task cancelled), or when `is_disconnected` reports that the client went
+    away, which is polled every `poll_interval` seconds while no response is ready.
+    Cancelling the task propagates into the graph run, aborting in-flight provider
+    and tool requests; supersteps that already finished stay checkpointed.
+    """
+    # A single slot keeps the producer in lock-step with the consumer
+    queue: asyncio.Queue[T] = asyncio.Queue(maxsize=1)
+
+    async def produce() -> None:
+        async for response in responses:
+            await queue.put(response)
+
+    task = asyncio.create_task(produce())
+    getter: asyncio.Future[T] | None = None
+    reason = "closed"
+    try:
+        while True:
+            getter = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait(
+                {getter, task},
+                timeout=poll_interval if is_disconnected else None,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if getter in done:
+                yield getter.result()
+                continue
+            getter.cancel()
+            if task in done:
+                while not queue.empty():
+                    yield queue.get_nowait()
+                # Re-raises the error of the graph run, if any
+                task.result()
+                return
+            if is_disconnected is not None and await is_disconnected():
+                reason = "disconnect"
+                return
+    finally:
+        if getter is not None:
+            getter.cancel()
+        if not task.done():
+            task.cancel()
+            await asyncio.wait({task})
+            cancelled_runs.inc(reason=reason)
+            await logger.info(f"Cancelled graph run on {reason}")
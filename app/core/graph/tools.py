@@ -0,0 +1,122 @@
+import asyncio
+import time
+from collections.abc import Sequence
+from typing import Any
+
+from langchain_core.messages import AIMessage, AnyMessage, ToolCall, ToolMessage
+from langchain_core.runnables.config import RunnableConfig
+from langchain_core.tools import BaseTool
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+
+tool_latency = registry.histogram(
+    "graph_tool_call_seconds", "Duration of tool calls run by ParallelToolNode"
+)
+
+
+class ParallelToolNode:
+    """
+    Graph node running the tool calls of the last AI message concurrently.
+
+    At most `concurrency` calls of one node run at once, each is cancelled after
+    `timeout` seconds, and the calls still running when the node's `deadline`
+    expires are cancelled as stragglers. Failed, timed out and cancelled calls are
+    answered with an error ToolMessage so the model can react to them. Tools are
+    invoked with the ToolCall itself, so artifacts (e.g. KnowledgeBase documents)
+    are kept as with LangGraph's ToolNode.
+
+    Sync tools run in the default thread pool and cannot be cancelled: a timed out
+    or straggling call is answered and its slot released, but its thread keeps
+    running until the tool returns.
+    """
+
+    def __init__(
+        self,
+        tools: Sequence[BaseTool],
+        concurrency: int = settings.CHAT_TOOL_CONCURRENCY,
+        timeout: float = settings.CHAT_TOOL_TIMEOUT,
+        deadline: float = settings.CHAT_TOOL_DEADLINE,
+    ):
+        self.tools = {tool.name: tool for tool in tools}
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.deadline = deadline
+
+    async def __call__(
+        self, state: dict[str, Any], config: RunnableConfig
+    ) -> dict[str, list[AnyMessage]]:
+        message = state["messages"][-1]
+        if not isinstance(message, AIMessage) or not message.tool_calls:
+            return {"messages": []}
+
+        semaphore = asyncio.Semaphore(max(self.concurrency, 1))
+        tasks = [
+            asyncio.create_task(self.run(tool_call, semaphore, config))
+            for tool_call in message.tool_calls
+        ]
+        done, pending = await asyncio.wait(
+            tasks, timeout=self.deadline if self.deadline > 0 else None
+        )
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
+
+        return {
+            "messages": [
+                task.result()
+                if task in done
+                else self.error(tool_call, "Tool call cancelled: the node ran out of time")
+                for task, tool_call in zip(tasks, message.tool_calls, strict=True)
+            ]
+        }
+
+    async def run(
+        self, tool_call: ToolCall, semaphore: asyncio.Semaphore, config: RunnableConfig
+    ) -> ToolMessage:
+        tool = self.tools.get(tool_call["name"])
+        if tool is None:
+            return self.error(tool_call, f"Error: {tool_call['name']} is not a valid tool")
+
+        async with semaphore:
+            started = time.perf_counter()
+            status = "success"
+            try:
+                result = await asyncio.wait_for(
+                    tool.ainvoke({**tool_call, "type": "tool_call"}, config),
+                    timeout=self.timeout if self.timeout > 0 else None,
+                )
+            except asyncio.TimeoutError:
+                status = "timeout"
+                return self.error(
+                    tool_call, f"Error: {tool.name} timed out after {self.timeout}s"
+                )
+            except asyncio.CancelledError:
+                status = "cancelled"
+                raise
+            except Exception as e:
+                status = "error"
+                return self.error(tool_call, f"Error: {e!r}\n Please fix your mistakes.")
+            finally:
+                tool_latency.observe(
+                    time.perf_counter() - started, tool=tool.name, status=status
+                )
+
+        if isinstance(result, ToolMessage):
+            return result
+        return ToolMessage(
+            content=result if isinstance(result, str) else str(result),
+            name=tool.name,
+            tool_call_id=tool_call["id"],
+        )
+
+    @staticmethod
+    def error(tool_call: ToolCall, content: str) -> ToolMessage:
+        return ToolMessage(
+            content=content,
+            name=tool_call["name"],
+            tool_call_id=tool_call["id"],
+            status="error",
+        )
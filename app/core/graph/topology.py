@@ -0,0 +1,43 @@
+import uuid
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlmodel import select
+
+from app.api.models import Member, Team
+from app.core.graph.cache import TeamGraph, graph_cache, team_version
+
+
+async def load_team_members(session: AsyncSession, team_id: uuid.UUID) -> list[Member]:
+    """
+    Load the members of a team together with their skills and uploads.
+
+    The relationships are fetched with `selectinload`, so converting the team into
+    its graph representation doesn't issue a lazy load per member.
+    """
+    statement = (
+        select(Member)
+        .where(Member.belongs_to == team_id)
+        .options(selectinload(Member.skills), selectinload(Member.uploads))
+        .order_by(Member.id)
+    )
+    return list(await session.scalars(statement))
+
+
+async def get_team_graph(session: AsyncSession, team: Team) -> TeamGraph:
+    """
+    Return the compiled graph of a team, loading its topology only on a cache miss.
+    """
+    # build.py pulls in the whole graph runtime, keep it out of the API's import path
+    from app.core.graph.build import build_team_graph
+
+    version = team_version(team)
+    if (cached := graph_cache.get(team.id, version)) is not None:
+        return cached
+
+    if team.workflow == "workflow":
+        await session.refresh(team, attribute_names=["graphs"])
+        members: list[Member] = []
+    else:
+        members = await load_team_members(session, team.id)
+    return graph_cache.put(team.id, version, build_team_graph(team, members))
@@ -0,0 +1,170 @@
+from collections import OrderedDict
+from typing import Any, Literal
+
+from langchain_core.messages import AIMessage, AnyMessage, ToolMessage
+
+from app.core.config import settings
+from app.core.db import checkpoint_pool
+from app.core.graph.checkpointer import thread_state_cache
+from app.core.graph.messages import ChatResponse, get_message_type
+from app.core.graph.serde import checkpoint_serde
+from app.core.llm.images import IMAGE_REF_SCHEME, image_links
+from app.core.metrics import registry
+
+
+transcript_requests = registry.counter(
+    "thread_transcript_requests_total", "Thread message index lookups by source"
+)
+
+# Every graph state accumulates the whole conversation in this channel
+MESSAGES_CHANNEL = "all_messages"
+
+LATEST_VERSION = """
+SELECT checkpoint -> 'channel_versions' ->> %(channel)s AS version
+FROM checkpoints
+WHERE thread_id = %(thread_id)s AND checkpoint_ns = ''
+ORDER BY checkpoint_id DESC
+LIMIT 1
+"""
+
+CHANNEL_BLOB = """
+SELECT type, blob
+FROM checkpoint_blobs
+WHERE thread_id = %(thread_id)s AND checkpoint_ns = ''
+    AND channel = %(channel)s AND version = %(version)s
+"""
+
+
+def to_response(message: AnyMessage, position: int) -> ChatResponse:
+    content = message.content
+    imgdata = None
+    if isinstance(content, list):
+        imgdata = next(
+            (
+                part["image_url"]["url"]
+                for part in content
+                if isinstance(part, dict) and part.get("type") == "image_url"
+            ),
+            None,
+        )
+        content = "".join(
+            part if isinstance(part, str) else part.get("text", "") for part in content
+        )
+    message_type = get_message_type(message) or message.type
+    return ChatResponse(
+        type=message_type,
+        id=message.id or str(position),
+        name=message.name or message_type,
+        content=content if not isinstance(message, ToolMessage) else None,
+        imgdata=imgdata,
+        tool_calls=message.tool_calls if isinstance(message, AIMessage) else None,
+        tool_output=content if isinstance(message, ToolMessage) else None,
+    )
+
+
+class ThreadTranscript:
+    """
+    Message history of threads, read from their latest checkpoint.
+
+    Only the blob of the messages channel is fetched and decoded, and the decoded
+    index is kept per channel version (shared by every checkpoint that didn't touch
+    the messages), so paging through a conversation decodes it once.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._index: OrderedDict[tuple[str, str], list[ChatResponse]] = OrderedDict()
+
+    def _cached(self, thread_id: str, version: str) -> list[ChatResponse] | None:
+        if (index := self._index.get((thread_id, version))) is not None:
+            self._index.move_to_end((thread_id, version))
+        return index
+
+    def _remember(
+        self, thread_id: str, version: str, messages: list[AnyMessage]
+    ) -> list[ChatResponse]:
+        index = [to_response(message, position) for position, message in enumerate(messages)]
+        self._index[(thread_id, version)] = index
+        while len(self._index) > self.max_entries:
+            self._index.popitem(last=False)
+        return index
+
+    async def messages(self, thread_id: str) -> list[ChatResponse]:
+        # A thread being chatted with has its latest checkpoint in memory
+        entry = thread_state_cache.get(thread_id, "")
+        if entry is not None:
+            checkpoint = entry.tuple.checkpoint
+            version = checkpoint["channel_versions"].get(MESSAGES_CHANNEL)
+            if version is None:
+                return []
+            if (index := self._cached(thread_id, str(version))) is not None:
+                transcript_requests.inc(source="index")
+                return index
+            transcript_requests.inc(source="checkpoint_cache")
+            return self._remember(
+                thread_id,
+                str(version),
+                checkpoint["channel_values"].get(MESSAGES_CHANNEL, []),
+            )
+
+        params: dict[str, Any] = {"thread_id": thread_id, "channel": MESSAGES_CHANNEL}
+        async with checkpoint_pool.connection() as conn:
+            cursor = await conn.execute(LATEST_VERSION, params)
+            row = await cursor.fetchone()
+            if row is None or row["version"] is None:
+                return []
+            version = row["version"]
+            if (index := self._cached(thread_id, version)) is not None:
+                transcript_requests.inc(source="index")
+                return index
+            cursor = await conn.execute(CHANNEL_BLOB, {**params, "version": version})
+            blob = await cursor.fetchone()
+        transcript_requests.inc(source="database")
+        if blob is None or blob["type"] == "empty":
+            return []
+        return self._remember(
+            thread_id, version, checkpoint_serde.loads_typed((blob["type"], blob["blob"]))
+        )
+
+    async def page(
+        self,
+        thread_id: str,
+        cursor: int | None,
+        limit: int,
+        order: Literal["asc", "desc"],
+    ) -> tuple[list[ChatResponse], int | None, int]:
+        """
+        Return a page of messages, the cursor of the next page and the total count.
+
+        Cursors are message positions: the page starts at `cursor` when reading
+        oldest-first, and ends right before it when reading newest-first.
+        """
+        index = await self.messages(thread_id)
+        total = len(index)
+        if order == "asc":
+            start = min(max(cursor or 0, 0), total)
+            page = index[start : start + limit]
+            next_cursor = start + limit if start + limit < total else None
+        else:
+            end = total if cursor is None else min(max(cursor, 0), total)
+            start = max(end - limit, 0)
+            page = index[start:end][::-1]
+            next_cursor = start if start > 0 else None
+
+        refs = [
+            message.imgdata
+            for message in page
+            if message.imgdata and message.imgdata.startswith(IMAGE_REF_SCHEME)
+        ]
+        if refs:
+            links = await image_links(refs, thread_id)
+            page = [
+                message.model_copy(update={"imgdata": links[message.imgdata]})
+                if message.imgdata in links
+                else message
+                for message in page
+            ]
+        return page, next_cursor, total
+
+
+thread_transcript = ThreadTranscript(max_entries=settings.CHAT_TRANSCRIPT_CACHE_SIZE)
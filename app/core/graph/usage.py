@@ -0,0 +1,119 @@
+import time
+from typing import Any
+from uuid import uuid4
+
+from langchain_core.runnables.schema import StreamEvent
+
+from app.core.graph.messages import ChatFrame, dumps
+from app.core.metrics import registry
+
+
+node_ttft = registry.histogram(
+    "graph_node_ttft_seconds", "Time to first token of the chat model calls of a node"
+)
+node_generation = registry.histogram(
+    "graph_node_generation_seconds", "Duration of the chat model calls of a node"
+)
+node_tool = registry.histogram(
+    "graph_node_tool_seconds", "Duration of the tool calls of a node"
+)
+node_tokens = registry.counter(
+    "graph_node_tokens_total", "Prompt and completion tokens spent by a node"
+)
+
+
+class NodeUsage:
+    __slots__ = (
+        "llm_calls",
+        "ttft",
+        "generation_time",
+        "prompt_tokens",
+        "completion_tokens",
+        "tool_calls",
+        "tool_time",
+    )
+
+    def __init__(self):
+        self.llm_calls = 0
+        self.ttft: float | None = None  # of the node's first model call
+        self.generation_time = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.tool_calls = 0
+        self.tool_time = 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "llm_calls": self.llm_calls,
+            "ttft": round(self.ttft, 4) if self.ttft is not None else None,
+            "generation_time": round(self.generation_time, 4),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "tool_calls": self.tool_calls,
+            "tool_time": round(self.tool_time, 4),
+        }
+
+
+class UsageTracker:
+    """
+    Per-node latency and token accounting of one graph run, fed with its
+    `astream_events` events.
+    """
+
+    def __init__(self, label: Any = None):
+        self.label = label or (lambda node_id: node_id)
+        self.nodes: dict[str, NodeUsage] = {}
+        # run id -> (node, start time, time of first token)
+        self._models: dict[str, tuple[str, float, float | None]] = {}
+        self._tools: dict[str, tuple[str, float]] = {}
+
+    def node(self, event: StreamEvent) -> str:
+        return self.label(event.get("metadata", {}).get("langgraph_node", event["name"]))
+
+    def observe(self, event: StreamEvent) -> None:
+        kind = event["event"]
+        run_id = event["run_id"]
+        now = time.perf_counter()
+        if kind == "on_chat_model_start":
+            self._models[run_id] = (self.node(event), now, None)
+        elif kind == "on_chat_model_stream":
+            if (run := self._models.get(run_id)) is not None and run[2] is None:
+                self._models[run_id] = (run[0], run[1], now)
+        elif kind == "on_chat_model_end":
+            if (run := self._models.pop(run_id, None)) is None:
+                return
+            name, started, first_token = run
+            usage = self.nodes.setdefault(name, NodeUsage())
+            usage.llm_calls += 1
+            usage.generation_time += now - started
+            if first_token is not None:
+                node_ttft.observe(first_token - started, node=name)
+                if usage.ttft is None:
+                    usage.ttft = first_token - started
+            node_generation.observe(now - started, node=name)
+            output = event["data"].get("output")
+            tokens = getattr(output, "usage_metadata", None) or {}
+            usage.prompt_tokens += tokens.get("input_tokens", 0)
+            usage.completion_tokens += tokens.get("output_tokens", 0)
+            node_tokens.inc(tokens.get("input_tokens", 0), node=name, kind="prompt")
+            node_tokens.inc(tokens.get("output_tokens", 0), node=name, kind="completion")
+        elif kind == "on_tool_start":
+            self._tools[run_id] = (self.node(event), now)
+        elif kind in ("on_tool_end", "on_tool_error"):
+            if (run := self._tools.pop(run_id, None)) is None:
+                return
+            name, started = run
+            usage = self.nodes.setdefault(name, NodeUsage())
+            usage.tool_calls += 1
+            usage.tool_time += now - started
+            node_tool.observe(now - started, node=name, tool=event["name"])
+
+    def frame(self) -> ChatFrame:
+        return ChatFrame(
+            type="usage",
+            id=str(uuid4()),
+            name="usage",
+            content=dumps(
+                {name: usage.to_dict() for name, usage in self.nodes.items()}
+            ).decode(),
+        )
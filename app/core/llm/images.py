@@ -0,0 +1,280 @@
+import asyncio
+import base64
+import binascii
+import hashlib
+import mimetypes
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.storage.s3 import StorageClient
+from app.utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+IMAGE_REF_SCHEME = "s3://"
+
+offloaded_images = registry.counter(
+    "chat_images_offloaded_total", "Inline chat images moved to object storage"
+)
+resolved_images = registry.counter(
+    "chat_images_resolved_total", "Image references inlined for a provider call, by source"
+)
+
+# Object keys known to exist, so resent history doesn't re-upload its images
+_uploaded: OrderedDict[str, None] = OrderedDict()
+# Image reference -> data URL of the most recently used images
+_resolved: OrderedDict[str, str] = OrderedDict()
+
+
+def _remember(cache: OrderedDict[str, Any], key: str, value: Any) -> None:
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > settings.CHAT_IMAGE_CACHE_SIZE:
+        cache.popitem(last=False)
+
+
+def parse_data_url(url: str) -> tuple[str, bytes] | None:
+    """Return (mime type, bytes) of a base64 `data:` URL, None for anything else."""
+    if not url.startswith("data:") or ";base64," not in url:
+        return None
+    header, data = url[5:].split(";base64,", 1)
+    try:
+        return header or "application/octet-stream", base64.b64decode(data)
+    except (binascii.Error, ValueError):
+        return None
+
+
+def thread_image_prefix(thread_id: str) -> str:
+    """`s3://` prefix under which the images of a thread are offloaded."""
+    return (
+        f"{IMAGE_REF_SCHEME}{settings.AWS_S3_BUCKET_NAME}/"
+        f"{settings.AWS_S3_IMAGE_PREFIX}/{thread_id}/"
+    )
+
+
+def is_thread_image(ref: str, thread_id: str) -> bool:
+    """Whether `ref` is an image this server offloaded for `thread_id`."""
+    prefix = thread_image_prefix(thread_id)
+    name = ref[len(prefix):]
+    return ref.startswith(prefix) and bool(name) and "/" not in name and ".." not in name
+
+
+async def offload_image(url: str, thread_id: str) -> str:
+    """
+    Upload an inline `data:` image to object storage and return its `s3://` reference.
+
+    Small images and plain http(s) URLs are returned unchanged, and so is the image
+    when the upload fails. Keys are content addressed, so the same image is uploaded
+    once per thread.
+    """
+    if not settings.CHAT_IMAGE_OFFLOAD or len(url) <= settings.CHAT_IMAGE_INLINE_MAX_BYTES:
+        return url
+    if (parsed := parse_data_url(url)) is None:
+        return url
+    content_type, body = parsed
+    extension = mimetypes.guess_extension(content_type) or ""
+    key = (
+        f"{settings.AWS_S3_IMAGE_PREFIX}/{thread_id}/"
+        f"{hashlib.sha256(body).hexdigest()}{extension}"
+    )
+    bucket = settings.AWS_S3_BUCKET_NAME
+    ref = f"{IMAGE_REF_SCHEME}{bucket}/{key}"
+    if ref not in _uploaded:
+        try:
+            async with StorageClient() as client:
+                await client.put_object(bucket, key, body, content_type=content_type)
+        except Exception as e:
+            await logger.warning(f"Offloading image of thread {thread_id} failed: {e}")
+            return url
+        offloaded_images.inc()
+        _remember(_resolved, ref, url)
+    _remember(_uploaded, ref, None)
+    return ref
+
+
+async def resolve_image(ref: str, thread_id: str) -> str:
+    """
+    Return the `data:` URL of an `s3://` image reference of `thread_id`.
+
+    Raises:
+        ValueError: If the reference isn't an image offloaded for the thread.
+    """
+    if not is_thread_image(ref, thread_id):
+        raise ValueError(f"Image reference {ref} doesn't belong to thread {thread_id}")
+    if (url := _resolved.get(ref)) is not None:
+        _resolved.move_to_end(ref)
+        resolved_images.inc(source="cache")
+        return url
+    bucket, key = ref[len(IMAGE_REF_SCHEME):].split("/", 1)
+    async with StorageClient() as client:
+        response = await client.get_object(bucket, key)
+        async with response["Body"] as stream:
+            body = await stream.read()
+    content_type = response.get("ContentType") or "application/octet-stream"
+    url = f"data:{content_type};base64,{base64.b64encode(body).decode()}"
+    _remember(_resolved, ref, url)
+    resolved_images.inc(source="storage")
+    return url
+
+
+async def image_links(refs: Sequence[str], thread_id: str) -> dict[str, str]:
+    """
+    Map the `s3://` image references of a thread to temporary download links for
+    clients. References outside the thread's own image prefix get no link.
+    """
+    links: dict[str, str] = {}
+    refs = [ref for ref in refs if is_thread_image(ref, thread_id)]
+    if not refs:
+        return links
+    async with StorageClient() as client:
+        for ref in refs:
+            bucket, key = ref[len(IMAGE_REF_SCHEME):].split("/", 1)
+            links[ref] = await client.presigned_url(
+                bucket, key, expires_in=settings.CHAT_IMAGE_LINK_TTL
+            )
+    return links
+
+
+def has_image_refs(message: BaseMessage) -> bool:
+    return isinstance(message.content, list) and any(
+        isinstance(part, dict)
+        and part.get("type") == "image_url"
+        and str(part.get("image_url", {}).get("url", "")).startswith(IMAGE_REF_SCHEME)
+        for part in message.content
+    )
+
+
+async def resolve_images(
+    messages: Sequence[BaseMessage], thread_id: str
+) -> list[BaseMessage]:
+    """Inline the `s3://` image parts of `messages`, leaving other messages as is."""
+    resolved: list[BaseMessage] = []
+    for message in messages:
+        if not has_image_refs(message):
+            resolved.append(message)
+            continue
+        content: list[Any] = []
+        for part in message.content:
+            url = part.get("image_url", {}).get("url", "") if isinstance(part, dict) else ""
+            if isinstance(url, str) and url.startswith(IMAGE_REF_SCHEME):
+                part = {**part, "image_url": {**part["image_url"], "url": await resolve_image(url, thread_id)}}
+            content.append(part)
+        resolved.append(message.model_copy(update={"content": content}))
+    return resolved
+
+
+def resolve_images_sync(
+    messages: Sequence[BaseMessage], thread_id: str
+) -> list[BaseMessage]:
+    """`resolve_images` for the sync model paths, which may run inside an event loop."""
+    if not any(has_image_refs(message) for message in messages):
+        return list(messages)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, resolve_images(messages, thread_id)).result()
+
+
+def run_thread_id(
+    run_manager: CallbackManagerForLLMRun | AsyncCallbackManagerForLLMRun | None,
+) -> str:
+    """Thread of the graph run the model is called from (its `thread_id` config)."""
+    metadata = run_manager.metadata if run_manager is not None else {}
+    return str(metadata.get("thread_id"))
+
+
+class ImageResolvingChatModel(BaseChatModel):
+    """
+    Chat model wrapper inlining offloaded images right before the provider call.
+
+    Messages in the graph state (and so in checkpoints) only hold `s3://`
+    references; the images of the calling run's thread are fetched when a model
+    actually receives them, refs to anything else are refused. Tool
+    bindings are applied to the wrapped model's request kwargs, so `bind_tools` and
+    `with_structured_output` keep going through this wrapper, but through the generic
+    tool-calling implementation rather than a provider-specific one. Only used with
+    `CHAT_IMAGE_OFFLOAD`.
+    """
+
+    inner: BaseChatModel
+
+    @property
+    def _llm_type(self) -> str:
+        return self.inner._llm_type
+
+    @property
+    def _identifying_params(self) -> dict[str, Any]:
+        return self.inner._identifying_params
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> Runnable:
+        binding = self.inner.bind_tools(tools, **kwargs)
+        return self.bind(**getattr(binding, "kwargs", {}))
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        return self.inner._generate(
+            resolve_images_sync(messages, run_thread_id(run_manager)),
+            stop,
+            run_manager=run_manager,
+            **kwargs,
+        )
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        return self.inner._stream(
+            resolve_images_sync(messages, run_thread_id(run_manager)),
+            stop,
+            run_manager=run_manager,
+            **kwargs,
+        )
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        return await self.inner._agenerate(
+            await resolve_images(messages, run_thread_id(run_manager)),
+            stop,
+            run_manager=run_manager,
+            **kwargs,
+        )
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        async for chunk in self.inner._astream(
+            await resolve_images(messages, run_thread_id(run_manager)),
+            stop,
+            run_manager=run_manager,
+            **kwargs,
+        ):
+            yield chunk
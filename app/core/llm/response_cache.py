@@ -0,0 +1,177 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+from typing import Any
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import ChatGeneration, Generation
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.models import LLMCache
+from app.core.config import settings
+from app.core.db import engine
+from app.core.metrics import registry
+
+
+cache_requests = registry.counter(
+    "llm_cache_requests_total", "LLM response cache lookups by result and tier"
+)
+
+# Message fields that differ between otherwise identical prompts
+VOLATILE_FIELDS = ("id", "response_metadata", "usage_metadata")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Drop per-run fields (message ids, response/usage metadata) from a serialised prompt."""
+    try:
+        messages = json.loads(prompt)
+    except ValueError:
+        return prompt
+    if not isinstance(messages, list):
+        return prompt
+    for message in messages:
+        kwargs = message.get("kwargs") if isinstance(message, dict) else None
+        if isinstance(kwargs, dict):
+            for field in VOLATILE_FIELDS:
+                kwargs.pop(field, None)
+    return json.dumps(messages, sort_keys=True, ensure_ascii=False)
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    """
+    Hash of the model configuration and the normalised messages.
+
+    `llm_string` is built by LangChain from the model class (provider), model name,
+    temperature and the bound tool schemas.
+    """
+    return hashlib.sha256(
+        f"{llm_string}\x00{normalize_prompt(prompt)}".encode()
+    ).hexdigest()
+
+
+def mark_cached(generations: Sequence[Generation]) -> list[Generation]:
+    """Flag replayed messages so the stream layer can emit their content."""
+    return [
+        generation.model_copy(
+            update={
+                "message": generation.message.model_copy(
+                    update={
+                        "response_metadata": {
+                            **generation.message.response_metadata,
+                            "cache_hit": True,
+                        }
+                    }
+                )
+            }
+        )
+        if isinstance(generation, ChatGeneration)
+        else generation
+        for generation in generations
+    ]
+
+
+class ResponseCache(BaseCache):
+    """
+    Exact-match cache of chat model responses with an in-memory LRU tier and an
+    optional Postgres tier (`llm_cache` table), both honouring `ttl`.
+
+    The synchronous interface only uses the memory tier; graph runs go through the
+    async one. A hit skips the model's stream, so a cached reply reaches streaming
+    clients as one frame (see `messages.chat_model_end`) rather than token by token.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, persistent: bool):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.persistent = persistent
+        self._entries: OrderedDict[str, tuple[float, RETURN_VAL_TYPE]] = OrderedDict()
+
+    def _get_local(self, key: str) -> RETURN_VAL_TYPE | None:
+        if (entry := self._entries.get(key)) is None:
+            return None
+        expires_at, generations = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return generations
+
+    def _put_local(self, key: str, generations: RETURN_VAL_TYPE) -> None:
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, generations)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def lookup(self, prompt: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+        generations = self._get_local(cache_key(prompt, llm_string))
+        cache_requests.inc(result="hit" if generations else "miss", tier="memory")
+        return mark_cached(generations) if generations else None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        self._put_local(cache_key(prompt, llm_string), return_val)
+
+    def clear(self, **kwargs: Any) -> None:
+        self._entries.clear()
+
+    async def alookup(self, prompt: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+        key = cache_key(prompt, llm_string)
+        if (generations := self._get_local(key)) is not None:
+            cache_requests.inc(result="hit", tier="memory")
+            return mark_cached(generations)
+        if not self.persistent:
+            cache_requests.inc(result="miss", tier="memory")
+            return None
+
+        async with AsyncSession(engine) as session:
+            row = await session.get(LLMCache, key)
+        if row is None or row.expires_at <= datetime.now():
+            cache_requests.inc(result="miss", tier="postgres")
+            return None
+        generations = [loads(json.dumps(generation)) for generation in row.generations]
+        self._put_local(key, generations)
+        cache_requests.inc(result="hit", tier="postgres")
+        return mark_cached(generations)
+
+    async def aupdate(
+        self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE
+    ) -> None:
+        key = cache_key(prompt, llm_string)
+        self._put_local(key, return_val)
+        if not self.persistent:
+            return
+        now = datetime.now()
+        values = {
+            "key": key,
+            "generations": [json.loads(dumps(generation)) for generation in return_val],
+            "created_at": now,
+            "expires_at": now + timedelta(seconds=self.ttl),
+        }
+        statement = insert(LLMCache).values(**values)
+        statement = statement.on_conflict_do_update(
+            index_elements=[LLMCache.key], set_=values
+        )
+        async with AsyncSession(engine) as session:
+            await session.execute(statement)
+            await session.commit()
+
+    async def aclear(self, **kwargs: Any) -> None:
+        self._entries.clear()
+        if self.persistent:
+            async with AsyncSession(engine) as session:
+                await session.execute(delete(LLMCache))
+                await session.commit()
+
+
+response_cache = ResponseCache(
+    maxsize=settings.LLM_CACHE_SIZE,
+    ttl=settings.LLM_CACHE_TTL,
+    persistent=settings.LLM_CACHE_PERSISTENT,
+)
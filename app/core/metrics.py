@@ -0,0 +1,175 @@
+import threading
+from collections.abc import Callable
+from typing import Any
+
+
+LabelKey = tuple[tuple[str, str], ...]
+
+
+def _label_key(labels: dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, **extra: str) -> str:
+    pairs = [*key, *extra.items()]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+class Metric:
+    type: str = "untyped"
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._lock = threading.Lock()
+
+    def samples(self) -> list[tuple[str, LabelKey, float]]:
+        raise NotImplementedError
+
+    def snapshot(self) -> dict[str, float]:
+        return {
+            f"{name}{_format_labels(key)}": value for name, key, value in self.samples()
+        }
+
+
+class Counter(Metric):
+    """Monotonically increasing value."""
+
+    type = "counter"
+
+    def __init__(self, name: str, description: str):
+        super().__init__(name, description)
+        self._values: dict[LabelKey, float] = {}
+
+    def inc(self, value: float = 1, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def samples(self) -> list[tuple[str, LabelKey, float]]:
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+
+class Gauge(Metric):
+    """Value that can go up and down, optionally read from a callback on collect."""
+
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        collect: Callable[[], dict[LabelKey, float]] | None = None,
+    ):
+        super().__init__(name, description)
+        self._values: dict[LabelKey, float] = {}
+        self._collect = collect
+
+    def set(self, value: float, **labels: Any) -> None:
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def inc(self, value: float = 1, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def dec(self, value: float = 1, **labels: Any) -> None:
+        self.inc(-value, **labels)
+
+    def samples(self) -> list[tuple[str, LabelKey, float]]:
+        values = self._collect() if self._collect else {}
+        with self._lock:
+            values = {**self._values, **values}
+        return [(self.name, key, value) for key, value in values.items()]
+
+
+class Histogram(Metric):
+    """Bucketed distribution of observed values, e.g. latencies in seconds."""
+
+    type = "histogram"
+    DEFAULT_BUCKETS: tuple[float, ...] = (
+        0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60,
+    )
+
+    def __init__(
+        self, name: str, description: str, buckets: tuple[float, ...] | None = None
+    ):
+        super().__init__(name, description)
+        self.buckets = tuple(sorted(buckets or self.DEFAULT_BUCKETS))
+        self._counts: dict[LabelKey, list[int]] = {}
+        self._sums: dict[LabelKey, float] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            self._sums[key] = self._sums.get(key, 0) + value
+
+    def samples(self) -> list[tuple[str, LabelKey, float]]:
+        samples: list[tuple[str, LabelKey, float]] = []
+        with self._lock:
+            for key, counts in self._counts.items():
+                cumulative = 0
+                for bound, count in zip((*self.buckets, float("inf")), counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    samples.append(
+                        (f"{self.name}_bucket", (*key, ("le", le)), cumulative)
+                    )
+                samples.append((f"{self.name}_count", key, cumulative))
+                samples.append((f"{self.name}_sum", key, self._sums[key]))
+        return samples
+
+
+class MetricsRegistry:
+    """In-process metrics registry rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Any:
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, description: str) -> Counter:
+        return self._register(Counter(name, description))
+
+    def gauge(
+        self,
+        name: str,
+        description: str,
+        collect: Callable[[], dict[LabelKey, float]] | None = None,
+    ) -> Gauge:
+        return self._register(Gauge(name, description, collect))
+
+    def histogram(
+        self, name: str, description: str, buckets: tuple[float, ...] | None = None
+    ) -> Histogram:
+        return self._register(Histogram(name, description, buckets))
+
+    def snapshot(self) -> dict[str, float]:
+        values: dict[str, float] = {}
+        for metric in self._metrics.values():
+            values.update(metric.snapshot())
+        return values
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, key, value in metric.samples():
+                lines.append(f"{name}{_format_labels(key)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
@@ -1,8 +1,82 @@
+import hashlib
 import importlib
 import os
-from collections.abc import Callable
+import pkgutil
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
 from typing import Any
 
+from langchain_core.language_models import BaseChatModel
+
+from app.core.config import settings
+
+
+def api_key_fingerprint(api_key: str | None) -> str:
+    """Stable, non-reversible identifier of an API key for use in cache keys."""
+    return hashlib.sha256((api_key or "").encode()).hexdigest()[:16]
+
+
+class ModelClientCache:
+    """Bounded LRU of chat-model clients so their HTTP connection pools are reused.
+
+    Entries are keyed by (provider, model, temperature, extra kwargs, base_url, api key
+    fingerprint), so teams sharing a provider and model but holding their own keys
+    get their own clients side by side. Clients built with superseded credentials age
+    out of the LRU, or are dropped right away by `invalidate` when their provider
+    record is updated or deleted.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._clients: OrderedDict[tuple[Hashable, ...], Any] = OrderedDict()
+
+    def get_or_create(
+        self,
+        provider_name: str,
+        model: str,
+        temperature: float,
+        api_key: str,
+        base_url: str,
+        factory: Callable[[], Any],
+        **kwargs,
+    ) -> Any:
+        try:
+            extra = tuple(sorted(kwargs.items()))
+            hash(extra)
+        except TypeError:
+            # Unhashable kwargs (callbacks, clients, ...) are not safe to share
+            return factory()
+        if self.maxsize <= 0:
+            return factory()
+
+        key = (provider_name, model, temperature, extra, base_url, api_key_fingerprint(api_key))
+        if (client := self._clients.get(key)) is not None:
+            self._clients.move_to_end(key)
+            return client
+
+        client = self._clients[key] = factory()
+        while len(self._clients) > self.maxsize:
+            self._clients.popitem(last=False)
+        return client
+
+    def invalidate(
+        self,
+        provider_name: str | None = None,
+        api_key: str | None = None,
+        base_url: str | None = None,
+    ) -> None:
+        """
+        Drop cached clients of a provider (or all). Pass the credentials of a provider
+        record to only drop the clients built with them, e.g. after it is updated.
+        """
+        fingerprint = api_key_fingerprint(api_key) if api_key is not None else None
+        for key in list(self._clients):
+            if provider_name is not None and key[0] != provider_name:
+                continue
+            if fingerprint is not None and (key[4], key[5]) != (base_url, fingerprint):
+                continue
+            del self._clients[key]
+
 
 class ModelProviderManager:
     def __init__(self):
@@ -10,31 +84,40 @@ class ModelProviderManager:
         self.models: dict[str, list[str]] = {}
         self.init_functions: dict[str, Callable] = {}
         self.init_crewai_functions: dict[str, Callable] = {}
+        self.clients = ModelClientCache(maxsize=settings.MODEL_CLIENT_CACHE_SIZE)
         self.load_providers()
 
     def load_providers(self):
+        """
+        Register every provider module of this package.
+
+        Provider modules only hold metadata (`PROVIDER_CONFIG`, `SUPPORTED_MODELS`) at
+        module level and import their SDK (langchain_openai, crewai, ...) inside
+        `init_model`/`init_crewai_model`, so discovery stays cheap and an SDK is only
+        loaded the first time its provider is used.
+        """
         providers_dir = os.path.dirname(os.path.abspath(__file__))
-        for item in os.listdir(providers_dir):
-            if os.path.isfile(os.path.join(providers_dir, item)) and not item.startswith(
-                "__"
-            ):
-                try:
-                    module = importlib.import_module(
-                        f".{item}", package="app.core.providers"
-                    )
-                    provider_config = getattr(module, "PROVIDER_CONFIG", None)
-                    supported_models = getattr(module, "SUPPORTED_MODELS", [])
-                    init_function = getattr(module, "init_model", None)
-                    init_crewai_function = getattr(module, "init_crewai_model", None)
-
-                    if provider_config and init_function:
-                        self.providers[item] = provider_config
-                        self.models[item] = supported_models
-                        self.init_functions[item] = init_function
-                        if init_crewai_function:
-                            self.init_crewai_functions[item] = init_crewai_function
-                except ImportError as e:
-                    print(f"Failed to load provider config for {item}: {e}")
+        for module_info in pkgutil.iter_modules([providers_dir]):
+            item = module_info.name
+            if module_info.ispkg or item.startswith("_"):
+                continue
+            try:
+                module = importlib.import_module(
+                    f".{item}", package="app.core.providers"
+                )
+                provider_config = getattr(module, "PROVIDER_CONFIG", None)
+                supported_models = getattr(module, "SUPPORTED_MODELS", [])
+                init_function = getattr(module, "init_model", None)
+                init_crewai_function = getattr(module, "init_crewai_model", None)
+
+                if provider_config and init_function:
+                    self.providers[item] = provider_config
+                    self.models[item] = supported_models
+                    self.init_functions[item] = init_function
+                    if init_crewai_function:
+                        self.init_crewai_functions[item] = init_crewai_function
+            except ImportError as e:
+                print(f"Failed to load provider config for {item}: {e}")
 
     def get_provider_config(self, provider_name: str) -> dict[str, Any]:
         return self.providers.get(provider_name, {})
@@ -60,7 +143,36 @@ class ModelProviderManager:
         init_function = self.init_functions.get(provider_name)
         if init_function:
 
-            return init_function(model, temperature, api_key, base_url, **kwargs)
+            def factory():
+                client = init_function(model, temperature, api_key, base_url, **kwargs)
+                if client is None:
+                    raise ValueError(
+                        f"Provider {provider_name} returned no client for model {model}"
+                    )
+                if not isinstance(client, BaseChatModel):
+                    return client
+                # Offloaded chat images are only inlined for the provider call
+                if settings.CHAT_IMAGE_OFFLOAD:
+                    from app.core.llm.images import ImageResolvingChatModel
+
+                    client = ImageResolvingChatModel(inner=client)
+                # Only deterministic calls are safe to answer from the response cache,
+                # which is consulted by the outermost model only
+                if settings.LLM_CACHE_ENABLED and temperature == 0:
+                    from app.core.llm.response_cache import response_cache
+
+                    client.cache = response_cache
+                return client
+
+            return self.clients.get_or_create(
+                provider_name,
+                model,
+                temperature,
+                api_key,
+                base_url,
+                factory,
+                **kwargs,
+            )
         else:
             raise ValueError(
                 f"No initialization function found for provider: {provider_name}"
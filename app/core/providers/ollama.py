@@ -1,6 +1,3 @@
-from crewai import LLM
-from langchain_ollama import ChatOllama
-
 from app.api.models import ModelCategory
 
 
@@ -24,6 +21,8 @@ SUPPORTED_MODELS = [
 def init_model(model: str, temperature: float, api_key: str, base_url: str, **kwargs):
     model_info = next((m for m in SUPPORTED_MODELS if m["name"] == model), None)
     if model_info and ModelCategory.CHAT in model_info["categories"]:
+        from langchain_ollama import ChatOllama
+
         return ChatOllama(
             model=model, temperature=temperature, base_url=base_url, **kwargs
         )
@@ -33,6 +32,8 @@ def init_model(model: str, temperature: float, api_key: str, base_url: str, **kw
 def init_crewai_model(model: str, api_key: str, base_url: str, **kwargs):
     model_info = next((m for m in SUPPORTED_MODELS if m["name"] == model), None)
     if model_info and ModelCategory.CHAT in model_info["categories"]:
+        from crewai import LLM
+
         return LLM(
             model=f"ollama/{model}",
             base_url=base_url,
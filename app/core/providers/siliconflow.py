@@ -1,6 +1,3 @@
-from crewai import LLM
-from langchain_openai import ChatOpenAI
-
 from app.api.models import ModelCategory
 
 
@@ -78,6 +75,8 @@ SUPPORTED_MODELS = [
 def init_model(model: str, temperature: float, api_key: str, base_url: str, **kwargs):
     model_info = next((m for m in SUPPORTED_MODELS if m["name"] == model), None)
     if model_info and ModelCategory.CHAT in model_info["categories"]:
+        from langchain_openai import ChatOpenAI
+
         return ChatOpenAI(
             model=model,
             temperature=temperature,
@@ -91,6 +90,8 @@ def init_model(model: str, temperature: float, api_key: str, base_url: str, **kw
 def init_crewai_model(model: str, api_key: str, base_url: str, **kwargs):
     model_info = next((m for m in SUPPORTED_MODELS if m["name"] == model), None)
     if model_info and ModelCategory.CHAT in model_info["categories"]:
+        from crewai import LLM
+
         return LLM(
             model=f"openai/{model}",
             base_url=base_url,
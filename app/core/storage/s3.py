@@ -6,6 +6,9 @@ from app.core.config import settings
 
 class StorageClient:
 
+    # 已确认存在的存储桶, 进程内共享, 避免每次上传都请求 head_bucket
+    _known_buckets: set[str] = set()
+
     def __init__(self):
         self.s3_session: aioboto3.Session = aioboto3.Session(
             aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
@@ -97,6 +100,26 @@ class StorageClient:
         except NoCredentialsError as e:
             raise NoCredentialsError(f"Unable to locate credentials: {e}")
 
+    async def put_object(self, bucket_name, remote_path, body, content_type=None):
+        """上传小对象 (单次请求, 不分块)"""
+        if bucket_name not in StorageClient._known_buckets:
+            await self.ensure_bucket_exists(bucket_name=bucket_name)
+            StorageClient._known_buckets.add(bucket_name)
+        extra = {"ContentType": content_type} if content_type else {}
+        try:
+            await self.s3_client.put_object(
+                Bucket=bucket_name, Key=remote_path, Body=body, **extra
+            )
+            return remote_path
+        except ClientError as e:
+            error_code = e.response["Error"]["Code"]
+            if error_code == "403":
+                raise ValueError(f"Access denied: {e}")
+            else:
+                raise ValueError(f"Unexpected error: {e}")
+        except NoCredentialsError as e:
+            raise NoCredentialsError(f"Unable to locate credentials: {e}")
+
     async def stat_object(self, bucket_name, remote_path):
         try:
             response = await self.s3_client.head_object(Bucket=bucket_name, Key=remote_path)
@@ -121,4 +144,17 @@ class StorageClient:
             else:
                 raise ValueError(f"Unexpected error: {e}")
         except NoCredentialsError as e:
-            raise NoCredentialsError(f"Unable to locate credentials: {e}")
\ No newline at end of file
+            raise NoCredentialsError(f"Unable to locate credentials: {e}")
+
+    async def presigned_url(self, bucket_name, remote_path, expires_in=3600):
+        """生成对象的临时下载链接"""
+        try:
+            return await self.s3_client.generate_presigned_url(
+                "get_object",
+                Params={"Bucket": bucket_name, "Key": remote_path},
+                ExpiresIn=expires_in,
+            )
+        except ClientError as e:
+            raise ValueError(f"Unexpected error: {e}")
+        except NoCredentialsError as e:
+            raise NoCredentialsError(f"Unable to locate credentials: {e}")
@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 import sentry_sdk
 
 from fastapi import FastAPI
@@ -8,8 +10,13 @@ from starlette.middleware.cors import CORSMiddleware
 
 from app.api.routes import api_router
 from app.core.config import settings
+from app.core.db import close_checkpoint_pool, open_checkpoint_pool
+from app.core.graph.checkpointer import thread_state_cache
+from app.core.graph.compaction import checkpoint_compactor
+from app.core.graph.executor import executor_pool
 from app.core.exceptions import register_exception_handlers
 from app.core.middleware import register_middleware
+from app.third_party.core.base import close_http_client
 from fastapi_pagination import add_pagination as register_pagination
 
 
@@ -21,8 +28,26 @@ if settings.SENTRY_DSN and settings.ENVIRONMENT != "local":
     sentry_sdk.init(dsn=str(settings.SENTRY_DSN), enable_tracing=True)
 
 
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    await open_checkpoint_pool()
+    if settings.CHAT_EXECUTION_MODE == "process":
+        await executor_pool.start()
+    if settings.CHECKPOINT_COMPACTION_ENABLED:
+        checkpoint_compactor.start()
+    if settings.CHECKPOINT_CACHE_ENABLED:
+        thread_state_cache.start()
+    yield
+    await thread_state_cache.stop()
+    await checkpoint_compactor.stop()
+    await executor_pool.stop()
+    await close_http_client()
+    await close_checkpoint_pool()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
+    lifespan=lifespan,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     generate_unique_id_function=custom_generate_unique_id,
 )
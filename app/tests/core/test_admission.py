@@ -0,0 +1,118 @@
+import asyncio
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.graph.admission import AdmissionController
+
+
+def team(id: str, tenant: str = "tenant") -> Any:
+    return SimpleNamespace(id=id, tenant_id=tenant)
+
+
+def member(model: str, provider: str = "openai") -> Any:
+    return SimpleNamespace(provider=provider, model=model)
+
+
+def controller(**kwargs: Any) -> AdmissionController:
+    options: dict[str, Any] = {
+        "team_limit": 1,
+        "tenant_limit": 0,
+        "model_limit": 0,
+        "max_queued": 8,
+        "weights": {},
+    }
+    return AdmissionController(**{**options, **kwargs})
+
+
+async def positions(ticket: Any) -> list[int]:
+    return [position async for position in ticket.wait()]
+
+
+def test_admits_within_limits() -> None:
+    admission = controller()
+    first = admission.admit(team("a"), [])
+    other_team = admission.admit(team("b"), [])
+    assert first.admitted and other_team.admitted
+
+
+def test_queues_over_limit_until_release() -> None:
+    async def main() -> None:
+        admission = controller()
+        running = admission.admit(team("a"), [])
+        waiting = admission.admit(team("a"), [])
+        assert not waiting.admitted
+        assert admission.position(waiting) == 1
+
+        reported = asyncio.create_task(positions(waiting))
+        await asyncio.sleep(0)
+        running.release()
+        assert await reported == [1]
+        assert waiting.admitted and admission.position(waiting) == 0
+
+    asyncio.run(main())
+
+
+def test_model_limit_spans_teams() -> None:
+    admission = controller(team_limit=0, model_limit=1)
+    admission.admit(team("a"), [member("gpt"), member("gpt")])
+    assert not admission.admit(team("b"), [member("gpt")]).admitted
+    assert admission.admit(team("c"), [member("other")]).admitted
+
+
+def test_full_queue_is_rejected() -> None:
+    admission = controller(max_queued=1)
+    admission.admit(team("a"), [])
+    admission.admit(team("a"), [])
+    with pytest.raises(HTTPException) as e:
+        admission.admit(team("a"), [])
+    assert e.value.status_code == 429
+    assert e.value.headers and "Retry-After" in e.value.headers
+
+
+def test_released_waiter_leaves_the_queue() -> None:
+    admission = controller(max_queued=1)
+    running = admission.admit(team("a"), [])
+    waiting = admission.admit(team("a"), [])
+    waiting.release()
+    waiting.release()
+    assert admission.position(waiting) == 0
+    # Its queue slot is free again
+    admission.admit(team("a"), [])
+    running.release()
+
+
+def test_weighted_fair_queue() -> None:
+    admission = controller(
+        team_limit=0, tenant_limit=0, model_limit=1, weights={"b": 2}
+    )
+    running = admission.admit(team("x", "a"), [member("gpt")])
+    queued_a = [admission.admit(team("x", "a"), [member("gpt")]) for _ in range(2)]
+    queued_b = [admission.admit(team("y", "b"), [member("gpt")]) for _ in range(2)]
+
+    order = []
+    current = running
+    for _ in range(4):
+        current.release()
+        current = next(t for t in queued_a + queued_b if t.admitted and not t.released)
+        order.append("a" if current in queued_a else "b")
+    # Twice the weight, twice as early in the queue
+    assert order == ["b", "a", "b", "a"]
+
+
+def test_unclaimed_ticket_is_released_once() -> None:
+    admission = controller()
+    ticket = admission.admit(team("a"), [])
+    asyncio.run(ticket.release_unclaimed())
+    assert ticket.released
+    assert admission.admit(team("a"), []).admitted
+
+
+def test_claimed_ticket_is_left_to_the_stream() -> None:
+    admission = controller()
+    ticket = admission.admit(team("a"), [])
+    ticket.claimed = True
+    asyncio.run(ticket.release_unclaimed())
+    assert not ticket.released
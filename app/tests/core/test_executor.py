@@ -0,0 +1,156 @@
+import asyncio
+from typing import Any
+
+import pytest
+
+from app.core.config import settings
+from app.core.graph.executor import ExecutorPool
+
+
+class FakeQueue:
+    def __init__(self, context: "FakeContext") -> None:
+        self.context = context
+        self.items: list[Any] = []
+
+    def put(self, item: Any) -> None:
+        self.items.append(item)
+        # Answer runs the way an executor would, through the pool's relay
+        if self.context.pool is not None and item[0] == "run":
+            stream = self.context.pool._streams[item[1]]
+            for reply in self.context.replies:
+                stream.put_nowait(reply)
+
+
+class FakeProcess:
+    def __init__(self, target: Any, args: tuple[Any, ...], daemon: bool) -> None:
+        self.args = args
+        self.alive = False
+        self.exitcode: int | None = None
+
+    def start(self) -> None:
+        self.alive = True
+
+    def is_alive(self) -> bool:
+        return self.alive
+
+    def kill(self) -> None:
+        self.alive = False
+        self.exitcode = -9
+
+
+class FakeContext:
+    def __init__(self) -> None:
+        self.pool: ExecutorPool | None = None
+        self.replies: list[tuple[str, Any]] = []
+
+    def Queue(self) -> FakeQueue:
+        return FakeQueue(self)
+
+    def Process(self, **kwargs: Any) -> FakeProcess:
+        return FakeProcess(**kwargs)
+
+
+class Message:
+    def model_dump(self) -> dict[str, Any]:
+        return {"content": "hi"}
+
+
+def make_pool(workers: int, *replies: tuple[str, Any]) -> ExecutorPool:
+    """Pool of fake executors answering every run with `replies`."""
+    pool = ExecutorPool(workers)
+    context = FakeContext()
+    if replies:
+        context.pool, context.replies = pool, list(replies)
+    pool._context = context  # type: ignore[assignment]
+    pool._results = context.Queue()  # type: ignore[assignment]
+    for worker in range(workers):
+        pool._processes.append(pool._spawn(worker))
+        pool._load.append(0)
+    return pool
+
+
+async def collect(pool: ExecutorPool, **kwargs: Any) -> list[bytes]:
+    return [
+        frame async for frame in pool.submit("team", [Message()], "thread", **kwargs)
+    ]
+
+
+@pytest.fixture(autouse=True)
+def fast_poll(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "CHAT_DISCONNECT_POLL_INTERVAL", 0.01)
+
+
+def test_pick_worker_prefers_least_loaded() -> None:
+    pool = make_pool(3)
+    pool._load[:] = [2, 0, 1]
+    assert pool._pick_worker() == 1
+    pool._load[:] = [0, 0, 0]
+    assert sorted(pool._pick_worker() for _ in range(3)) == [0, 1, 2]
+
+
+def test_submit_relays_frames_until_done() -> None:
+    pool = make_pool(1, ("frame", b"a"), ("frame", b"b"), ("done", None))
+    inbox = pool._inboxes[0]
+
+    assert asyncio.run(collect(pool)) == [b"a", b"b"]
+    assert [item[0] for item in inbox.items] == ["run"]
+    assert pool._load == [0]
+    assert not pool._streams
+
+
+def test_run_errors_end_with_error_frame() -> None:
+    pool = make_pool(1, ("frame", b"a"), ("error", "boom"))
+    inbox = pool._inboxes[0]
+
+    first, error = asyncio.run(collect(pool))
+    assert first == b"a"
+    assert error.startswith(b'data: {"type":"error"')
+    assert b'"content":"boom"' in error
+    assert [item[0] for item in inbox.items] == ["run"]
+
+
+def test_disconnect_cancels_run() -> None:
+    pool = make_pool(1)
+    inbox = pool._inboxes[0]
+
+    async def is_disconnected() -> bool:
+        return True
+
+    assert asyncio.run(collect(pool, is_disconnected=is_disconnected)) == []
+    (_, run_id, _), cancel = inbox.items
+    assert cancel == ("cancel", run_id, None)
+    assert pool._load == [0]
+    assert not pool._streams
+
+
+def test_dead_worker_fails_its_run() -> None:
+    pool = make_pool(1)
+    pool._processes[0].kill()
+
+    async def run() -> list[bytes]:
+        # Dies after the run was dispatched
+        pool._revive = lambda: asyncio.sleep(0)  # type: ignore[method-assign]
+        return await collect(pool)
+
+    (error,) = asyncio.run(run())
+    assert error.startswith(b'data: {"type":"error"')
+    assert b"exited unexpectedly" in error
+    assert pool._load == [0]
+
+
+def test_submit_respawns_dead_workers() -> None:
+    pool = make_pool(2, ("done", None))
+    dead, alive = pool._processes
+    old_inbox = pool._inboxes[0]
+    dead.kill()
+
+    asyncio.run(collect(pool))
+    asyncio.run(collect(pool))
+
+    assert pool._processes[0] is not dead and pool._processes[0].is_alive()
+    assert pool._processes[1] is alive
+    assert pool._inboxes[0] is not old_inbox
+    assert old_inbox.items == []
+    # The respawned executor takes runs again
+    assert len(pool._inboxes[0].items) + len(pool._inboxes[1].items) == 2
+    assert pool._inboxes[0].items
@@ -0,0 +1,74 @@
+from types import SimpleNamespace
+from typing import Any
+
+from app.core.graph.cache import GraphCache, TeamGraph
+
+
+def team(id: str, workflow: str = "chatbot") -> Any:
+    return SimpleNamespace(id=id, workflow=workflow)
+
+
+def member(name: str, model: str = "gpt") -> Any:
+    return SimpleNamespace(
+        id=name,
+        source=None,
+        type="worker",
+        name=name,
+        role="",
+        backstory="",
+        provider="openai",
+        model=model,
+        temperature=0,
+        interrupt=False,
+        skills=[],
+        uploads=[],
+    )
+
+
+class Builder:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def __call__(self, team: Any, members: list[Any]) -> TeamGraph:
+        self.calls += 1
+        return TeamGraph(graph=object())  # type: ignore[arg-type]
+
+
+def test_same_configuration_is_built_once() -> None:
+    cache, build = GraphCache(maxsize=4), Builder()
+    first = cache.get_or_build(team("a"), [member("bot")], build)
+    assert cache.get_or_build(team("a"), [member("bot")], build) is first
+    assert build.calls == 1
+
+
+def test_member_change_rebuilds_and_drops_stale_graph() -> None:
+    cache, build = GraphCache(maxsize=4), Builder()
+    cache.get_or_build(team("a"), [member("bot")], build)
+    cache.get_or_build(team("a"), [member("bot", model="other")], build)
+    assert build.calls == 2
+    assert len(cache._graphs) == 1
+
+
+def test_least_recently_used_team_is_evicted() -> None:
+    cache, build = GraphCache(maxsize=2), Builder()
+    for id in ("a", "b"):
+        cache.put(id, "v", build(team(id), []))
+    cache.get("a", "v")
+    cache.put("c", "v", build(team("c"), []))
+
+    assert cache.get("b", "v") is None
+    assert cache.get("a", "v") is not None
+
+
+def test_invalidate() -> None:
+    cache, build = GraphCache(maxsize=4), Builder()
+    cache.put("a", "v", build(team("a"), []))
+    cache.invalidate("a")
+    assert cache.get("a", "v") is None
+
+
+def test_disabled_cache_always_builds() -> None:
+    cache, build = GraphCache(maxsize=0), Builder()
+    cache.get_or_build(team("a"), [], build)
+    cache.get_or_build(team("a"), [], build)
+    assert build.calls == 2
@@ -0,0 +1,78 @@
+import asyncio
+from typing import Any
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from app.core.graph import history
+from app.core.graph.history import SUMMARY_ID, HistoryManager, window_start
+
+
+class WordEncoding:
+    def encode(self, text: str, **kwargs: Any) -> list[str]:
+        return text.split()
+
+
+@pytest.fixture(autouse=True)
+def words(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(history, "get_encoding", lambda model: WordEncoding())
+    monkeypatch.setattr(history.settings, "CHAT_HISTORY_TOKEN_BUDGET", 30)
+    monkeypatch.setattr(history.settings, "CHAT_HISTORY_SUMMARY_TOKENS", 10)
+    monkeypatch.setattr(history.settings, "CHAT_HISTORY_STRATEGY", "summarize")
+
+
+def conversation(turns: int) -> list[Any]:
+    messages: list[Any] = []
+    for turn in range(turns):
+        messages.append(HumanMessage(content=f"question {turn} " * 3))
+        messages.append(AIMessage(content=f"answer {turn} " * 3))
+    return messages
+
+
+def manager(summary: str | None) -> HistoryManager:
+    manager = HistoryManager()
+
+    async def summarize(*_: Any) -> str | None:
+        return summary
+
+    manager.summary = summarize  # type: ignore[method-assign]
+    return manager
+
+
+def test_window_start_keeps_newest() -> None:
+    assert window_start([5, 5, 5], 10) == 1
+    # The latest message is kept even when it's over budget on its own
+    assert window_start([5, 50], 10) == 1
+
+
+def test_short_history_is_kept() -> None:
+    messages = conversation(1)
+    window = asyncio.run(manager("S").window("t", "team", messages, "openai", "gpt"))
+    assert window.messages == messages and window.summary is None
+    assert window.prompt() == messages
+
+
+def test_summary_is_prompt_context_only() -> None:
+    messages = conversation(5)
+    window = asyncio.run(manager("S").window("t", "team", messages, "openai", "gpt"))
+
+    assert window.messages == messages[-len(window.messages) :]
+    assert len(window.messages) < len(messages)
+    assert isinstance(window.summary, SystemMessage)
+    assert window.summary.id == SUMMARY_ID
+    assert window.prompt() == [window.summary, *window.messages]
+
+
+def test_resent_summary_is_not_summarized_again() -> None:
+    messages = conversation(1)
+    resent = [SystemMessage(content="Summary: ...", id=SUMMARY_ID), *messages]
+    window = asyncio.run(manager("S").window("t", "team", resent, "openai", "gpt"))
+    assert window.messages == messages
+
+
+def test_failed_summary_drops_old_messages() -> None:
+    window = asyncio.run(
+        manager(None).window("t", "team", conversation(5), "openai", "gpt")
+    )
+    assert window.summary is None
+    assert window.prompt() == window.messages
@@ -0,0 +1,106 @@
+import asyncio
+from typing import Any
+
+import pytest
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from app.core.config import settings
+from app.core.llm import images
+from app.core.llm.images import (
+    ImageResolvingChatModel,
+    image_links,
+    is_thread_image,
+    parse_data_url,
+    resolve_images_sync,
+    thread_image_prefix,
+)
+
+REF = f"{thread_image_prefix('thread')}abc.png"
+DATA_URL = "data:image/png;base64,aGVsbG8="
+
+
+class EchoModel(BaseChatModel):
+    """Answers with the URL of the image it received."""
+
+    @property
+    def _llm_type(self) -> str:
+        return "echo"
+
+    def _generate(
+        self, messages: list[BaseMessage], *args: Any, **kwargs: Any
+    ) -> ChatResult:
+        url = messages[-1].content[1]["image_url"]["url"]
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=url))])
+
+
+def image_message(url: str) -> HumanMessage:
+    return HumanMessage(
+        content=[
+            {"type": "text", "text": "look"},
+            {"type": "image_url", "image_url": {"url": url}},
+        ]
+    )
+
+
+def test_parse_data_url() -> None:
+    assert parse_data_url(DATA_URL) == ("image/png", b"hello")
+    assert parse_data_url("https://example.com/a.png") is None
+    assert parse_data_url("data:image/png;base64,abc") is None
+
+
+def test_sync_resolution_inlines_refs() -> None:
+    images._resolved[REF] = DATA_URL
+    plain = HumanMessage(content="hi")
+
+    resolved = resolve_images_sync([plain, image_message(REF)], "thread")
+
+    assert resolved[0] is plain
+    assert resolved[1].content[1]["image_url"]["url"] == DATA_URL
+
+
+def test_sync_resolution_inside_event_loop() -> None:
+    images._resolved[REF] = DATA_URL
+
+    async def main() -> str:
+        # Sync model calls can be made from a running loop
+        return resolve_images_sync([image_message(REF)], "thread")[0].content[1][
+            "image_url"
+        ]["url"]
+
+    assert asyncio.run(main()) == DATA_URL
+
+
+def test_thread_images() -> None:
+    ref = f"{thread_image_prefix('thread')}abc.png"
+    assert ref == f"s3://{settings.AWS_S3_BUCKET_NAME}/chat-images/thread/abc.png"
+    assert is_thread_image(ref, "thread")
+    assert not is_thread_image(ref, "other")
+    assert not is_thread_image("s3://secrets/chat-images/thread/abc.png", "thread")
+    assert not is_thread_image(
+        f"{thread_image_prefix('thread')}../other/a.png", "thread"
+    )
+    assert not is_thread_image(f"{thread_image_prefix('thread')}nested/a.png", "thread")
+
+
+def test_foreign_refs_get_no_link() -> None:
+    refs = ["s3://secrets/key", f"{thread_image_prefix('other')}abc.png"]
+    assert asyncio.run(image_links(refs, "thread")) == {}
+
+
+def test_refs_of_other_threads_are_refused() -> None:
+    images._resolved[REF] = DATA_URL
+    with pytest.raises(ValueError, match="doesn't belong"):
+        resolve_images_sync([image_message(REF)], "other")
+
+
+def test_model_resolves_refs_of_the_calling_thread() -> None:
+    images._resolved[REF] = DATA_URL
+    model = ImageResolvingChatModel(inner=EchoModel())
+    config = {"configurable": {"thread_id": "thread"}}
+
+    assert model.invoke([image_message(REF)], config).content == DATA_URL
+    assert asyncio.run(model.ainvoke([image_message(REF)], config)).content == DATA_URL
+    with pytest.raises(ValueError):
+        model.invoke([image_message(REF)], {"configurable": {"thread_id": "other"}})
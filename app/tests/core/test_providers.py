@@ -0,0 +1,44 @@
+from typing import Any
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from app.core.config import settings
+from app.core.llm.images import ImageResolvingChatModel
+from app.core.llm.response_cache import response_cache
+from app.core.providers import ModelProviderManager
+
+
+def make_manager(client: Any) -> ModelProviderManager:
+    manager = ModelProviderManager()
+    manager.init_functions["fake"] = lambda *_, **__: client
+    return manager
+
+
+def test_cache_is_attached_to_the_outermost_model(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(settings, "LLM_CACHE_ENABLED", True)
+    monkeypatch.setattr(settings, "CHAT_IMAGE_OFFLOAD", True)
+    inner = FakeListChatModel(responses=["hi"])
+
+    client = make_manager(inner).init_model("fake", "model", 0, "key", "url")
+
+    assert isinstance(client, ImageResolvingChatModel)
+    assert client.cache is response_cache
+    assert client.inner is inner and inner.cache is None
+
+
+def test_sampled_models_are_not_cached(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "LLM_CACHE_ENABLED", True)
+    monkeypatch.setattr(settings, "CHAT_IMAGE_OFFLOAD", False)
+    inner = FakeListChatModel(responses=["hi"])
+
+    client = make_manager(inner).init_model("fake", "model", 0.7, "key", "url")
+
+    assert client is inner and inner.cache is None
+
+
+def test_missing_client_is_refused() -> None:
+    with pytest.raises(ValueError, match="no client"):
+        make_manager(None).init_model("fake", "model", 0, "key", "url")
@@ -0,0 +1,129 @@
+import asyncio
+from collections.abc import AsyncIterator
+
+from app.core.graph.replay import ReplayRegistry, RunBuffer
+
+
+async def run(*chunks: bytes, fail: Exception | None = None) -> AsyncIterator[bytes]:
+    for chunk in chunks:
+        await asyncio.sleep(0)
+        yield chunk
+    if fail is not None:
+        raise fail
+
+
+async def drain(frames: AsyncIterator[bytes]) -> list[bytes]:
+    return [frame async for frame in frames]
+
+
+def event_id(buffer: RunBuffer, position: int) -> str:
+    return f"{buffer.run_id}-{position}"
+
+
+def test_subscribe_streams_frames_with_ids() -> None:
+    async def main() -> tuple[RunBuffer, list[bytes]]:
+        registry = ReplayRegistry(maxlen=8, grace=1, ttl=60)
+        buffer = registry.start("thread", run(b"data: a\n\n", b"data: b\n\n"))
+        return buffer, await drain(buffer.subscribe())
+
+    buffer, frames = asyncio.run(main())
+    assert frames == [
+        f"id: {event_id(buffer, 1)}\ndata: a\n\n".encode(),
+        f"id: {event_id(buffer, 2)}\ndata: b\n\n".encode(),
+    ]
+
+
+def test_reconnect_replays_after_last_event_id() -> None:
+    async def main() -> list[bytes]:
+        registry = ReplayRegistry(maxlen=8, grace=1, ttl=60)
+        buffer = registry.start("thread", run(b"a", b"b", b"c"))
+        await buffer.task
+        assert registry.get("thread") is buffer
+        return await drain(buffer.subscribe(event_id(buffer, 1)))
+
+    assert [frame.split(b"\n")[1] for frame in asyncio.run(main())] == [b"b", b"c"]
+
+
+def test_id_of_another_run_replays_from_the_start() -> None:
+    async def main() -> list[bytes]:
+        registry = ReplayRegistry(maxlen=8, grace=1, ttl=60)
+        previous = registry.start("thread", run(*[b"x"] * 5))
+        await previous.task
+        buffer = registry.start("thread", run(b"a", b"b"))
+        await buffer.task
+        return await drain(buffer.subscribe(event_id(previous, 5)))
+
+    assert [frame.split(b"\n")[1] for frame in asyncio.run(main())] == [b"a", b"b"]
+
+
+def test_dropped_frames_are_reported() -> None:
+    async def main() -> list[bytes]:
+        registry = ReplayRegistry(maxlen=2, grace=1, ttl=60)
+        buffer = registry.start("thread", run(b"a", b"b", b"c"))
+        await buffer.task
+        return await drain(buffer.subscribe())
+
+    gap, *frames = asyncio.run(main())
+    assert gap.startswith(b'data: {"type":"error"')
+    assert b"1 events" in gap
+    assert [frame.split(b"\n")[1] for frame in frames] == [b"b", b"c"]
+
+
+def test_failed_run_ends_with_error_frame() -> None:
+    async def main() -> list[bytes]:
+        registry = ReplayRegistry(maxlen=8, grace=1, ttl=60)
+        buffer = registry.start("thread", run(b"a", fail=RuntimeError("boom")))
+        return await drain(buffer.subscribe())
+
+    first, error = asyncio.run(main())
+    assert first.endswith(b"-1\na")
+    assert error.split(b"\n")[1].startswith(b'data: {"type":"error"')
+    assert b'"content":"boom"' in error
+
+
+def test_reported_error_is_not_repeated() -> None:
+    async def main() -> list[bytes]:
+        registry = ReplayRegistry(maxlen=8, grace=1, ttl=60)
+        frame = b'data: {"type":"error","id":"1","name":"error"}\n\n'
+        buffer = registry.start("thread", run(frame, fail=RuntimeError("boom")))
+        return await drain(buffer.subscribe())
+
+    assert len(asyncio.run(main())) == 1
+
+
+def test_new_turn_cancels_previous_run() -> None:
+    async def main() -> None:
+        registry = ReplayRegistry(maxlen=8, grace=1, ttl=60)
+        first = registry.start("thread", run(*[b"x"] * 100))
+        second = registry.start("thread", run(b"y"))
+        await asyncio.sleep(0)
+        assert first.task is not None and first.task.cancelled()
+        assert registry.get("thread") is second
+        await second.task
+
+    asyncio.run(main())
+
+
+def test_abandoned_run_is_cancelled_after_grace() -> None:
+    async def main() -> None:
+        registry = ReplayRegistry(maxlen=8, grace=0.01, ttl=60)
+        buffer = registry.start("thread", run(*[b"x"] * 10_000))
+        frames = buffer.subscribe()
+        await frames.__anext__()
+        await frames.aclose()
+        assert buffer.subscribers == 0
+        await asyncio.sleep(0.05)
+        assert buffer.task is not None and buffer.task.cancelled()
+
+    asyncio.run(main())
+
+
+def test_finished_runs_expire_after_ttl() -> None:
+    async def main() -> None:
+        registry = ReplayRegistry(maxlen=8, grace=1, ttl=0)
+        buffer = registry.start("thread", run(b"a"))
+        await buffer.task
+        await asyncio.sleep(0.01)
+        assert registry.get("thread") is None
+
+    asyncio.run(main())
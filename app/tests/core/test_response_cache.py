@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+from langchain_core.load import dumps
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration
+
+from app.core.llm import response_cache as module
+from app.core.llm.response_cache import ResponseCache, cache_key
+
+LLM = "openai:gpt-4o:0"
+
+
+def prompt(*, id: str) -> str:
+    return dumps([HumanMessage(content="hello", id=id)])
+
+
+def answer(text: str) -> list[ChatGeneration]:
+    return [ChatGeneration(message=AIMessage(content=text))]
+
+
+def test_key_ignores_message_ids() -> None:
+    assert cache_key(prompt(id="1"), LLM) == cache_key(prompt(id="2"), LLM)
+    assert cache_key(prompt(id="1"), LLM) != cache_key(prompt(id="1"), "other")
+
+
+def test_hits_are_flagged() -> None:
+    cache = ResponseCache(maxsize=4, ttl=60, persistent=False)
+    assert cache.lookup(prompt(id="1"), LLM) is None
+    cache.update(prompt(id="1"), LLM, answer("hi"))
+
+    (generation,) = cache.lookup(prompt(id="2"), LLM)
+    assert generation.message.content == "hi"
+    assert generation.message.response_metadata["cache_hit"] is True
+
+
+def test_least_recently_used_is_evicted() -> None:
+    cache = ResponseCache(maxsize=2, ttl=60, persistent=False)
+    for text in ("a", "b"):
+        cache.update(text, LLM, answer(text))
+    cache.lookup("a", LLM)
+    cache.update("c", LLM, answer("c"))
+
+    assert cache.lookup("b", LLM) is None
+    assert cache.lookup("a", LLM) is not None
+    assert cache.lookup("c", LLM) is not None
+
+
+def test_entries_expire(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = 1000.0
+    monkeypatch.setattr(module.time, "monotonic", lambda: now)
+    cache = ResponseCache(maxsize=2, ttl=10, persistent=False)
+    cache.update("a", LLM, answer("a"))
+    now += 11
+
+    assert cache.lookup("a", LLM) is None
+    assert not cache._entries
+
+
+def test_async_memory_tier() -> None:
+    cache = ResponseCache(maxsize=2, ttl=60, persistent=False)
+
+    async def main() -> object:
+        assert await cache.alookup("a", LLM) is None
+        await cache.aupdate("a", LLM, answer("a"))
+        return await cache.alookup("a", LLM)
+
+    (generation,) = asyncio.run(main())
+    assert generation.message.content == "a"
+
+
+def test_disabled_memory_tier() -> None:
+    cache = ResponseCache(maxsize=0, ttl=60, persistent=False)
+    cache.update("a", LLM, answer("a"))
+    assert cache.lookup("a", LLM) is None
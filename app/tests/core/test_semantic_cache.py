@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import END
+
+from app.core.graph import semantic_cache as module
+from app.core.graph.semantic_cache import (
+    SemanticCache,
+    create_lookup_node,
+    last_question,
+)
+
+CONFIG = {"configurable": {"team_id": "team", "team_version": "1"}}
+
+
+class FakeEmbeddings:
+    """Embeds texts as letter counts, so equal texts are identical vectors."""
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return [
+            float(text.count(letter)) + 0.01 for letter in "abcdefghijklmnopqrstuvwxyz"
+        ]
+
+
+@pytest.fixture
+def cache(monkeypatch: pytest.MonkeyPatch) -> SemanticCache:
+    cache = SemanticCache(threshold=0.999, max_entries=8, embedding_model="fake")
+    cache._embedder = FakeEmbeddings()
+    monkeypatch.setattr(module, "semantic_cache", cache)
+    return cache
+
+
+def test_question_includes_recent_context() -> None:
+    history = [
+        HumanMessage(content="sales in 2022?"),
+        AIMessage(content="12 units"),
+        HumanMessage(content="and in 2023?"),
+    ]
+    assert last_question({"history": history}) == (
+        "human: sales in 2022?\nai: 12 units\nhuman: and in 2023?"
+    )
+    # Answers that came after the question aren't part of it
+    assert last_question({"history": [*history, AIMessage(content="15")]}) == (
+        last_question({"history": history})
+    )
+    assert last_question({"history": [AIMessage(content="hi")]}) is None
+
+
+def test_image_questions_are_not_cached(cache: SemanticCache) -> None:
+    image = HumanMessage(
+        content=[
+            {"type": "text", "text": "what is the refund policy?"},
+            {"type": "image_url", "image_url": {"url": "data:image/png;base64,aGk="}},
+        ]
+    )
+    text = HumanMessage(content="what is the refund policy?")
+    state = {"history": [text, AIMessage(content="30 days"), image]}
+    assert last_question(state) is None
+
+    async def main() -> dict:
+        await cache.store(
+            "team", "1", last_question({"history": [text]}), "30 days", 10
+        )
+        return await create_lookup_node("bot")(state, CONFIG)
+
+    # Not answered with the previous text question's answer
+    assert asyncio.run(main()) == {"next": "bot"}
+
+
+def test_hit_writes_the_answer_to_the_conversation(cache: SemanticCache) -> None:
+    state = {"history": [HumanMessage(content="what is the refund policy?")]}
+    lookup = create_lookup_node("bot")
+
+    async def main() -> tuple[dict, dict]:
+        miss = await lookup(state, CONFIG)
+        await cache.store("team", "1", last_question(state), "30 days", 10)
+        return miss, await lookup(state, CONFIG)
+
+    miss, hit = asyncio.run(main())
+    assert miss == {"next": "bot"}
+    assert hit["next"] == END
+    for channel in ("messages", "history", "all_messages"):
+        assert [message.content for message in hit[channel]] == ["30 days"]
+
+
+def test_follow_up_in_another_context_misses(cache: SemanticCache) -> None:
+    lookup = create_lookup_node("bot")
+    first = {
+        "history": [
+            HumanMessage(content="sales of apples?"),
+            AIMessage(content="12"),
+            HumanMessage(content="and in 2023?"),
+        ]
+    }
+    second = {
+        "history": [
+            HumanMessage(content="headcount of the zoo?"),
+            AIMessage(content="40"),
+            HumanMessage(content="and in 2023?"),
+        ]
+    }
+
+    async def main() -> dict:
+        await cache.store("team", "1", last_question(first), "15", 10)
+        return await lookup(second, CONFIG)
+
+    assert asyncio.run(main()) == {"next": "bot"}
+
+
+def test_new_version_drops_answers(cache: SemanticCache) -> None:
+    async def main() -> object:
+        await cache.store("team", "1", "question", "answer", 10)
+        return await cache.lookup("team", "2", "question")
+
+    assert asyncio.run(main()) is None
@@ -0,0 +1,78 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from app.core.graph import serde
+from app.core.graph.serde import CompressedSerializer, train_dictionary
+
+STATE = {
+    "all_messages": [
+        HumanMessage(content=f"question {i} " * 20, id=str(i)) for i in range(10)
+    ]
+    + [AIMessage(content="an answer " * 50)],
+    "next": "bot",
+}
+
+
+def samples() -> list[bytes]:
+    plain = JsonPlusSerializer()
+    return [
+        plain.dumps_typed(
+            {"messages": [HumanMessage(content=f"sample {i} about topic {i % 7} " * 8)]}
+        )[1]
+        for i in range(500)
+    ]
+
+
+def test_round_trip_is_compressed() -> None:
+    serializer = CompressedSerializer()
+    type_, data = serializer.dumps_typed(STATE)
+
+    assert type_.startswith("msgpack+")
+    assert len(data) < len(JsonPlusSerializer().dumps_typed(STATE)[1])
+    assert serializer.loads_typed((type_, data)) == STATE
+
+
+def test_small_payloads_are_stored_as_is() -> None:
+    serializer = CompressedSerializer(min_size=1 << 20)
+    assert serializer.dumps_typed(STATE) == JsonPlusSerializer().dumps_typed(STATE)
+
+
+def test_reads_uncompressed_rows() -> None:
+    assert (
+        CompressedSerializer().loads_typed(JsonPlusSerializer().dumps_typed(STATE))
+        == STATE
+    )
+
+
+def test_zlib_fallback(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(serde, "zstandard", None)
+    serializer = CompressedSerializer()
+    type_, data = serializer.dumps_typed(STATE)
+
+    assert type_ == "msgpack+zlib"
+    assert serializer.loads_typed((type_, data)) == STATE
+
+
+def test_dictionary_round_trip() -> None:
+    pytest.importorskip("zstandard")
+    dictionary = train_dictionary(samples(), size=4096)
+    serializer = CompressedSerializer(dictionary=dictionary)
+    type_, data = serializer.dumps_typed(STATE)
+
+    assert type_.startswith("msgpack+zstd:")
+    assert serializer.loads_typed((type_, data)) == STATE
+    # Reading it takes the same dictionary
+    with pytest.raises(ValueError, match="not loaded"):
+        CompressedSerializer().loads_typed((type_, data))
+
+
+def test_disabling_compression_keeps_rows_readable(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    compressed = CompressedSerializer().dumps_typed(STATE)
+    monkeypatch.setattr(serde.settings, "CHECKPOINT_SERDE_COMPRESSION", False)
+    serializer = serde.create_serializer()
+
+    assert serializer.loads_typed(compressed) == STATE
+    assert serializer.dumps_typed(STATE) == JsonPlusSerializer().dumps_typed(STATE)
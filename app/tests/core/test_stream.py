@@ -0,0 +1,81 @@
+import asyncio
+import contextvars
+from collections.abc import AsyncIterator
+
+import pytest
+
+from app.core.graph.messages import ChatFrame
+from app.core.graph.stream import coalesce_responses
+
+
+step = contextvars.ContextVar("step", default=0)
+
+
+def frame(content: str, type: str = "ai") -> ChatFrame:
+    return ChatFrame(type=type, id="run", name="node", content=content)
+
+
+async def drain(frames: AsyncIterator[ChatFrame]) -> list[tuple[str, str | None]]:
+    return [(response.type, response.content) async for response in frames]
+
+
+def test_merges_text_chunks_until_another_response() -> None:
+    async def source() -> AsyncIterator[ChatFrame]:
+        for response in (frame("a"), frame("b"), frame("call", "tool"), frame("c")):
+            yield response
+
+    result = asyncio.run(drain(coalesce_responses(source(), window=60, max_bytes=0)))
+
+    assert result == [("ai", "ab"), ("tool", "call"), ("ai", "c")]
+
+
+def test_source_keeps_its_context_across_steps() -> None:
+    seen = []
+
+    async def source() -> AsyncIterator[ChatFrame]:
+        for index in range(3):
+            seen.append(step.get())
+            step.set(index + 1)
+            await asyncio.sleep(0.01)
+            yield frame(str(index))
+
+    asyncio.run(drain(coalesce_responses(source(), window=0.001, max_bytes=0)))
+
+    assert seen == [0, 1, 2]
+
+
+def test_source_errors_are_raised_after_earlier_responses() -> None:
+    async def source() -> AsyncIterator[ChatFrame]:
+        yield frame("a")
+        yield frame("b", "tool")
+        raise RuntimeError("boom")
+
+    received = []
+
+    async def main() -> None:
+        async for response in coalesce_responses(source(), window=60, max_bytes=0):
+            received.append(response.content)
+
+    with pytest.raises(RuntimeError, match="boom"):
+        asyncio.run(main())
+    assert received == ["a", "b"]
+
+
+def test_closing_stops_the_source() -> None:
+    closed = asyncio.Event()
+
+    async def source() -> AsyncIterator[ChatFrame]:
+        try:
+            yield frame("a", "tool")
+            await asyncio.sleep(60)
+            yield frame("b")
+        finally:
+            closed.set()
+
+    async def main() -> None:
+        responses = coalesce_responses(source(), window=60, max_bytes=0)
+        assert (await anext(responses)).content == "a"
+        await responses.aclose()
+        assert closed.is_set()
+
+    asyncio.run(main())
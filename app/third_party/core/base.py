@@ -1,9 +1,33 @@
 import httpx
 from typing import Optional, Dict, Any
+from app.core.config import settings
 from app.utils.logger import get_logger
 from .exceptions import ThirdPartyRequestException
 
 
+_http_client: httpx.AsyncClient | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Process-wide HTTP client, so third-party calls and HTTP skills reuse connections"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_CLIENT_MAX_KEEPALIVE,
+            )
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
 class BaseAsyncThirdPartyRequest:
     def __init__(
         self,
@@ -30,15 +54,14 @@ class BaseAsyncThirdPartyRequest:
     async def request(self, method: str, url: str, **kwargs) -> Any:
         try:
             await self.before_request(method, url, kwargs)
-            async with httpx.AsyncClient() as client:
-                resp: httpx.Response = await client.request(
-                    method,
-                    '/'.join(self.base_url, url),
-                    headers=self.headers,
-                    timeout=self.timeout,
-                    **kwargs
-                )
-                resp.raise_for_status()
+            resp: httpx.Response = await get_http_client().request(
+                method,
+                f"{self.base_url.rstrip('/')}/{url.lstrip('/')}",
+                headers=self.headers,
+                timeout=self.timeout,
+                **kwargs
+            )
+            resp.raise_for_status()
             await self.after_request(resp)
             return await self.handle_response(resp)
         except httpx.RequestError as e:
@@ -0,0 +1,368 @@
+"""
+Graph execution benchmark with deterministic fake chat models.
+
+Measures the overhead this service adds around the LLM calls: graph compilation,
+the LangGraph run itself, event translation, coalescing and SSE encoding. Provider
+latency is replaced by `FakeChatModel`, which streams a fixed answer at a
+configurable token rate, and checkpoints go to an in-process `MemorySaver`.
+
+Usage:
+    python -m tools.benchmark.graph --runs 50 --token-rate 200
+    python -m tools.benchmark.graph --save-baseline tools/benchmark/baseline.json
+    python -m tools.benchmark.graph --baseline tools/benchmark/baseline.json --tolerance 0.2
+
+With `--baseline` the process exits with status 1 when a metric regresses by more
+than the tolerance.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from collections import defaultdict
+from collections.abc import AsyncIterator, Iterator, Sequence
+from typing import Any
+from uuid import uuid4
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langgraph.checkpoint.memory import MemorySaver
+
+from app.api.models import Member, Team
+from app.core.graph.build import build_team_graph, stream_graph
+from app.core.graph.cache import TeamGraph
+from app.core.graph.messages import FrameEncoder
+from app.core.providers import model_provider_manager
+
+
+FAKE_PROVIDER = "fake"
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic chat model that streams `answer` word by word at `token_rate`.
+
+    When tools are bound it answers with a call to the first tool instead, using
+    the next entry of `routes` as its target, which lets leaders delegate and finish.
+    """
+
+    answer: str = "lorem ipsum dolor sit amet " * 8
+    token_rate: float = 100.0  # tokens per second, 0 means no delay
+    tools: list[dict[str, Any]] = []
+    routes: list[str] = []
+    # Shared by the copies made in bind_tools so routing advances across calls
+    calls: list[int] = [0]
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-benchmark"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "FakeChatModel":
+        from langchain_core.utils.function_calling import convert_to_openai_tool
+
+        return self.model_copy(
+            update={"tools": [convert_to_openai_tool(tool) for tool in tools]}
+        )
+
+    def _route(self) -> AIMessage:
+        target = self.routes[self.calls[0] % len(self.routes)] if self.routes else "FINISH"
+        self.calls[0] += 1
+        name = self.tools[0]["function"]["name"]
+        return AIMessage(
+            content="",
+            tool_calls=[
+                {
+                    "name": name,
+                    "args": {"next": target, "task": "benchmark task"},
+                    "id": str(uuid4()),
+                }
+            ],
+        )
+
+    def _tokens(self) -> Iterator[str]:
+        for word in self.answer.split(" "):
+            if word:
+                yield f"{word} "
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.tools:
+            message = self._route()
+        else:
+            message = AIMessage(content="".join(self._tokens()))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        if self.tools:
+            message = self._route()
+            yield ChatGenerationChunk(
+                message=AIMessageChunk(
+                    content="",
+                    tool_call_chunks=[
+                        {
+                            "name": call["name"],
+                            "args": json.dumps(call["args"]),
+                            "id": call["id"],
+                            "index": 0,
+                        }
+                        for call in message.tool_calls
+                    ],
+                )
+            )
+            return
+        delay = 1 / self.token_rate if self.token_rate > 0 else 0
+        for token in self._tokens():
+            if delay:
+                await asyncio.sleep(delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+
+def register_fake_provider(token_rate: float, routes: list[str]) -> None:
+    """Register the `fake` provider so synthetic members resolve to FakeChatModel."""
+
+    def init_model(*_: Any, **__: Any) -> FakeChatModel:
+        return FakeChatModel(token_rate=token_rate, routes=routes, calls=[0])
+
+    model_provider_manager.providers[FAKE_PROVIDER] = {"provider_name": FAKE_PROVIDER}
+    model_provider_manager.models[FAKE_PROVIDER] = []
+    model_provider_manager.init_functions[FAKE_PROVIDER] = init_model
+    model_provider_manager.clients.invalidate(FAKE_PROVIDER)
+
+
+def make_member(id: int, name: str, type: str, source: int | None = None) -> Member:
+    member = Member(
+        id=id,
+        name=name,
+        type=type,
+        source=source,
+        role=f"{name} role",
+        backstory=f"{name} backstory",
+        provider=FAKE_PROVIDER,
+        model="fake-model",
+        temperature=0,
+        interrupt=False,
+    )
+    member.skills = []
+    member.uploads = []
+    return member
+
+
+def make_team(workflow: str, workers: int) -> tuple[Team, list[Member]]:
+    """Synthetic team of `workers` members for the given workflow."""
+    team = Team(id=uuid4(), name=f"benchmark-{workflow}", workflow=workflow)
+    if workflow == "hierarchical":
+        members = [make_member(1, "leader", "root")]
+        members += [
+            make_member(i + 2, f"worker{i}", "worker", source=1) for i in range(workers)
+        ]
+    elif workflow == "sequential":
+        members = [
+            make_member(i + 1, f"worker{i}", "worker", source=i or None)
+            for i in range(workers)
+        ]
+    elif workflow in ["ragbot", "chatbot"]:
+        members = [make_member(1, "bot", "worker")]
+    else:
+        raise ValueError(f"Unsupported benchmark workflow: {workflow}")
+    return team, members
+
+
+def make_state(team: Team, team_graph: TeamGraph) -> dict[str, Any]:
+    """Initial state of a turn, as generator() builds it."""
+    messages = [HumanMessage(content="benchmark question", name="user")]
+    state: dict[str, Any] = {
+        "history": messages,
+        "messages": [],
+        "team": team_graph.team,
+        "all_messages": messages,
+    }
+    if team.workflow == "hierarchical":
+        state["main_task"] = messages
+    else:
+        state["next"] = team_graph.entry
+    return state
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(q * (len(values) - 1))))
+    return values[index]
+
+
+async def run_once(
+    team: Team, members: list[Member], checkpointer: MemorySaver
+) -> dict[str, Any]:
+    """Run one turn and collect timings from the frames and the raw events."""
+    started = time.perf_counter()
+    team_graph = build_team_graph(team, members)
+    compiled = time.perf_counter()
+    root = team_graph.graph.copy(update={"checkpointer": checkpointer})
+    state = make_state(team, team_graph)
+    config = {"configurable": {"thread_id": str(uuid4())}, "recursion_limit": 50}
+
+    encoder = FrameEncoder()
+    first_token: float | None = None
+    frames = 0
+    run_started = time.perf_counter()
+    async for frame in stream_graph(root, state, config):
+        encoder.encode(frame)
+        frames += 1
+        if first_token is None and frame.type == "ai" and frame.content:
+            first_token = time.perf_counter() - run_started
+    finished = time.perf_counter()
+
+    return {
+        "compile": compiled - started,
+        "ttft": first_token if first_token is not None else finished - run_started,
+        "total": finished - run_started,
+        "frames": frames,
+    }
+
+
+async def node_overhead(
+    team: Team, members: list[Member], checkpointer: MemorySaver
+) -> tuple[dict[str, float], float]:
+    """Per-node time spent outside the chat model, and raw events per second."""
+    team_graph = build_team_graph(team, members)
+    root = team_graph.graph.copy(update={"checkpointer": checkpointer})
+    state = make_state(team, team_graph)
+    config = {"configurable": {"thread_id": str(uuid4())}, "recursion_limit": 50}
+
+    node_time: defaultdict[str, float] = defaultdict(float)
+    model_time: defaultdict[str, float] = defaultdict(float)
+    starts: dict[str, float] = {}
+    events = 0
+    started = time.perf_counter()
+    async for event in root.astream_events(state, version="v2", config=config):
+        events += 1
+        now = time.perf_counter()
+        node = event["metadata"].get("langgraph_node")
+        kind = event["event"]
+        if kind in ("on_chain_start", "on_chat_model_start"):
+            starts[event["run_id"]] = now
+        elif kind == "on_chain_end" and node and event["name"] == node:
+            node_time[node] += now - starts.pop(event["run_id"], now)
+        elif kind == "on_chat_model_end" and node:
+            model_time[node] += now - starts.pop(event["run_id"], now)
+    elapsed = time.perf_counter() - started
+
+    overhead = {
+        node: max(total - model_time[node], 0.0) for node, total in node_time.items()
+    }
+    return overhead, events / elapsed if elapsed else 0.0
+
+
+async def benchmark(workflow: str, runs: int, workers: int) -> dict[str, float]:
+    team, members = make_team(workflow, workers)
+    checkpointer = MemorySaver()
+    results = [await run_once(team, members, checkpointer) for _ in range(runs)]
+    overhead, events_per_sec = await node_overhead(team, members, checkpointer)
+
+    ttft = [result["ttft"] for result in results]
+    compile_times = [result["compile"] for result in results]
+    totals = [result["total"] for result in results]
+    frames = sum(result["frames"] for result in results)
+    return {
+        "ttft_p50": percentile(ttft, 0.5),
+        "ttft_p99": percentile(ttft, 0.99),
+        "compile_p50": percentile(compile_times, 0.5),
+        "turn_p50": percentile(totals, 0.5),
+        "node_overhead_mean": statistics.fmean(overhead.values()) if overhead else 0.0,
+        "events_per_sec": events_per_sec,
+        "frames_per_sec": frames / sum(totals) if sum(totals) else 0.0,
+    }
+
+
+# Metrics where a higher value is better, every other metric is a duration
+HIGHER_IS_BETTER = {"events_per_sec", "frames_per_sec"}
+
+
+def compare(
+    report: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    tolerance: float,
+) -> list[str]:
+    """Return a description of every metric that regressed beyond `tolerance`."""
+    regressions = []
+    for workflow, metrics in report.items():
+        for name, value in metrics.items():
+            expected = baseline.get(workflow, {}).get(name)
+            if not expected:
+                continue
+            if name in HIGHER_IS_BETTER:
+                regressed = value < expected * (1 - tolerance)
+            else:
+                regressed = value > expected * (1 + tolerance)
+            if regressed:
+                regressions.append(
+                    f"{workflow}.{name}: {value:.6f} vs baseline {expected:.6f}"
+                )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--workflow",
+        action="append",
+        choices=["hierarchical", "sequential", "ragbot"],
+        help="Workflows to benchmark, repeatable (default: all)",
+    )
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=3, help="Members per team")
+    parser.add_argument(
+        "--token-rate", type=float, default=0, help="Fake tokens per second, 0 = no delay"
+    )
+    parser.add_argument("--baseline", help="Fail when regressing against this JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--save-baseline", help="Write the report to this JSON file")
+    args = parser.parse_args(argv)
+
+    workflows = args.workflow or ["hierarchical", "sequential", "ragbot"]
+    register_fake_provider(
+        args.token_rate, routes=[f"worker{i}" for i in range(args.workers)] + ["FINISH"]
+    )
+
+    report = {
+        workflow: asyncio.run(benchmark(workflow, args.runs, args.workers))
+        for workflow in workflows
+    }
+    print(json.dumps(report, indent=4))
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(report, f, indent=4)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())